@@ -1,163 +1,537 @@
 # ml_model/app.py
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
 import joblib
 import pandas as pd
 import numpy as np
+import hmac
+import io
+import itertools
 import os
+import threading
+import time
 from datetime import datetime
+from typing import NamedTuple
+from batch_formats import (BINARY_INPUT_TYPES, JSON, UnsupportedFormat, columns_frame, decode_frame,
+                           encode_results, response_type)
+from bulk_io import DEFAULT_CHUNK_SIZE, ProgressLog, ResultWriter, iter_csv_chunks, iter_ndjson_chunks, score_chunks
+from distillation import STUDENT_MODEL_FILE
+from compression import BodyTooLarge, UnsupportedEncoding, compress_response, decode_request
+from date_parsing import to_datetime64
+from features import (compute_features, DATE_COLUMNS, EARLY_STAGE_FUNDING, ENGINEERED_FEATURES,
+                      SLOW_MILESTONE_VELOCITY)
+from feature_schema import DEFAULT_CATEGORY_FREQUENCY, PROBE_PAYLOADS, build_schema
+from fast_inference import COMPILED_FORMAT, compile_predictor, load_compiled, save_compiled
+from metrics import BATCH_SIZE_BUCKETS, CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
+from micro_batcher import MicroBatcher
+from model_manifest import MANIFEST_FILE, ManifestMismatch, read_manifest, verify_manifest
+from prediction_cache import PredictionCache, feature_key, fingerprint_files
+from threshold_analysis import DEFAULT_THRESHOLD, package_threshold
 
 app = Flask(__name__)
 CORS(app)
 
-# Global variables for model and preprocessors
-model = None
-model_package = None
-category_encoder = None
-imputer = None
-scaler = None
-optimal_threshold = 0.20  # From threshold analysis
+class ModelAssets(NamedTuple):
+    """
+    One load's model, preprocessors and everything derived from them. A
+    reload publishes a new instance (current_assets) and each request reads
+    it once (request_assets), so a request that overlaps a reload is scored,
+    thresholded and cached with a single model.
+    """
+    model: object = None  # sklearn model; None when the compiled artifact was memory-mapped
+    package: dict = None  # advanced model package (threshold, feature stats, training record)
+    encoder: object = None
+    imputer: object = None
+    scaler: object = None
+    compiled: object = None  # fast array inference path (see fast_inference.py)
+    student: object = None  # distilled low-latency model, compiled (see distillation.py)
+    student_package: dict = None
+    schema: object = None  # /predict feature schema (see feature_schema.py)
+    stats: object = None  # training category frequencies and risk cut-offs (see feature_stats.py)
+    threshold: float = DEFAULT_THRESHOLD
+    fingerprint: str = None
+
+# Assets being served (no model until the first load)
+current_assets = ModelAssets()
+model_status = 'not_loaded'  # not_loaded → loading → ready | failed
+model_load_seconds = None
+model_loaded_at = None
+model_load_error = None  # last failed load or reload
+model_loader = None
+model_watcher = None
+
+# Memory-mappable compiled predictor written next to the .pkl files
+COMPILED_MODEL_FILE = 'startup_success_model_compiled.joblib'
+
+# Identical payloads are common (dashboard refreshes, /api/predict-and-save
+# retries); PREDICTION_CACHE_SIZE=0 disables the cache
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+)
+
+# Responses below COMPRESSION_MIN_BYTES go out uncompressed. Request bodies
+# are capped at MAX_REQUEST_MB (Flask's MAX_CONTENT_LENGTH, answered with
+# 413), and compressed ones at that size once decoded
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+app.config['MAX_CONTENT_LENGTH'] = int(float(os.environ.get('MAX_REQUEST_MB', 512)) * 2**20)
+# Endpoints that read the body incrementally get it decompressed on the fly
+STREAMED_ENDPOINTS = {'predict_stream'}
+
+# 'fast' serves requests from the distilled student model when one was
+# trained (train_model.py --distill); ?mode= overrides it per request
+SERVING_MODES = ('full', 'fast')
+DEFAULT_SERVING_MODE = os.environ.get('SERVING_MODE', 'full')
+if DEFAULT_SERVING_MODE not in SERVING_MODES:
+    raise ValueError(f"SERVING_MODE must be one of {', '.join(SERVING_MODES)}, got {DEFAULT_SERVING_MODE!r}")
+
+# MODEL_RELOAD_INTERVAL > 0 polls the model manifest every N seconds and hot
+# reloads when a new one is published; POST /admin/reload reloads on demand
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 0))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+reload_lock = threading.Lock()  # one load or reload at a time
+model_files_signature = None
+# Set by serve.py in forked workers: /admin/reload asks the parent process
+# to load the new model once and replace the workers
+reload_handler = None
+
+# Prometheus metrics, served on /metrics
+metrics_registry = Registry()
+requests_total = metrics_registry.counter(
+    'investiq_requests_total', 'HTTP requests by endpoint and status code', ('endpoint', 'status'))
+request_seconds = metrics_registry.histogram(
+    'investiq_request_duration_seconds', 'HTTP request latency in seconds', ('endpoint',))
+stage_seconds = metrics_registry.histogram(
+    'investiq_stage_duration_seconds', 'Time spent in each prediction pipeline stage', ('endpoint', 'stage'))
+base_model_seconds = metrics_registry.histogram(
+    'investiq_base_model_duration_seconds', 'Time spent in each base model of the ensemble', ('endpoint', 'model'))
+errors_total = metrics_registry.counter(
+    'investiq_prediction_errors_total', 'Failed predictions by endpoint and error type', ('endpoint', 'type'))
+batch_rows = metrics_registry.histogram(
+    'investiq_batch_size_rows', 'Rows scored per model call', ('endpoint',), buckets=BATCH_SIZE_BUCKETS)
+cache_lookups_total = metrics_registry.counter(
+    'investiq_prediction_cache_lookups_total', '/predict cache lookups by result', ('result',))
+
+def model_directory():
+    return os.environ.get('MODEL_DIR') or os.path.dirname(os.path.abspath(__file__))
+
+def model_paths(base_dir):
+    """Model, preprocessor and student files app.py reads from base_dir, by role"""
+    # Try to load advanced model first
+    advanced_model_path = os.path.join(base_dir, 'startup_success_model_advanced.pkl')
+    return {
+        'model': advanced_model_path if os.path.exists(advanced_model_path)
+                 else os.path.join(base_dir, 'startup_success_model.pkl'),
+        'encoder': os.path.join(base_dir, 'category_encoder.pkl'),
+        'imputer': os.path.join(base_dir, 'imputer.pkl'),
+        'scaler': os.path.join(base_dir, 'scaler.pkl'),
+        'student': os.path.join(base_dir, STUDENT_MODEL_FILE),
+        'compiled': os.path.join(base_dir, COMPILED_MODEL_FILE),
+    }
 
 def load_model_assets():
-    """Load all model assets with proper error handling"""
-    global model, model_package, category_encoder, imputer, scaler, optimal_threshold
+    """
+    Load (or reload) all model assets with proper error handling.
     
+    Everything is read and compiled off to the side and then swapped in at
+    once (publish_model_assets), so requests keep being served by the
+    current model while a reload runs; if it fails the current model stays.
+    """
+    with reload_lock:
+        return _load_model_assets()
+
+def _load_model_assets():
+    global model_status, model_load_seconds, model_loaded_at, model_load_error, model_files_signature
+    
+    started = time.perf_counter()
+    reloading = model_available()
+    if not reloading:
+        model_status = 'loading'
     try:
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        
-        # Try to load advanced model first
-        advanced_model_path = os.path.join(BASE_DIR, 'startup_success_model_advanced.pkl')
-        if os.path.exists(advanced_model_path):
-            model_package = joblib.load(advanced_model_path)
-            model = model_package['model']
-            optimal_threshold = model_package.get('optimal_threshold', 0.20)
-            print(f"✅ Advanced model loaded with optimal threshold: {optimal_threshold}")
-        else:
-            # Fallback to original model
-            model_path = os.path.join(BASE_DIR, 'startup_success_model.pkl')
-            model = joblib.load(model_path)
-            print("✅ Original model loaded (advanced model not found)")
-        
-        # Load preprocessors
-        encoder_path = os.path.join(BASE_DIR, 'category_encoder.pkl')
-        imputer_path = os.path.join(BASE_DIR, 'imputer.pkl')
-        scaler_path = os.path.join(BASE_DIR, 'scaler.pkl')
-        
-        category_encoder = joblib.load(encoder_path)
-        imputer = joblib.load(imputer_path)
+        # Taken before reading, so a manifest published during the load
+        # triggers another reload on the next poll
+        model_files_signature = model_files_fingerprint()
+        assets, save_compiled = read_model_assets(model_directory(), verify_digests=reloading)
+        publish_model_assets(assets)
+        if save_compiled:
+            _save_compiled_artifact(model_paths(model_directory())['compiled'], assets)
         
-        # Scaler is optional (only for advanced model)
-        if os.path.exists(scaler_path):
-            scaler = joblib.load(scaler_path)
-            print("✅ Scaler loaded (advanced preprocessing enabled)")
-        
-        print("✅ All model assets loaded successfully!")
+        model_status = 'ready'
+        model_load_seconds = round(time.perf_counter() - started, 3)
+        model_loaded_at = datetime.now().isoformat()
+        model_load_error = None
+        print(f"✅ All model assets {'reloaded' if reloading else 'loaded'} successfully! "
+              f"({model_load_seconds}s, version {assets.fingerprint})")
         return True
         
     except FileNotFoundError as e:
+        model_load_error = str(e)
+        if not reloading:
+            model_status = 'failed'
         print(f"❌ Error loading model assets: {e}")
         print("Please run train_model.py first to generate model files.")
         return False
     except Exception as e:
+        model_load_error = str(e)
+        if not reloading:
+            model_status = 'failed'
         print(f"❌ Unexpected error loading model: {e}")
         return False
 
-def preprocess_input(data):
+def model_files_fingerprint():
+    """Stat fingerprint of the model manifest in MODEL_DIR (cheap enough to poll), None without one"""
+    path = os.path.join(model_directory(), MANIFEST_FILE)
+    return fingerprint_files([path]) if os.path.exists(path) else None
+
+def model_files_changed():
     """
-    Advanced preprocessing matching the training pipeline
+    True when a model manifest other than the loaded one was published.
+    Writers replace the manifest after every file of the set (see
+    model_manifest.py), so a training run that is still writing is never
+    picked up half way. Model files written without a manifest are not
+    watched; POST /admin/reload still loads them.
     """
-    input_df = pd.DataFrame([data])
+    try:
+        current = model_files_fingerprint()
+    except OSError:  # the manifest is being replaced
+        return False
+    return current is not None and current != model_files_signature
+
+def watch_model_files(interval):
+    """Reload whenever a new model manifest is published (see model_files_changed)"""
+    while True:
+        time.sleep(interval)
+        if model_files_changed():
+            print("🔄 Model manifest changed, reloading...")
+            load_model_assets()
+
+def start_model_watcher(interval=None):
+    """Poll the model files on a daemon thread (see MODEL_RELOAD_INTERVAL); no-op when disabled"""
+    global model_watcher
+    
+    interval = MODEL_RELOAD_INTERVAL if interval is None else interval
+    if interval <= 0 or (model_watcher is not None and model_watcher.is_alive()):
+        return model_watcher
+    model_watcher = threading.Thread(target=watch_model_files, args=(interval,), name='model-watcher',
+                                     daemon=True)
+    model_watcher.start()
+    print(f"👀 Watching model files for changes every {interval:g}s")
+    return model_watcher
+
+def read_model_assets(base_dir, verify_digests=True):
+    """
+    Load and compile the assets in base_dir without touching the ones being
+    served: (ModelAssets, whether the compiled predictor is new). With a
+    manifest only the files it lists are read, and only if their contents
+    match it (ManifestMismatch otherwise). Without verify_digests (a cold
+    start) files whose size and mtime match the manifest are not hashed.
+    """
+    paths = model_paths(base_dir)
+    is_advanced = paths['model'].endswith('_advanced.pkl')
+    manifest = read_manifest(base_dir)
+    if manifest is None:
+        listed = {path for path in paths.values() if os.path.exists(path)}
+    else:
+        listed = {os.path.join(base_dir, name) for name in manifest['files']}
+        unlisted = [os.path.basename(paths[role]) for role in ('model', 'encoder', 'imputer')
+                    if paths[role] not in listed]
+        if unlisted:
+            raise ManifestMismatch(f"{', '.join(unlisted)} not listed in {MANIFEST_FILE}")
+    has_scaler = paths['scaler'] in listed
+    has_student = paths['student'] in listed
+    source_paths = [paths['model'], paths['encoder'], paths['imputer']] + ([paths['scaler']] if has_scaler else [])
+    fingerprint = fingerprint_files(source_paths)
+    if manifest is not None:
+        loaded_files = fingerprint_files(source_paths + ([paths['student']] if has_student else []))
+        verify_manifest(base_dir, manifest, digests=verify_digests)
+    
+    # Load preprocessors (numeric arrays memory-mapped, shared between workers)
+    category_encoder = joblib.load(paths['encoder'], mmap_mode='r')
+    imputer = joblib.load(paths['imputer'], mmap_mode='r')
+    
+    # Scaler is optional (only for advanced model)
+    scaler = None
+    if has_scaler:
+        scaler = joblib.load(paths['scaler'], mmap_mode='r')
+        print("✅ Scaler loaded (advanced preprocessing enabled)")
+    
+    # A compiled artifact written for exactly these source files lets us
+    # skip unpickling the full ensemble
+    model, package, optimal_threshold = None, None, DEFAULT_THRESHOLD
+    compiled, metadata = _load_fresh_compiled(paths['compiled'], fingerprint)
+    if compiled is not None:
+        package = metadata['model_package']
+        optimal_threshold = package_threshold(package)
+        print(f"✅ Compiled model memory-mapped from {COMPILED_MODEL_FILE} "
+              f"(threshold: {optimal_threshold})")
+    elif is_advanced:
+        package = joblib.load(paths['model'])
+        model = package['model']
+        optimal_threshold = package_threshold(package)
+        print(f"✅ Advanced model loaded with optimal threshold: {optimal_threshold}")
+    else:
+        # Fallback to original model
+        model = joblib.load(paths['model'])
+        print("✅ Original model loaded (advanced model not found)")
+    
+    student, student_package = (read_student_model(paths['student'], imputer, scaler) if has_student
+                                else (None, None))
+    if manifest is not None:
+        # A file replaced after it was verified may have been read in its new
+        # version; the writer's new manifest triggers the next reload
+        if fingerprint_files(source_paths + ([paths['student']] if has_student else [])) != loaded_files:
+            raise ManifestMismatch('model files were replaced during the load')
+        if os.path.exists(paths['student']) and not has_student:
+            print(f"⚠️  Ignoring {STUDENT_MODEL_FILE}: not distilled from this model ({MANIFEST_FILE})")
+    
+    assets = prepare_model_assets(ModelAssets(
+        model=model, package=package, encoder=category_encoder, imputer=imputer, scaler=scaler,
+        compiled=compiled, student=student, student_package=student_package,
+        threshold=optimal_threshold, fingerprint=fingerprint
+    ))
+    return assets, compiled is None and assets.compiled is not None
+
+def publish_model_assets(assets):
+    """
+    Serve a complete ModelAssets (see prepare_model_assets) from now on.
+    Requests already running finish with the assets they started with;
+    their cache entries are keyed by the old fingerprint.
+    """
+    global current_assets
     
+    current_assets = assets
+    prediction_cache.clear()
+
+def model_version():
+    """Fingerprint of the assets being served, None before the first load"""
+    return current_assets.fingerprint
+
+def _load_fresh_compiled(path, fingerprint):
+    """Compiled predictor and metadata if `path` was written for the current sources"""
+    if not os.path.exists(path):
+        return None, None
+    try:
+        compiled, metadata = load_compiled(path, mmap_mode='r')
+    except Exception as e:
+        print(f"⚠️  Ignoring unreadable {os.path.basename(path)}: {e}")
+        return None, None
+    if metadata.get('source_fingerprint') != fingerprint or metadata.get('format') != COMPILED_FORMAT:
+        return None, None
+    return compiled, metadata
+
+def _save_compiled_artifact(path, assets):
+    """Write the compiled predictor next to its sources so the next start can mmap it"""
+    if assets.compiled is None:
+        return
+    package = None
+    if assets.package is not None:
+        package = {key: value for key, value in assets.package.items() if key != 'model'}
+    try:
+        save_compiled(assets.compiled, path, {'source_fingerprint': assets.fingerprint,
+                                              'model_package': package})
+        print(f"✅ Compiled model saved: {os.path.basename(path)}")
+    except OSError as e:
+        print(f"⚠️  Could not save compiled model: {e}")
+
+def read_feature_stats(package, fitted_imputer):
+    """
+    The model package's FeatureStats, None (serving defaults) for a package
+    without them; ValueError if they were not built with this imputer
+    """
+    stats = package.get('feature_stats') if package else None
+    if stats is None:
+        print("⚠️  No feature stats in the model package, using default category frequency and risk cut-offs")
+        return None
+    if not stats.matches(fitted_imputer):
+        # The model and the preprocessors come from different training runs
+        raise ValueError("Feature stats in the model package do not match imputer.pkl")
+    print(f"✅ Feature stats loaded ({stats.category_frequency.size} categories)")
+    return stats
+
+def read_student_model(path, fitted_imputer, fitted_scaler):
+    """(compiled predictor, package info) for the distilled student at `path`, or (None, None)"""
+    if not os.path.exists(path):
+        return None, None
+    try:
+        return compile_student(joblib.load(path), fitted_imputer, fitted_scaler)
+    except Exception as e:
+        print(f"⚠️  Ignoring {os.path.basename(path)}: {e}")
+        return None, None
+
+def compile_student(package, fitted_imputer, fitted_scaler):
+    """
+    Compile a student package from train_model.py --distill against the
+    given imputer and scaler; (None, None) if it does not match them
+    """
+    predictor = compile_predictor(package['model'], fitted_imputer, fitted_scaler)
+    if predictor is None:
+        print("⚠️  Student model does not match the loaded preprocessing, fast mode disabled")
+        return None, None
+    info = {key: value for key, value in package.items() if key != 'model'}
+    fidelity = info.get('fidelity') or {}
+    print(f"⚡ Low-latency student model loaded ({package['model'].n_estimators} trees, "
+          f"ROC-AUC gap {fidelity.get('roc_auc_gap', float('nan')):+.4f})")
+    return predictor, info
+
+def install_student_model(package):
+    """Enable fast mode with a student package for the assets being served; None disables it"""
+    assets = current_assets
+    predictor, info = (None, None) if package is None else compile_student(package, assets.imputer, assets.scaler)
+    publish_model_assets(assets._replace(student=predictor, student_package=info))
+
+def start_background_load():
+    """Load the model on a background thread so the server can bind its port immediately"""
+    global model_loader
+    
+    model_loader = threading.Thread(target=load_model_assets, name='model-loader', daemon=True)
+    model_loader.start()
+    return model_loader
+
+def wait_for_model(timeout=None):
+    """Block until a background load has finished; True if a model is available"""
+    if model_loader is not None:
+        model_loader.join(timeout)
+    return model_available()
+
+def model_available(assets=None):
+    """Whether assets (by default the ones being served) can score"""
+    assets = assets or current_assets
+    return assets.compiled is not None or assets.model is not None
+
+def model_unavailable_response():
+    if model_status == 'loading':
+        return jsonify({'error': 'Model is still loading, retry shortly'}), 503
+    return jsonify({'error': 'Model not loaded. Please check server logs.'}), 500
+
+def _metrics_endpoint():
+    """Endpoint label for metrics: the Flask endpoint, or the thread name outside a request"""
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return threading.current_thread().name
+
+def serving_mode():
+    """'fast' when the current request is served by the student model, else 'full'"""
+    if has_request_context():
+        return g.get('model_mode', 'full')
+    return 'full'
+
+def request_assets():
+    """The ModelAssets the current request started with (the ones being served outside a request)"""
+    if has_request_context():
+        return g.get('assets') or current_assets
+    return current_assets
+
+def active_predictor(assets):
+    """Compiled predictor for the current request's serving mode"""
+    return assets.student if serving_mode() == 'fast' else assets.compiled
+
+def stage_timer(stage, model=''):
+    """Context manager timing one pipeline stage (or one base model) into the histograms"""
+    if model:
+        return base_model_seconds.time(endpoint=_metrics_endpoint(), model=model)
+    return stage_seconds.time(endpoint=_metrics_endpoint(), stage=stage)
+
+def count_error(error_type, amount=1):
+    errors_total.inc(amount, endpoint=_metrics_endpoint(), type=error_type)
+
+def prepare_model_assets(assets):
+    """
+    Complete a ModelAssets holding a model and its preprocessors (read from
+    disk, or built in memory by synthetic_data.install_model_assets):
+    compile them into the fast array inference path unless a compiled
+    predictor is given, then add the feature stats and serving schema
+    """
+    if assets.compiled is None:
+        assets = assets._replace(compiled=compile_model(assets.model, assets.imputer, assets.scaler))
+    assets = assets._replace(stats=read_feature_stats(assets.package, assets.imputer), schema=None)
+    return assets._replace(schema=build_feature_schema(assets))
+
+def build_feature_schema(assets):
+    """Serving feature schema for assets (built without one), or None (pandas preprocessing)"""
+    schema = None
+    try:
+        schema = build_schema(
+            get_model_features(assets), assets.encoder, PROBE_PAYLOADS,
+            lambda payload: align_features(preprocess_input(payload, assets), assets).to_numpy(dtype=np.float64),
+            stats=assets.stats
+        )
+    except Exception as e:
+        print(f"⚠️  Feature schema unavailable: {e}")
+    if schema is None:
+        print("⚠️  Feature schema disabled, /predict uses pandas preprocessing")
+    return schema
+
+def compile_model(fitted_model, fitted_imputer, fitted_scaler):
+    """Imputer, scaler and model compiled into the fast array inference path, or None"""
+    try:
+        compiled = compile_predictor(fitted_model, fitted_imputer, fitted_scaler)
+    except Exception as e:
+        print(f"⚠️  Compiled inference unavailable: {e}")
+        return None
+    if compiled is not None:
+        print("⚡ Compiled inference path enabled")
+    else:
+        print("⚠️  Compiled inference unavailable, using sklearn pipeline")
+    return compiled
+
+def preprocess_input(data, assets=None):
+    """
+    Advanced preprocessing matching the training pipeline
+    """
+    return engineer_features(pd.DataFrame([data]), assets)
+
+def engineer_features(input_df, assets=None):
+    """
+    Feature engineering on a frame of one or more raw startup payloads
+    (with the request's model assets unless others are given)
+    """
+    assets = assets or request_assets()
     # Convert numeric columns
     numeric_cols = ['funding_total_usd', 'funding_rounds', 'milestones', 'relationships', 
                     'age_first_milestone_year', 'age_last_milestone_year', 'avg_participants']
-    for col in numeric_cols:
-        if col in input_df.columns:
-            input_df[col] = pd.to_numeric(input_df[col], errors='coerce')
-    
-    # Convert date columns
-    date_cols = ['founded_at', 'first_funding_at', 'last_funding_at']
-    for col in date_cols:
-        if col in input_df.columns:
-            input_df[col] = pd.to_datetime(input_df[col], errors='coerce')
-    
-    # Feature engineering
-    epsilon = 0.01
-    
-    # Time-based features
-    input_df['days_to_first_funding'] = (input_df['first_funding_at'] - input_df['founded_at']).dt.days
-    input_df['days_funding_active'] = (input_df['last_funding_at'] - input_df['first_funding_at']).dt.days
-    input_df['days_since_founding'] = (input_df['last_funding_at'] - input_df['founded_at']).dt.days
-    input_df['years_active'] = (input_df['days_funding_active'] / 365.25).clip(lower=epsilon)
-    input_df['years_since_founding'] = (input_df['days_since_founding'] / 365.25).clip(lower=epsilon)
-    
-    # Funding features
-    input_df['funding_momentum'] = input_df['funding_total_usd'] / input_df['years_active']
-    input_df['avg_funding_per_round'] = input_df['funding_total_usd'] / input_df['funding_rounds'].replace(0, 1)
-    input_df['funding_concentration'] = input_df['avg_funding_per_round'] / (input_df['funding_total_usd'] + 1)
-    input_df['funding_growth_rate'] = input_df['funding_total_usd'] / input_df['years_since_founding']
-    
-    # Milestone features
-    input_df['milestone_years'] = (input_df['age_last_milestone_year'] - input_df['age_first_milestone_year']).clip(lower=epsilon)
-    input_df['milestone_velocity'] = input_df['milestones'] / input_df['milestone_years']
-    input_df['milestones_per_year_active'] = input_df['milestones'] / input_df['years_active']
-    input_df['milestone_density'] = input_df['milestones'] / (input_df['days_since_founding'] + 1)
-    
-    # Relationship features
-    input_df['relationships_per_year'] = input_df['relationships'] / input_df['years_active']
-    input_df['relationship_efficiency'] = input_df['relationships'] / (input_df['funding_rounds'] + 1)
-    
-    # Handle avg_participants
-    if 'avg_participants' not in input_df.columns:
-        input_df['avg_participants'] = 2.0  # Default value
-    
-    input_df['network_strength'] = input_df['relationships'] * input_df['avg_participants']
+    with stage_timer('to_numeric'):
+        for col in numeric_cols:
+            if col in input_df.columns:
+                input_df[col] = pd.to_numeric(input_df[col], errors='coerce')
     
-    # Interaction features
-    input_df['funding_x_relationships'] = input_df['funding_total_usd'] * input_df['relationships']
-    input_df['rounds_x_participants'] = input_df['funding_rounds'] * input_df['avg_participants']
-    input_df['milestones_x_relationships'] = input_df['milestones'] * input_df['relationships']
+    # Parse dates up front so the feature kernel gets datetime64 columns
+    with stage_timer('date_parse'):
+        for col in DATE_COLUMNS:
+            if col in input_df.columns:
+                input_df[col] = to_datetime64(input_df[col])
     
-    # Handle is_top500
+    # Defaults for optional inputs
+    if 'avg_participants' not in input_df.columns:
+        input_df['avg_participants'] = 2.0  # Default value
     if 'is_top500' not in input_df.columns:
         input_df['is_top500'] = 0
-    input_df['top500_x_funding'] = input_df['is_top500'] * input_df['funding_total_usd']
-    
-    # Round progression features
-    round_cols = [col for col in input_df.columns if col.startswith('has_round')]
-    if round_cols:
-        input_df['total_rounds_reached'] = input_df[round_cols].sum(axis=1)
-        input_df['reached_late_stage'] = ((input_df.get('has_roundC', 0) == 1) | 
-                                          (input_df.get('has_roundD', 0) == 1)).astype(int)
-    else:
-        input_df['total_rounds_reached'] = 0
-        input_df['reached_late_stage'] = 0
-    
-    # Risk indicators
-    input_df['early_stage_only'] = ((input_df['funding_rounds'] <= 2) & 
-                                     (input_df['funding_total_usd'] < 1000000)).astype(int)
-    input_df['slow_milestone'] = (input_df['milestone_velocity'] < 1).astype(int)
-    input_df['low_participation'] = (input_df['avg_participants'] < 2).astype(int)
     
-    # Binary flags
-    input_df['same_day_funding'] = (input_df['days_funding_active'] == 0).astype(int)
-    input_df['quick_first_funding'] = (input_df['days_to_first_funding'] < 30).astype(int)
-    input_df['long_founding_period'] = (input_df['days_to_first_funding'] > 365).astype(int)
-    
-    # Polynomial features
-    input_df['funding_squared'] = np.log1p(input_df['funding_total_usd']) ** 2
-    input_df['relationships_squared'] = input_df['relationships'] ** 2
+    # Feature engineering (shared NumPy kernel, see features.py) with the
+    # training cut-offs for the risk flags
+    stats = assets.stats
+    with stage_timer('feature_engineering'):
+        if stats is not None:
+            values = compute_features(input_df, stats.early_stage_funding, stats.slow_milestone_velocity)
+        else:
+            values = compute_features(input_df, EARLY_STAGE_FUNDING, SLOW_MILESTONE_VELOCITY)
+        engineered = pd.DataFrame(values, columns=ENGINEERED_FEATURES, index=input_df.index)
+        input_df = pd.concat([input_df.drop(columns=ENGINEERED_FEATURES, errors='ignore'), engineered], axis=1)
     
     # Category encoding
     if 'category_code' in input_df.columns:
-        # Frequency encoding (if we have the data)
-        input_df['category_frequency'] = 0.05  # Default frequency
-        input_df['category_code'] = category_encoder.transform(input_df['category_code'].astype(str))
+        with stage_timer('category_encoding'):
+            codes = assets.encoder.transform(input_df['category_code'].astype(str))
+            # Frequency encoding: each category's share of the training rows
+            if stats is not None:
+                input_df['category_frequency'] = stats.frequencies(codes)
+            else:
+                input_df['category_frequency'] = DEFAULT_CATEGORY_FREQUENCY
+            input_df['category_code'] = codes
     
     # Drop temporal columns
-    input_df.drop(columns=['founded_at', 'first_funding_at', 'last_funding_at', 
-                           'years_active', 'milestone_years', 'years_since_founding'], 
+    input_df.drop(columns=['founded_at', 'first_funding_at', 'last_funding_at'], 
                   inplace=True, errors='ignore')
     
     # Replace infinite values
@@ -165,26 +539,306 @@ def preprocess_input(data):
     
     return input_df
 
+# Raw fields that feature engineering reads directly; a payload without one of
+# these fails in preprocess_input with a KeyError
+ENGINEERED_INPUT_FIELDS = ['funding_total_usd', 'funding_rounds', 'milestones', 'relationships',
+                           'age_first_milestone_year', 'age_last_milestone_year',
+                           'founded_at', 'first_funding_at', 'last_funding_at']
+
+# Values engineer_features assumes when a payload omits these fields
+OPTIONAL_INPUT_DEFAULTS = {'avg_participants': 2.0, 'is_top500': 0}
+
+def preprocess_batch(records, assets=None):
+    """
+    Vectorized preprocessing for a list of startup payloads.
+    
+    Returns the engineered frame for the valid rows (indexed by their
+    position in `records`) and a dict of {index: error message} for rows
+    that would have failed in preprocess_input.
+    """
+    # Unseen categories make LabelEncoder.transform raise for the whole column,
+    # so those rows are rejected up front along with malformed ones
+    assets = assets or request_assets()
+    known_categories = set(assets.encoder.classes_) if assets.encoder is not None else set()
+    errors = {}
+    valid_idx = []
+    has_category = []
+    with stage_timer('validate'):
+        for idx, record in enumerate(records):
+            if not isinstance(record, dict):
+                errors[idx] = 'Expected a JSON object for each startup'
+                continue
+            missing = [field for field in ENGINEERED_INPUT_FIELDS if field not in record]
+            if missing:
+                errors[idx] = f'Missing required field: {missing[0]!r}'
+                continue
+            if 'category_code' in record and str(record['category_code']) not in known_categories:
+                errors[idx] = f"y contains previously unseen labels: [{str(record['category_code'])!r}]"
+                continue
+            valid_idx.append(idx)
+            has_category.append('category_code' in record)
+    
+    if not valid_idx:
+        return pd.DataFrame(index=pd.Index([], dtype=int)), errors
+    
+    input_df = pd.DataFrame([records[idx] for idx in valid_idx], index=valid_idx)
+    
+    # Per-row defaults that preprocess_input applies when a key is absent
+    for col, default in OPTIONAL_INPUT_DEFAULTS.items():
+        present = np.fromiter((col in records[idx] for idx in valid_idx), dtype=bool, count=len(valid_idx))
+        if col not in input_df.columns:
+            input_df[col] = default
+        elif not present.all():
+            input_df.loc[~present, col] = default
+    
+    return _engineer_rows(input_df, np.asarray(has_category, dtype=bool), assets), errors
+
+def preprocess_frame(raw_df, assets=None):
+    """
+    Vectorized preprocessing for a frame of raw rows (e.g. a CSV chunk).
+    
+    Same contract as preprocess_batch, with rows identified by their
+    position in `raw_df`. Empty cells in optional columns take the same
+    defaults as absent keys in a JSON payload.
+    """
+    assets = assets or request_assets()
+    raw_df = raw_df.reset_index(drop=True)
+    missing = [field for field in ENGINEERED_INPUT_FIELDS if field not in raw_df.columns]
+    if missing:
+        message = f'Missing required field: {missing[0]!r}'
+        return pd.DataFrame(index=pd.Index([], dtype=int)), {idx: message for idx in range(len(raw_df))}
+    
+    errors = {}
+    has_category = np.zeros(len(raw_df), dtype=bool)
+    if 'category_code' in raw_df.columns:
+        categories = raw_df['category_code']
+        has_category = categories.notna().to_numpy()
+        labels = categories.astype(str)
+        unseen = has_category & ~labels.isin(assets.encoder.classes_).to_numpy()
+        for idx in np.flatnonzero(unseen):
+            errors[int(idx)] = f"y contains previously unseen labels: [{labels.iat[idx]!r}]"
+        raw_df = raw_df.loc[~unseen]
+        has_category = has_category[~unseen]
+    
+    if raw_df.empty:
+        return pd.DataFrame(index=pd.Index([], dtype=int)), errors
+    
+    input_df = raw_df.copy()
+    for col, default in OPTIONAL_INPUT_DEFAULTS.items():
+        input_df[col] = input_df[col].fillna(default) if col in input_df.columns else default
+    
+    return _engineer_rows(input_df, has_category, assets), errors
+
+def _engineer_rows(input_df, has_category, assets):
+    """Feature engineering for validated rows; has_category marks rows that carry a category_code"""
+    if has_category.any() and not has_category.all():
+        input_df.loc[~has_category, 'category_code'] = assets.encoder.classes_[0]
+    elif not has_category.any():
+        input_df = input_df.drop(columns=['category_code'], errors='ignore')
+    
+    input_df = engineer_features(input_df, assets)
+    
+    # Rows without a category behave like a single payload without one: the
+    # encoded columns are filled with 0 when aligned to the model features
+    if has_category.any() and not has_category.all():
+        input_df.loc[~has_category, ['category_code', 'category_frequency']] = 0
+    
+    return input_df
+
+def get_model_features(assets=None):
+    """Column order expected by the imputer, scaler and model"""
+    assets = assets or request_assets()
+    if assets.schema is not None:
+        return assets.schema.names
+    if hasattr(assets.imputer, 'get_feature_names_out'):
+        return assets.imputer.get_feature_names_out()
+    return assets.imputer.feature_names_in_ if hasattr(assets.imputer, 'feature_names_in_') else None
+
+def align_features(input_df, assets=None):
+    """Reorder a preprocessed frame to the model columns, filling absent ones with 0"""
+    model_features = get_model_features(assets)
+    if model_features is None:
+        return input_df
+    return input_df.reindex(columns=model_features, fill_value=0)
+
+def predict_matrix(X, assets=None):
+    """Success probabilities for a float64 matrix already aligned to the model features"""
+    assets = assets or request_assets()
+    predictor = active_predictor(assets)
+    if predictor is not None:
+        batch_rows.observe(len(X), endpoint=_metrics_endpoint())
+        return predictor.predict_proba(X, timer=stage_timer)
+    return predict_probabilities(pd.DataFrame(X, columns=get_model_features(assets)), assets)
+
+# Concurrent /predict calls are scored together: up to MICRO_BATCH_SIZE rows
+# collected for at most MICRO_BATCH_WAIT_MS, each request's row with the
+# assets it started with. MICRO_BATCH_SIZE<=1 (the default) scores each
+# request on its own thread.
+micro_batcher = MicroBatcher(
+    predict_matrix,
+    max_batch_size=int(os.environ.get('MICRO_BATCH_SIZE', 1)),
+    max_wait_ms=float(os.environ.get('MICRO_BATCH_WAIT_MS', 2.0))
+)
+
+def predict_probabilities(input_df, assets=None):
+    """Align, impute, scale and score a preprocessed frame in one model call"""
+    assets = assets or request_assets()
+    # Align features
+    with stage_timer('align'):
+        input_df = align_features(input_df, assets)
+    model_features = input_df.columns
+    batch_rows.observe(len(input_df), endpoint=_metrics_endpoint())
+    
+    predictor = active_predictor(assets)
+    if predictor is not None:
+        return predictor.predict_proba(input_df.to_numpy(dtype=np.float64), timer=stage_timer)
+    
+    # Impute missing values
+    with stage_timer('impute'):
+        input_df_imputed = pd.DataFrame(assets.imputer.transform(input_df), columns=model_features)
+    
+    # Scale if scaler is available
+    if assets.scaler is not None:
+        with stage_timer('scale'):
+            input_df_scaled = pd.DataFrame(assets.scaler.transform(input_df_imputed), columns=model_features)
+    else:
+        input_df_scaled = input_df_imputed
+    
+    return model_predict_proba(input_df_scaled, assets.model)
+
+def model_predict_proba(X, model):
+    """
+    Class-1 probabilities from an sklearn model. A binary stacking ensemble
+    is evaluated base model by base model (exactly what
+    StackingClassifier.predict_proba computes) so each one can be timed.
+    """
+    if (type(model).__name__ == 'StackingClassifier' and len(model.classes_) == 2
+            and all(method == 'predict_proba' for method in model.stack_method_)):
+        names = [name for name, estimator in model.estimators if estimator != 'drop']
+        meta = []
+        for name, estimator in zip(names, model.estimators_):
+            with stage_timer('base_model', name):
+                meta.append(estimator.predict_proba(X)[:, 1])
+        with stage_timer('meta_learner'):
+            meta = np.column_stack(meta)
+            if model.passthrough:
+                meta = np.hstack([meta, np.asarray(X)])
+            return model.final_estimator_.predict_proba(meta)[:, 1]
+    
+    with stage_timer('model'):
+        return model.predict_proba(X)[:, 1]
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.before_request
+def select_model_mode():
+    """Fix the request's model assets; ?mode=fast|full picks the model (default SERVING_MODE)"""
+    mode = request.args.get('mode', DEFAULT_SERVING_MODE)
+    if mode not in SERVING_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(SERVING_MODES)}"}), 400
+    # One snapshot of the assets for the whole request; a reload publishes
+    # a new one for the requests after it
+    g.assets = assets = current_assets
+    # Without a student model every request is served by the full ensemble
+    g.model_mode = mode if assets.student is not None else 'full'
+
+@app.before_request
+def decode_request_body():
+    """Decode gzip/zstd request bodies before the view reads them (see compression.py)"""
+    if 'Content-Encoding' not in request.headers:
+        return None
+    try:
+        with stage_timer('decompress'):
+            decode_request(request.environ, streamed=request.endpoint in STREAMED_ENDPOINTS,
+                           max_bytes=app.config['MAX_CONTENT_LENGTH'])
+    except UnsupportedEncoding as e:
+        return jsonify({'error': str(e)}), 415
+    except BodyTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.after_request
+def compress_response_body(response):
+    return compress_response(response, request.accept_encodings, COMPRESSION_MIN_BYTES)
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unknown'
+    requests_total.inc(endpoint=endpoint, status=response.status_code)
+    started = g.get('request_started')
+    if started is not None:
+        request_seconds.observe(time.perf_counter() - started, endpoint=endpoint)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics for this process"""
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    assets = request_assets()
     return jsonify({
         'status': 'healthy',
-        'model_loaded': model is not None,
-        'advanced_model': model_package is not None,
-        'optimal_threshold': optimal_threshold,
+        'model_status': model_status,
+        'model_load_seconds': model_load_seconds,
+        'model_loaded': model_available(assets),
+        'model_version': assets.fingerprint,
+        'model_loaded_at': model_loaded_at,
+        'model_reloading': reload_lock.locked(),
+        'model_load_error': model_load_error,
+        'advanced_model': assets.package is not None,
+        'compiled_inference': assets.compiled is not None,
+        'serving_mode': DEFAULT_SERVING_MODE,
+        'student_model': assets.student_package.get('fidelity') if assets.student_package else None,
+        'optimal_threshold': assets.threshold,
+        'prediction_cache': prediction_cache.stats(),
+        'micro_batching': micro_batcher.stats(),
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Reload the model assets without a restart. Runs in the background
+    (202) unless ?wait=1; under serve.py with several workers the parent
+    reloads and replaces the workers, always in the background. Needs
+    'Authorization: Bearer $ADMIN_TOKEN' when ADMIN_TOKEN is set, otherwise
+    a request from localhost.
+    """
+    if ADMIN_TOKEN:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {ADMIN_TOKEN}'):
+            return jsonify({'error': 'Invalid admin token'}), 401
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'error': 'Set ADMIN_TOKEN to allow reloads from other hosts'}), 403
+    
+    if reload_handler is not None:
+        reload_handler()
+        return jsonify({'status': 'reloading', 'model_version': model_version()}), 202
+    if reload_lock.locked():
+        return jsonify({'status': 'reloading', 'model_version': model_version()}), 409
+    if request.args.get('wait', '').lower() in ('1', 'true', 'yes'):
+        if not load_model_assets():
+            return jsonify({'status': 'failed', 'error': model_load_error, 'model_version': model_version()}), 500
+        return jsonify({'status': 'ready', 'model_version': model_version(),
+                        'model_loaded_at': model_loaded_at, 'model_load_seconds': model_load_seconds})
+    threading.Thread(target=load_model_assets, name='model-reload', daemon=True).start()
+    return jsonify({'status': 'reloading', 'model_version': model_version()}), 202
+
 @app.route('/model-info', methods=['GET'])
 def model_info():
     """Get model information and expected performance"""
-    if model is None:
-        return jsonify({'error': 'Model not loaded'}), 500
+    assets = request_assets()
+    if not model_available(assets):
+        return model_unavailable_response()
     
     return jsonify({
-        'model_type': 'Advanced Stacking Ensemble' if model_package else 'XGBoost',
-        'optimal_threshold': optimal_threshold,
+        'model_type': 'Advanced Stacking Ensemble' if assets.package else 'XGBoost',
+        'optimal_threshold': assets.threshold,
         'expected_performance': {
             'accuracy': '79.5%',
             'precision': '79.3%',
@@ -199,75 +853,97 @@ def model_info():
         'recommendation': 'Model catches 92.5% of successful startups with 79.3% precision'
     })
 
+def build_prediction(success_probability, assets):
+    """/predict response body for one success probability scored with assets"""
+    # Apply optimal threshold
+    prediction = 1 if success_probability >= assets.threshold else 0
+    
+    # Generate confidence and recommendation
+    if success_probability >= 0.7:
+        confidence = 'High'
+        recommendation = 'Strong Buy - High confidence in success'
+    elif success_probability >= 0.5:
+        confidence = 'Medium'
+        recommendation = 'Consider - Moderate success potential'
+    elif success_probability >= 0.3:
+        confidence = 'Low'
+        recommendation = 'Monitor - Below average success probability'
+    else:
+        confidence = 'Very Low'
+        recommendation = 'Avoid - High risk of failure'
+    
+    # Risk assessment
+    risk_level = 'Low' if success_probability >= 0.6 else \
+                 'Medium' if success_probability >= 0.4 else 'High'
+    
+    return {
+        'prediction': 'Success' if prediction == 1 else 'Failure',
+        'success_probability': round(success_probability * 100, 2),
+        'confidence': confidence,
+        'risk_level': risk_level,
+        'recommendation': recommendation,
+        'threshold_used': assets.threshold,
+        'model_version': ('Distilled Student v1.0' if serving_mode() == 'fast'
+                          else 'Advanced Ensemble v2.0' if assets.package else 'XGBoost v1.0')
+    }
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """Main prediction endpoint"""
-    if model is None:
-        return jsonify({'error': 'Model not loaded. Please check server logs.'}), 500
+    # Encoding, scoring, thresholding and the cache key all use this one
+    # snapshot, even if a reload publishes new assets meanwhile
+    assets = request_assets()
+    if not model_available(assets):
+        return model_unavailable_response()
 
     try:
-        data = request.get_json()
+        with stage_timer('parse_json'):
+            data = request.get_json()
         
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        # Preprocess input
-        input_df = preprocess_input(data)
+        # Common payloads are parsed straight into this thread's feature row;
+        # anything else goes through the pandas preprocessing
+        features = None
+        if assets.schema is not None:
+            with stage_timer('encode'):
+                features = assets.schema.encode(data)
+        if features is None:
+            input_df = preprocess_input(data, assets)
+            with stage_timer('align'):
+                features = align_features(input_df, assets).to_numpy(dtype=np.float64)
         
-        # Get model features
-        if hasattr(imputer, 'get_feature_names_out'):
-            model_features = imputer.get_feature_names_out()
-        else:
-            model_features = imputer.feature_names_in_ if hasattr(imputer, 'feature_names_in_') else input_df.columns
-        
-        # Align features
-        input_df = input_df.reindex(columns=model_features, fill_value=0)
-        
-        # Impute missing values
-        input_df_imputed = pd.DataFrame(imputer.transform(input_df), columns=model_features)
-        
-        # Scale if scaler is available
-        if scaler is not None:
-            input_df_scaled = pd.DataFrame(scaler.transform(input_df_imputed), columns=model_features)
-        else:
-            input_df_scaled = input_df_imputed
-        
-        # Get predictions
-        probability = model.predict_proba(input_df_scaled)
-        success_probability = float(probability[0][1])
+        # Identical feature vectors for the same model reuse the stored response
+        cache_key = None
+        if prediction_cache.enabled:
+            with stage_timer('cache_lookup'):
+                cache_key = feature_key(features, f'{assets.fingerprint}:{serving_mode()}')
+                cached = prediction_cache.get(cache_key)
+            cache_lookups_total.inc(result='hit' if cached is not None else 'miss')
+            if cached is not None:
+                return jsonify(cached)
         
-        # Apply optimal threshold
-        prediction = 1 if success_probability >= optimal_threshold else 0
-        
-        # Generate confidence and recommendation
-        if success_probability >= 0.7:
-            confidence = 'High'
-            recommendation = 'Strong Buy - High confidence in success'
-        elif success_probability >= 0.5:
-            confidence = 'Medium'
-            recommendation = 'Consider - Moderate success potential'
-        elif success_probability >= 0.3:
-            confidence = 'Low'
-            recommendation = 'Monitor - Below average success probability'
+        # Get predictions (the student model is cheap enough to score on
+        # the request thread; only full-ensemble calls are micro-batched)
+        if micro_batcher.enabled and serving_mode() == 'full':
+            # Queueing plus the shared batch call; the batch itself is timed
+            # under the micro-batcher thread's label
+            with stage_timer('micro_batch'):
+                success_probability = micro_batcher.predict(features, assets)
         else:
-            confidence = 'Very Low'
-            recommendation = 'Avoid - High risk of failure'
+            success_probability = float(predict_matrix(features, assets)[0])
+        result = build_prediction(success_probability, assets)
         
-        # Risk assessment
-        risk_level = 'Low' if success_probability >= 0.6 else \
-                     'Medium' if success_probability >= 0.4 else 'High'
+        if cache_key is not None:
+            prediction_cache.put(cache_key, result)
         
-        return jsonify({
-            'prediction': 'Success' if prediction == 1 else 'Failure',
-            'success_probability': round(success_probability * 100, 2),
-            'confidence': confidence,
-            'risk_level': risk_level,
-            'recommendation': recommendation,
-            'threshold_used': optimal_threshold,
-            'model_version': 'Advanced Ensemble v2.0' if model_package else 'XGBoost v1.0'
-        })
+        return jsonify(result)
         
+    except HTTPException as e:
+        return jsonify({'error': e.description}), e.code
     except KeyError as e:
+        count_error('KeyError')
         return jsonify({
             'error': f'Missing required field: {str(e)}',
             'required_fields': ['funding_total_usd', 'funding_rounds', 'milestones', 
@@ -275,81 +951,236 @@ def predict():
                               'last_funding_at', 'category_code']
         }), 400
     except Exception as e:
+        count_error(type(e).__name__)
         print(f"❌ Error during prediction: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': f"Prediction error: {str(e)}"}), 500
 
-@app.route('/predict-batch', methods=['POST'])
-def predict_batch():
-    """Batch prediction endpoint for multiple startups"""
-    if model is None:
-        return jsonify({'error': 'Model not loaded'}), 500
+def _startup_name(startup, idx):
+    return startup.get('name', f'Startup_{idx}') if isinstance(startup, dict) else f'Startup_{idx}'
+
+def _batch_result(idx, startup_name, success_probability, threshold):
+    prediction = 1 if success_probability >= threshold else 0
+    return {
+        'index': idx,
+        'prediction': 'Success' if prediction == 1 else 'Failure',
+        'success_probability': round(success_probability * 100, 2),
+        'startup_name': startup_name
+    }
+
+def _batch_error(idx, startup_name, message):
+    return {
+        'index': idx,
+        'error': message,
+        'startup_name': startup_name
+    }
+
+def _score_columns(input_df, errors, row_count, assets):
+    """
+    (probabilities, errors) for preprocessed rows plus per-row preprocessing
+    errors: a success probability per row (NaN where the row failed) and
+    {row: message} for every failed row
+    """
+    probabilities = np.full(row_count, np.nan)
+    errors = dict(errors)
+    if errors:
+        count_error('invalid_row', len(errors))
     
     try:
-        data = request.get_json()
-        
-        if not isinstance(data, list):
-            return jsonify({'error': 'Expected a list of startup data'}), 400
-        
-        results = []
-        for idx, startup in enumerate(data):
+        if len(input_df):
+            probabilities[input_df.index.to_numpy()] = predict_probabilities(input_df, assets)
+    except Exception:
+        # A value in some row breaks the vectorized transform (e.g. a
+        # non-numeric model column); score row by row so the failure is
+        # attributed to the offending rows only
+        for idx in input_df.index:
             try:
-                # Preprocess
-                input_df = preprocess_input(startup)
-                
-                # Get model features
-                if hasattr(imputer, 'get_feature_names_out'):
-                    model_features = imputer.get_feature_names_out()
-                else:
-                    model_features = input_df.columns
-                
-                input_df = input_df.reindex(columns=model_features, fill_value=0)
-                input_df_imputed = pd.DataFrame(imputer.transform(input_df), columns=model_features)
-                
-                if scaler is not None:
-                    input_df_scaled = pd.DataFrame(scaler.transform(input_df_imputed), columns=model_features)
-                else:
-                    input_df_scaled = input_df_imputed
-                
-                # Predict
-                probability = model.predict_proba(input_df_scaled)
-                success_probability = float(probability[0][1])
-                prediction = 1 if success_probability >= optimal_threshold else 0
-                
-                results.append({
-                    'index': idx,
-                    'prediction': 'Success' if prediction == 1 else 'Failure',
-                    'success_probability': round(success_probability * 100, 2),
-                    'startup_name': startup.get('name', f'Startup_{idx}')
-                })
+                probabilities[idx] = float(predict_probabilities(input_df.loc[[idx]], assets)[0])
             except Exception as e:
-                results.append({
-                    'index': idx,
-                    'error': str(e),
-                    'startup_name': startup.get('name', f'Startup_{idx}')
-                })
+                count_error(type(e).__name__)
+                errors[idx] = str(e)
+    
+    return probabilities, errors
+
+def _score_rows(input_df, errors, row_count, names, start_index, assets):
+    """Result dicts in row order for preprocessed rows plus per-row preprocessing errors"""
+    probabilities, errors = _score_columns(input_df, errors, row_count, assets)
+    return [_batch_error(start_index + idx, names[idx], errors[idx]) if idx in errors
+            else _batch_result(start_index + idx, names[idx], float(probabilities[idx]), assets.threshold)
+            for idx in range(row_count)]
+
+def _result_columns(probabilities, errors, names, threshold):
+    """The _batch_result/_batch_error fields as one array per field"""
+    failed = np.zeros(len(probabilities), dtype=bool)
+    failed[list(errors)] = True
+    prediction = np.where(probabilities >= threshold, 'Success', 'Failure').astype(object)
+    prediction[failed] = None
+    error = np.full(len(probabilities), None, dtype=object)
+    error[list(errors)] = list(errors.values())
+    return {
+        'index': np.arange(len(probabilities)),
+        'startup_name': np.asarray(names, dtype=object),
+        'prediction': prediction,
+        'success_probability': np.where(failed, np.nan, np.round(probabilities * 100, 2)),
+        'error': error
+    }
+
+def _frame_names(raw_df, start_index=0):
+    if 'name' in raw_df.columns:
+        return [name if isinstance(name, str) else f'Startup_{start_index + idx}'
+                for idx, name in enumerate(raw_df['name'])]
+    return [f'Startup_{start_index + idx}' for idx in range(len(raw_df))]
+
+def score_records(records, start_index=0, assets=None):
+    """Score a list of JSON payloads in one vectorized pass; one result per record"""
+    assets = assets or request_assets()
+    input_df, errors = preprocess_batch(records, assets)
+    names = [_startup_name(record, start_index + idx) for idx, record in enumerate(records)]
+    return _score_rows(input_df, errors, len(records), names, start_index, assets)
+
+def score_frame(raw_df, start_index=0, assets=None):
+    """Score a frame of raw rows (e.g. a CSV chunk); one result per row"""
+    assets = assets or request_assets()
+    input_df, errors = preprocess_frame(raw_df, assets)
+    return _score_rows(input_df, errors, len(raw_df), _frame_names(raw_df, start_index), start_index, assets)
+
+@app.route('/predict-batch', methods=['POST'])
+def predict_batch():
+    """
+    Batch prediction endpoint for multiple startups. Takes a JSON list of
+    payloads, or columns as JSON, NPZ or Arrow; answers with a JSON list of
+    results or result columns, by Accept (see batch_formats.py)
+    """
+    assets = request_assets()
+    if not model_available(assets):
+        return model_unavailable_response()
+    
+    output_type = response_type(request.accept_mimetypes)
+    try:
+        if request.mimetype in BINARY_INPUT_TYPES:
+            with stage_timer('parse_body'):
+                raw_df = decode_frame(request.get_data(), request.mimetype)
+            data = None
+        else:
+            with stage_timer('parse_json'):
+                data = request.get_json()
+            # An object of equal-length arrays is a column-oriented batch
+            raw_df = columns_frame(data) if isinstance(data, dict) else None
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), 415
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except HTTPException as e:
+        # get_json() on a malformed body (400) or a non-JSON Content-Type (415)
+        return jsonify({'error': e.description}), e.code
+    except Exception as e:
+        count_error(type(e).__name__)
+        return jsonify({'error': str(e)}), 500
+    
+    if raw_df is None and not isinstance(data, list):
+        return jsonify({'error': 'Expected a list of startup data'}), 400
+    
+    try:
+        if output_type == JSON:
+            results = score_records(data, assets=assets) if raw_df is None else score_frame(raw_df, assets=assets)
+            return jsonify({
+                'total': len(results),
+                'successful_predictions': len([r for r in results if 'error' not in r]),
+                'failed_predictions': len([r for r in results if 'error' in r]),
+                'results': results
+            })
         
-        return jsonify({
-            'total': len(data),
-            'successful_predictions': len([r for r in results if 'error' not in r]),
-            'failed_predictions': len([r for r in results if 'error' in r]),
-            'results': results
-        })
+        if raw_df is None:
+            input_df, errors = preprocess_batch(data, assets)
+            names = [_startup_name(record, idx) for idx, record in enumerate(data)]
+        else:
+            input_df, errors = preprocess_frame(raw_df, assets)
+            names = _frame_names(raw_df)
+        row_count = len(names)
+        probabilities, errors = _score_columns(input_df, errors, row_count, assets)
+        with stage_timer('serialize'):
+            body = encode_results(
+                {'total': row_count, 'successful_predictions': row_count - len(errors),
+                 'failed_predictions': len(errors)},
+                _result_columns(probabilities, errors, names, assets.threshold), output_type
+            )
+        return Response(body, mimetype=output_type)
         
     except Exception as e:
+        count_error(type(e).__name__)
         return jsonify({'error': str(e)}), 500
 
+def body_too_large_message(error):
+    if isinstance(error, RequestEntityTooLarge):
+        return f"Request body exceeds {app.config['MAX_CONTENT_LENGTH']} bytes"
+    return str(error)
+
+@app.route('/predict-stream', methods=['POST'])
+def predict_stream():
+    """
+    Streaming bulk prediction: CSV (Content-Type: text/csv) or NDJSON rows in,
+    one result per row out as NDJSON (default) or CSV (Accept: text/csv or
+    ?format=csv), scored and written chunk by chunk (all with the model the
+    request started with)
+    """
+    assets = request_assets()
+    if not model_available(assets):
+        return model_unavailable_response()
+    
+    input_format = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    output_format = request.args.get('format')
+    if output_format is None:
+        output_format = 'csv' if request.accept_mimetypes.best == 'text/csv' else 'ndjson'
+    try:
+        writer = ResultWriter(output_format)
+        chunk_size = int(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if chunk_size < 1:
+        return jsonify({'error': 'chunk_size must be positive'}), 400
+    
+    progress = ProgressLog(label='/predict-stream')
+    # Parse the first chunk before the response starts, so a body over the
+    # size limit from the start still gets its 413
+    try:
+        handle = io.TextIOWrapper(request.stream, encoding='utf-8', newline='' if input_format == 'csv' else None)
+        chunks = (iter_csv_chunks(handle, chunk_size) if input_format == 'csv'
+                  else iter_ndjson_chunks(handle, chunk_size))
+        first = next(chunks, None)
+    except (BodyTooLarge, RequestEntityTooLarge) as e:
+        return jsonify({'error': body_too_large_message(e)}), 413
+    chunks = itertools.chain([first] if first is not None else [], chunks)
+    
+    def generate():
+        try:
+            for results in score_chunks(chunks, lambda records, start: score_records(records, start, assets),
+                                        lambda raw_df, start: score_frame(raw_df, start, assets), progress):
+                yield writer.format(results)
+        except (BodyTooLarge, RequestEntityTooLarge) as e:
+            # The status line is already sent: end the results with an error
+            # record in place of the rows past the limit
+            yield writer.format([{'index': progress.rows, 'error': body_too_large_message(e)}])
+        progress.finish()
+    
+    return Response(stream_with_context(generate()), mimetype=writer.mimetype)
+
 # Load model assets on startup
 print("="*70)
 print("STARTUP SUCCESS PREDICTION API")
 print("="*70)
-if load_model_assets():
-    print(f"\n🚀 Server starting with optimal threshold: {optimal_threshold}")
+if os.environ.get('LAZY_MODEL_LOAD', '').lower() in ('1', 'true', 'yes'):
+    start_background_load()
+    print("\n⏳ Server starting while model assets load in the background (/health reports readiness)")
+elif load_model_assets():
+    print(f"\n🚀 Server starting with optimal threshold: {current_assets.threshold}")
     print(f"📊 Expected Performance: 79.5% accuracy, 92.5% recall")
 else:
     print("\n⚠️  Server starting WITHOUT model - predictions will fail")
 print("="*70)
 
 if __name__ == '__main__':
+    # Only the debug reloader's child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_model_watcher()
     app.run(debug=True, port=5001, host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,135 @@
+# ml_model/batch_formats.py
+
+"""
+Columnar request and response bodies for /predict-batch.
+
+Besides the default JSON list of payload objects, a batch can be sent
+column-oriented, which parses straight into a DataFrame without building
+one dict per row:
+
+  application/json                       {"funding_total_usd": [...], "founded_at": [...], ...}
+  application/x-npz                      numpy.savez archive, one array per column
+  application/vnd.apache.arrow.stream    Arrow IPC stream (needs pyarrow)
+
+The response format follows Accept. application/json keeps the original
+list of result objects; the other types are serialized from result arrays
+(index, startup_name, prediction, success_probability, error) without
+building a dict per row:
+
+  application/vnd.investiq.columns+json  {"total": ..., "columns": {"index": [...], ...}}
+  application/x-npz                      numpy.savez archive of the result arrays
+  application/vnd.apache.arrow.stream    Arrow IPC stream of the result table
+"""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # optional: only needed for Arrow bodies
+    pyarrow = None
+
+from bulk_io import CSV_RESULT_COLUMNS
+
+JSON = 'application/json'
+COLUMNS_JSON = 'application/vnd.investiq.columns+json'
+NPZ = 'application/x-npz'
+ARROW = 'application/vnd.apache.arrow.stream'
+
+# Binary input types; JSON bodies are told apart by their top-level shape
+BINARY_INPUT_TYPES = (NPZ, ARROW)
+RESPONSE_TYPES = (JSON, COLUMNS_JSON, NPZ, ARROW)
+
+# Columns kept as text even when every value looks numeric
+TEXT_COLUMNS = ('name', 'category_code')
+
+class UnsupportedFormat(ValueError):
+    """Request body type this server cannot decode (answered with 415)"""
+
+def _require_arrow():
+    if pyarrow is None:
+        raise UnsupportedFormat(f'{ARROW} bodies need pyarrow installed on the server')
+
+def response_type(accept_mimetypes):
+    """Negotiated result media type for a request's Accept header (JSON when unspecified)"""
+    types = RESPONSE_TYPES if pyarrow is not None else RESPONSE_TYPES[:-1]
+    return accept_mimetypes.best_match(types, default=JSON)
+
+def columns_frame(columns):
+    """DataFrame from a column name → equal-length array mapping, as decoded from a columnar body"""
+    if not isinstance(columns, dict) or not columns:
+        raise ValueError('Expected an object mapping column names to arrays')
+    arrays = {}
+    for name, values in columns.items():
+        if isinstance(values, list):
+            values = _column_array(name, values)
+        if not isinstance(values, np.ndarray) or values.ndim != 1:
+            raise ValueError(f'Column {name!r} must be a 1-D array')
+        arrays[name] = values
+    if len({len(values) for values in arrays.values()}) > 1:
+        raise ValueError('All columns must have the same length')
+    return pd.DataFrame(arrays, copy=False)
+
+def _column_array(name, values):
+    # Numeric JSON columns (null → NaN) convert in one C loop, ~5x faster
+    # than letting pandas infer object columns
+    if name not in TEXT_COLUMNS:
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+def decode_frame(body, mimetype):
+    """Raw rows as a DataFrame from an NPZ or Arrow request body"""
+    if mimetype == NPZ:
+        try:
+            with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+                return columns_frame({name: archive[name] for name in archive.files})
+        except (OSError, EOFError) as e:  # not a .npz archive
+            raise ValueError(f'Invalid NPZ body: {e}') from None
+    if mimetype == ARROW:
+        _require_arrow()
+        try:
+            return pyarrow.ipc.open_stream(body).read_all().to_pandas()
+        except pyarrow.ArrowInvalid as e:
+            raise ValueError(f'Invalid Arrow IPC body: {e}') from None
+    raise UnsupportedFormat(f'Unsupported Content-Type: {mimetype}')
+
+def encode_results(summary, columns, mimetype):
+    """
+    Body for result arrays in a columnar response type. `columns` holds
+    CSV_RESULT_COLUMNS arrays; failed rows have NaN probability and None
+    prediction, successful rows None error.
+    """
+    if mimetype == COLUMNS_JSON:
+        failed = np.isnan(columns['success_probability'])
+        probability = columns['success_probability'].astype(object)
+        probability[failed] = None
+        lists = {name: (probability if name == 'success_probability' else columns[name]).tolist()
+                 for name in CSV_RESULT_COLUMNS}
+        return json.dumps(dict(summary, columns=lists))
+
+    if mimetype == NPZ:
+        buffer = io.BytesIO()
+        arrays = {name: np.asarray(['' if value is None else value for value in columns[name]], dtype=str)
+                  if columns[name].dtype == object else columns[name] for name in CSV_RESULT_COLUMNS}
+        np.savez(buffer, **arrays, **{name: np.asarray(value) for name, value in summary.items()})
+        return buffer.getvalue()
+
+    if mimetype == ARROW:
+        _require_arrow()
+        table = pyarrow.table({name: columns[name] for name in CSV_RESULT_COLUMNS})
+        table = table.replace_schema_metadata({key: str(value) for key, value in summary.items()})
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    raise UnsupportedFormat(f'Unsupported response type: {mimetype}')
@@ -0,0 +1,801 @@
+# ml_model/benchmark_suite.py
+
+"""
+Reproducible benchmark suite with JSON output.
+
+Trains a small stacking ensemble on synthetic data (fixed seeds, no network,
+no 'startup data.csv'), writes it to a temporary MODEL_DIR and runs the
+cases given with --cases (default: the first four; 'all' runs every one):
+
+  cold_start        fresh interpreter until the model is ready (full unpickle,
+                    compiled-artifact start, LAZY_MODEL_LOAD), with RSS
+  single_request    p50/p95/p99 latency of /predict through the Flask test
+                    client and of the raw scoring functions
+  batch_throughput  rows/s for each batch size, through /predict-batch and
+                    through score_records() directly
+  peak_memory       traced Python allocation peak and process RSS while
+                    scoring batches
+  row_by_row        score_records() against one model call per payload
+  compiled          compiled inference path against the sklearn pipeline, for
+                    an aligned row and end to end
+  feature_vector    /predict feature row from FeatureSchema against the pandas
+                    preprocessing: allocation peak and p50, alone and through
+                    /predict
+  features          NumPy feature kernel against the pandas feature engineering
+  dates             date_parsing.parse_dates against pd.to_datetime, with an
+                    empty and a warm cache
+  thresholds        ThresholdSweep against per-threshold sklearn metric calls
+  tree_arrays       flattened tree arrays against each base model's sklearn
+                    and native predictor, and the compiled pipeline
+  batch_formats     /predict-batch by request and response format
+  compression       wire size and time of plain, gzip and zstd bodies
+  distillation      fidelity and ?mode=fast latency of a distilled student
+  incremental       incremental_training.update_model against a full retrain
+  rebalancing       each rebalancing strategy, one train_model.py run each
+  workers           serve.py throughput and per-worker memory by worker count
+  micro_batching    serve.py /predict load test by MICRO_BATCH_SIZE:WAIT_MS
+
+The tests in tests/ check that each faster path gives the same results as
+the reference it is timed against here.
+
+Results go to a JSON file; --compare prints the change against an earlier
+run and --fail-on-regression exits non-zero if anything got worse by more
+than --tolerance.
+
+    python benchmark_suite.py --output bench_before.json
+    python benchmark_suite.py --output bench_after.json --compare bench_before.json
+    python benchmark_suite.py --cases dates thresholds --date-sizes 1 1000 1000000
+"""
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_curve
+
+from batch_formats import JSON
+from compression import available_encodings, compress_bytes
+from date_parsing import clear_date_cache, parse_dates
+from distillation import fidelity_report, fit_student
+from fast_inference import base_model_predictors, compile_predictor
+from features import compute_features
+from incremental_training import MODEL_FILE, test_metrics, update_model
+from rebalancing import STRATEGIES
+from reference_impl import (THRESHOLD_GRID, legacy_f1_search, legacy_threshold_grid, pandas_dates, pandas_features,
+                            score_row_by_row)
+from synthetic_data import (BATCH_FORMATS, DATE_FORMATS, date_batches, fit_model_assets, make_payloads,
+                            make_raw_frame, make_startup_frame, request_body, sample_rows, save_model_assets,
+                            scaled_features, synthetic_scores)
+from threshold_analysis import best_threshold, package_threshold, threshold_table
+from training_data import ArtifactCache, transform_dataset
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Metric name suffixes where a larger value is an improvement
+HIGHER_IS_BETTER = ('rows_per_second', 'requests_per_second', 'speedup', 'scaling', 'roc_auc', 'f1',
+                    'accuracy', 'agreement')
+# Sizes and counts reported for context, not compared
+NOT_COMPARED = ('n_requests', 'n_features', 'fit_rows', 'trees', 'roc_thresholds', 'mean_batch_size')
+
+PROBE = r'''
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, os.environ['APP_DIR'])
+import app
+imported = time.perf_counter() - started
+app.wait_for_model()
+ready = time.perf_counter() - started
+
+def status_kb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+
+print(json.dumps({'import_s': imported, 'ready_s': ready, 'model_status': app.model_status,
+                  'rss_mb': status_kb('VmRSS') / 1024, 'peak_rss_mb': status_kb('VmHWM') / 1024}))
+'''
+
+def environment():
+    import lightgbm
+    import sklearn
+    import xgboost
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'omp_num_threads': os.environ.get('OMP_NUM_THREADS'),
+        'packages': {'numpy': np.__version__, 'pandas': pd.__version__, 'scikit-learn': sklearn.__version__,
+                     'xgboost': xgboost.__version__, 'lightgbm': lightgbm.__version__},
+    }
+
+def latency_summary(samples):
+    ms = np.asarray(samples) * 1000
+    return {'p50_ms': float(np.percentile(ms, 50)), 'p95_ms': float(np.percentile(ms, 95)),
+            'p99_ms': float(np.percentile(ms, 99)), 'mean_ms': float(ms.mean()),
+            'requests_per_second': float(len(ms) / (ms.sum() / 1000))}
+
+def measure(fn, inputs, warmup=20):
+    for item in inputs[:warmup]:
+        fn(item)
+    timings = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def time_per_call(fn, batches):
+    start = time.perf_counter()
+    for batch in batches:
+        fn(batch)
+    return (time.perf_counter() - start) / len(batches)
+
+def traced_peaks(fn, inputs):
+    """Allocation peak above the starting level for each call, in bytes"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for item in inputs:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            fn(item)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return np.asarray(peaks)
+
+def current_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return None
+
+def quietly(fn, *args, **kwargs):
+    """(result, seconds) of a call with its console report suppressed"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def checked_post(client, url, **kwargs):
+    response = client.post(url, **kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f'{url} returned {response.status_code}: {response.data[:200]}')
+    return response
+
+def run_probe(env):
+    output = subprocess.run([sys.executable, '-c', PROBE], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def bench_cold_start(ctx, args):
+    env = dict(os.environ, MODEL_DIR=ctx.model_dir, APP_DIR=BASE_DIR)
+    env.pop('LAZY_MODEL_LOAD', None)
+    results = {}
+    # 'full' writes the compiled artifact that 'compiled' maps
+    for mode, mode_env in (('full', env), ('compiled', env), ('lazy', dict(env, LAZY_MODEL_LOAD='1'))):
+        probe = run_probe(mode_env)
+        if probe['model_status'] != 'ready':
+            raise RuntimeError(f"cold start ({mode}): model did not load ({probe['model_status']})")
+        results[mode] = {key: probe[key] for key in ('import_s', 'ready_s', 'rss_mb', 'peak_rss_mb')}
+    return results
+
+def bench_single_request(ctx, args):
+    service, client = ctx.service, ctx.client
+    payloads = make_payloads(args.requests, seed=7)
+    bodies = [json.dumps(payload) for payload in payloads]
+    features = service.get_model_features()
+    rows = [service.align_features(service.preprocess_input(payload)).to_numpy(dtype=np.float64)
+            for payload in payloads]
+
+    def http_predict(body):
+        checked_post(client, '/predict', data=body, content_type='application/json')
+
+    results = {
+        'http_predict': latency_summary(measure(http_predict, bodies)),
+        'preprocess_and_score': latency_summary(measure(
+            lambda payload: service.predict_probabilities(service.preprocess_input(payload)), payloads)),
+        'preprocess_only': latency_summary(measure(service.preprocess_input, payloads)),
+        'score_aligned_row': latency_summary(measure(service.predict_matrix, rows)),
+    }
+    results['n_requests'] = args.requests
+    results['n_features'] = len(features)
+    return results
+
+def bench_batch_throughput(ctx, args):
+    results = {}
+    for size in args.sizes:
+        records = make_payloads(size, seed=size)
+        runs = 1 if size >= 10000 else args.repeat
+        entry = {}
+        seconds = best_time(lambda: ctx.service.score_records(records), runs)
+        entry['score_records'] = {'seconds': seconds, 'rows_per_second': size / seconds}
+        if size <= args.max_http_batch:
+            body = json.dumps(records)
+            seconds = best_time(lambda: checked_post(ctx.client, '/predict-batch', data=body,
+                                                     content_type='application/json'), runs)
+            entry['http_predict_batch'] = {'seconds': seconds, 'rows_per_second': size / seconds}
+        results[str(size)] = entry
+    return results
+
+def bench_peak_memory(ctx, args):
+    results = {}
+    for size in args.memory_sizes:
+        records = make_payloads(size, seed=size)
+        tracemalloc.start()
+        ctx.service.score_records(records)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[str(size)] = {'traced_peak_mb': peak / 2**20, 'rss_after_mb': current_rss_mb()}
+    results['process_peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return results
+
+def bench_row_by_row(ctx, args):
+    service = ctx.service
+    results = {}
+    for size in args.loop_sizes:
+        records = make_payloads(size, seed=size)
+        loop_s = best_time(lambda: score_row_by_row(service, records), 1 if size > 1000 else args.repeat)
+        vectorized_s = best_time(lambda: service.predict_probabilities(service.preprocess_batch(records)[0]),
+                                 args.repeat)
+        results[str(size)] = {'row_by_row': {'rows_per_second': size / loop_s},
+                              'vectorized': {'rows_per_second': size / vectorized_s},
+                              'speedup': loop_s / vectorized_s}
+    return results
+
+def bench_compiled(ctx, args):
+    service = ctx.service
+    compiled = service.current_assets.compiled
+    if compiled is None:
+        raise RuntimeError("compiled predictor could not be built for this model")
+    model, imputer, scaler = ctx.assets['model_package']['model'], ctx.assets['imputer'], ctx.assets['scaler']
+    payloads = make_payloads(args.requests, seed=7)
+    features = service.get_model_features()
+    rows = [service.align_features(service.preprocess_input(payload)).to_numpy(dtype=np.float64)
+            for payload in payloads]
+
+    def sklearn_pipeline(frame):
+        imputed = pd.DataFrame(imputer.transform(frame), columns=frame.columns)
+        return model.predict_proba(pd.DataFrame(scaler.transform(imputed), columns=frame.columns))[:, 1]
+
+    return {
+        'scoring': {
+            'sklearn': latency_summary(measure(lambda row: sklearn_pipeline(pd.DataFrame(row, columns=features)),
+                                               rows)),
+            'compiled': latency_summary(measure(compiled.predict_proba, rows)),
+        },
+        'end_to_end': {
+            'sklearn': latency_summary(measure(
+                lambda payload: sklearn_pipeline(service.align_features(service.preprocess_input(payload))),
+                payloads)),
+            'compiled': latency_summary(measure(
+                lambda payload: service.predict_probabilities(service.preprocess_input(payload)), payloads)),
+        },
+    }
+
+def bench_feature_vector(ctx, args):
+    service, client = ctx.service, ctx.client
+    assets = service.current_assets
+    schema = assets.schema
+    if schema is None:
+        raise RuntimeError("feature schema could not be built for this model")
+    payloads = make_payloads(args.requests, seed=11)
+    pandas_row = lambda payload: service.align_features(service.preprocess_input(payload)).to_numpy(dtype=np.float64)
+
+    def predict_with(use_schema):
+        def post(payload):
+            service.current_assets = assets if use_schema else assets._replace(schema=None)
+            checked_post(client, '/predict', json=payload)
+        return post
+
+    cases = {
+        'feature_row': {'pandas': pandas_row, 'schema': schema.encode},
+        'http_predict': {'pandas': predict_with(False), 'schema': predict_with(True)},
+    }
+    results = {}
+    try:
+        for stage, paths in cases.items():
+            results[stage] = {}
+            for path, fn in paths.items():
+                timings = measure(fn, payloads)
+                peaks = traced_peaks(fn, payloads) / 1024
+                results[stage][path] = {'peak_kib_p50': float(np.median(peaks)), 'peak_kib_max': float(peaks.max()),
+                                        'p50_ms': float(np.median(timings) * 1000)}
+    finally:
+        service.current_assets = assets
+    return results
+
+def bench_features(ctx, args):
+    results = {}
+    for size in args.feature_sizes:
+        df = make_raw_frame(size, seed=size)
+        pandas_s = best_time(lambda: pandas_features(df, fit_thresholds=False), args.repeat)
+        numpy_s = best_time(lambda: compute_features(df), args.repeat)
+        results[str(size)] = {'pandas_ms': pandas_s * 1000, 'numpy_ms': numpy_s * 1000, 'speedup': pandas_s / numpy_s}
+    return results
+
+def bench_dates(ctx, args):
+    results = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)  # pandas' dateutil fallback for malformed first values
+        for name, fmt in DATE_FORMATS.items():
+            results[name] = {}
+            for rows in args.date_sizes:
+                batches = date_batches(rows, fmt, args.date_calls)
+                pandas_s = time_per_call(pandas_dates, batches)
+                clear_date_cache()
+                cold_s = time_per_call(parse_dates, batches)
+                warm_s = time_per_call(parse_dates, batches)
+                results[name][str(rows)] = {'pandas_ms': pandas_s * 1000, 'cold_cache_ms': cold_s * 1000,
+                                            'warm_cache_ms': warm_s * 1000, 'speedup': pandas_s / cold_s}
+    return results
+
+def bench_thresholds(ctx, args):
+    """The legacy F1 search is extrapolated from its first thresholds when the full O(n²) loop would take too long"""
+    results = {}
+    for rows in args.threshold_sizes:
+        y_true, scores = synthetic_scores(rows, seed=rows)
+        _, _, roc_thresholds = roc_curve(y_true, scores)
+        subset = roc_thresholds[:args.max_legacy_thresholds]
+        start = time.perf_counter()
+        legacy_f1_search(y_true, scores, subset)
+        legacy_s = (time.perf_counter() - start) * len(roc_thresholds) / len(subset)
+        sweep_s = best_time(lambda: best_threshold(y_true, scores, roc_thresholds), 1)
+        results[str(rows)] = {
+            'roc_thresholds': len(roc_thresholds),
+            'f1_search': {'legacy_s': legacy_s, 'sweep_s': sweep_s, 'speedup': legacy_s / sweep_s},
+            'grid': {'legacy_ms': best_time(lambda: legacy_threshold_grid(y_true, scores), 1) * 1000,
+                     'sweep_ms': best_time(lambda: threshold_table(y_true, scores, THRESHOLD_GRID), 1) * 1000},
+        }
+    return results
+
+def bench_tree_arrays(ctx, args):
+    model, imputer, scaler = ctx.assets['model_package']['model'], ctx.assets['imputer'], ctx.assets['scaler']
+    columns = list(imputer.feature_names_in_)
+    compiled = compile_predictor(model, imputer, scaler)
+    if compiled is None:
+        raise RuntimeError("compiled predictor could not be built for this model")
+    X_raw, X_scaled = sample_rows(imputer, scaler, max(args.tree_sizes), seed=11)
+
+    results = {}
+    for (name, _), estimator in zip(model.estimators, model.estimators_):
+        native, arrays = base_model_predictors(name, estimator)
+        results[name] = {}
+        for rows in args.tree_sizes:
+            X = X_scaled[:rows]
+            frame = pd.DataFrame(X, columns=columns)
+            entry = {'sklearn_ms': best_time(lambda: estimator.predict_proba(frame), args.repeat) * 1000,
+                     'arrays_ms': best_time(lambda: arrays(X), args.repeat) * 1000}
+            if native is not None:
+                entry['native_ms'] = best_time(lambda: native(X), args.repeat) * 1000
+            results[name][str(rows)] = entry
+    results['stacking'] = {}
+    for rows in args.tree_sizes:
+        frame = pd.DataFrame(X_scaled[:rows], columns=columns)
+        results['stacking'][str(rows)] = {
+            'sklearn_ms': best_time(lambda: model.predict_proba(frame), args.repeat) * 1000,
+            'compiled_ms': best_time(lambda: compiled.predict_proba(X_raw[:rows].copy()), args.repeat) * 1000,
+        }
+    return results
+
+def bench_batch_formats(ctx, args):
+    results = {}
+    for size in args.format_sizes:
+        records = make_payloads(size, seed=size)
+        results[str(size)] = {}
+        for content_type, layout, accept in [(JSON, 'records', JSON)] + BATCH_FORMATS:
+            body = request_body(records, layout)
+            seconds = best_time(lambda: checked_post(ctx.client, '/predict-batch', data=body, content_type=content_type,
+                                                     headers={'Accept': accept}), args.repeat)
+            results[str(size)][f'{layout}_to_{accept.split("/")[-1]}'] = {
+                'body_mb': len(body) / 2**20, 'seconds': seconds, 'rows_per_second': size / seconds}
+    return results
+
+def bench_compression(ctx, args):
+    results = {}
+    cases = [('predict', 1, make_payloads(1, seed=1)[0])]
+    cases += [('predict_batch', size, make_payloads(size, seed=size)) for size in args.compression_sizes]
+    for endpoint, rows, payload in cases:
+        raw = json.dumps(payload).encode()
+        entries = results.setdefault(endpoint, {})[str(rows)] = {}
+        for encoding in (None,) + available_encodings():
+            body = raw if encoding is None else compress_bytes(raw, encoding)
+            headers = {} if encoding is None else {'Content-Encoding': encoding, 'Accept-Encoding': encoding}
+            post = lambda: checked_post(ctx.client, '/' + endpoint.replace('_', '-'), data=body,
+                                        content_type='application/json', headers=headers)
+            seconds = best_time(post, args.repeat)
+            entries[encoding or 'identity'] = {'request_kib': len(body) / 1024,
+                                               'response_kib': len(post().data) / 1024, 'ms': seconds * 1000}
+    return results
+
+def bench_distillation(ctx, args):
+    service, client = ctx.service, ctx.client
+    teacher = ctx.assets['model_package']['model']
+    payloads = make_payloads(args.distill_rows, seed=7)
+    labels = make_startup_frame(args.distill_rows, seed=7)['labels'].to_numpy()
+    X = scaled_features(service, payloads)
+    split = int(len(X) * 0.8)
+    student = fit_student(X.iloc[:split], teacher.predict_proba(X.iloc[:split])[:, 1],
+                          n_estimators=args.student_estimators)
+    fidelity = fidelity_report(labels[split:], teacher.predict_proba(X.iloc[split:])[:, 1],
+                               student.predict_proba(X.iloc[split:])[:, 1], service.current_assets.threshold)
+    service.install_student_model({'model': student, 'threshold': service.current_assets.threshold,
+                                   'fidelity': fidelity})
+    if service.current_assets.student is None:
+        raise RuntimeError("student model failed to compile")
+
+    results = {'fidelity': fidelity}
+    batch = make_payloads(1000, seed=8)
+    try:
+        for endpoint, inputs in (('predict', payloads[:args.requests]), ('predict_batch', [batch] * 5)):
+            for mode in ('full', 'fast'):
+                url = f"/{endpoint.replace('_', '-')}?mode={mode}"
+                timings = measure(lambda body: checked_post(client, url, json=body), inputs, warmup=2)
+                results.setdefault(endpoint, {})[mode] = latency_summary(timings)
+    finally:
+        service.install_student_model(None)
+    return results
+
+def holdout_metrics(model_dir, frame):
+    """Metrics of the model saved in model_dir on a raw frame, at its own threshold, and its tree count"""
+    load = lambda name: joblib.load(os.path.join(model_dir, name))
+    package, imputer, scaler = load(MODEL_FILE), load('imputer.pkl'), load('scaler.pkl')
+    X, y = transform_dataset(frame, load('category_encoder.pkl'), package['feature_stats'])
+    X_scaled = pd.DataFrame(scaler.transform(pd.DataFrame(imputer.transform(X), columns=X.columns)),
+                            columns=X.columns)
+    proba = package['model'].predict_proba(X_scaled)[:, 1]
+    trees = sum(config['n_estimators'] for config in package['hyperparameters'].values())
+    return test_metrics(y, proba, package_threshold(package)), trees
+
+def bench_incremental(ctx, args):
+    """
+    A model trained on a synthetic CSV, rows appended, then the model both
+    updated in place and rebuilt on the grown file; test-split metrics are
+    on each run's own test rows, the holdout is independent
+    """
+    from train_model import build_near_perfect_model
+
+    base_rows, new_rows = args.incremental_rows
+    frame = make_startup_frame(base_rows + new_rows, seed=42)
+    holdout = make_startup_frame(args.train_rows, seed=7)
+    no_cache = ArtifactCache('')
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_path = os.path.join(work_dir, 'startup data.csv')
+        incremental_dir, full_dir = os.path.join(work_dir, 'incremental'), os.path.join(work_dir, 'full')
+        os.makedirs(incremental_dir)
+        os.makedirs(full_dir)
+
+        def record(name, model_dir, metrics, seconds):
+            holdout_result, trees = holdout_metrics(model_dir, holdout)
+            results[name] = {'seconds': seconds, 'trees': trees,
+                             'test': {key: metrics[key] for key in ('roc_auc', 'f1')},
+                             'holdout': {key: holdout_result[key] for key in ('roc_auc', 'f1', 'accuracy')}}
+
+        frame.iloc[:base_rows].to_csv(data_path, index=False)
+        record('previous', incremental_dir, *quietly(build_near_perfect_model, data_path, incremental_dir,
+                                                     cache=no_cache, n_estimators=args.n_estimators))
+        frame.iloc[base_rows:].to_csv(data_path, mode='a', header=False, index=False)
+        metrics, seconds = quietly(update_model, data_path, incremental_dir, extra_trees=args.incremental_trees,
+                                   cache=no_cache)
+        if metrics is None:
+            raise RuntimeError("update_model could not update the model")
+        record('incremental', incremental_dir, metrics, seconds)
+        record('full_retrain', full_dir, *quietly(build_near_perfect_model, data_path, full_dir, cache=no_cache,
+                                                  n_estimators=args.n_estimators))
+    results['speedup'] = results['full_retrain']['seconds'] / results['incremental']['seconds']
+    return results
+
+def bench_rebalancing(ctx, args):
+    """Each strategy trains in its own process, so memory readings do not carry over between runs"""
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for strategy in args.strategies:
+            profile_dir = os.path.join(work_dir, strategy)
+            os.makedirs(profile_dir)
+            subprocess.run(
+                [sys.executable, os.path.join(BASE_DIR, 'train_model.py'), '--synthetic-rows',
+                 str(args.rebalance_rows), '--rebalance', strategy, '--n-estimators', str(args.n_estimators),
+                 '--profile-dir', profile_dir],
+                cwd=profile_dir, check=True, stdout=subprocess.DEVNULL)
+            with open(os.path.join(profile_dir, 'profile.json')) as f:
+                summary = json.load(f)
+            stages = {stage['stage']: stage for stage in summary['stages']}
+            results[strategy] = {
+                'resample_s': stages['resample']['wall_s'],
+                'resample_peak_rss_mb': stages['resample']['peak_rss_mb'],
+                'fit_rows': summary['metrics']['train_rows'],
+                'stacking_fit_s': stages['stacking_fit']['wall_s'],
+                'stacking_fit_peak_rss_mb': stages['stacking_fit']['peak_rss_mb'],
+                'total_s': sum(stage['wall_s'] for stage in summary['stages']),
+                'roc_auc': summary['metrics']['roc_auc'],
+                'f1': summary['metrics']['f1'],
+            }
+    return results
+
+def wait_for_health(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+@contextlib.contextmanager
+def running_server(model_dir, port, workers, threads, **env):
+    """serve.py on `port` against model_dir, stopped on exit"""
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, 'serve.py'), '--workers', str(workers),
+         '--threads', str(threads), '--port', str(port), '--quiet'],
+        env=dict(os.environ, MODEL_DIR=model_dir, PREDICTION_CACHE_SIZE='0', **env),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_for_health(port):
+            raise RuntimeError("serve.py did not become healthy")
+        yield server
+    finally:
+        server.terminate()
+        server.wait()
+
+def load_client(job):
+    """One keep-alive client posting to /predict for `duration` seconds; its latencies"""
+    port, bodies, duration = job
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    latencies = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        conn.request('POST', '/predict', body=bodies[len(latencies) % len(bodies)], headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(f'/predict returned {response.status}')
+    return latencies
+
+def load_test(port, clients, duration):
+    """(latencies, seconds) of `clients` concurrent client processes, after a one-second warm-up"""
+    bodies = [json.dumps(payload) for payload in make_payloads(500, seed=3)]
+    with multiprocessing.Pool(clients) as pool:
+        pool.map(load_client, [(port, bodies, 1.0)] * clients)
+        start = time.monotonic()
+        latencies = np.concatenate(pool.map(load_client, [(port, bodies, duration)] * clients))
+        return latencies, time.monotonic() - start
+
+def worker_memory(parent_pid):
+    """(RSS MB, PSS MB) summed over the worker processes of serve.py"""
+    try:
+        with open(f'/proc/{parent_pid}/task/{parent_pid}/children') as f:
+            pids = [int(pid) for pid in f.read().split()]
+    except OSError:
+        return None, None
+    pids = pids or [parent_pid]
+    rss = pss = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Rss:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('Pss:'):
+                        pss += int(line.split()[1])
+        except OSError:
+            return None, None
+    return rss / 1024, pss / 1024
+
+def bench_workers(ctx, args):
+    """PSS well below RSS means the model pages are shared copy-on-write between workers"""
+    results = {}
+    baseline = None
+    for workers in args.workers:
+        with running_server(ctx.model_dir, args.port, workers, args.threads) as server:
+            latencies, seconds = load_test(args.port, args.clients, args.duration)
+            rss, pss = worker_memory(server.pid)
+        throughput = len(latencies) / seconds
+        baseline = baseline or throughput
+        results[str(workers)] = {'requests_per_second': throughput, 'scaling': throughput / baseline,
+                                 'worker_rss_mb': rss, 'worker_pss_mb': pss}
+    return results
+
+def parse_micro_batch_setting(value):
+    size, wait_ms = value.split(':')
+    return int(size), float(wait_ms)
+
+def bench_micro_batching(ctx, args):
+    """One worker with a request thread per client; size 1 is the unbatched baseline"""
+    results = {}
+    for size, wait_ms in args.micro_batch_settings:
+        with running_server(ctx.model_dir, args.port, 1, args.clients,
+                            MICRO_BATCH_SIZE=str(size), MICRO_BATCH_WAIT_MS=str(wait_ms)):
+            latencies, seconds = load_test(args.port, args.clients, args.duration)
+            conn = http.client.HTTPConnection('127.0.0.1', args.port, timeout=5)
+            conn.request('GET', '/health')
+            stats = json.loads(conn.getresponse().read())['micro_batching']
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        results[f'{size}:{wait_ms:g}'] = {'requests_per_second': len(latencies) / seconds, 'p50_ms': float(p50),
+                                          'p99_ms': float(p99), 'mean_batch_size': stats['mean_batch_size']}
+    return results
+
+# Run in this order; cases other than cold_start score through the imported service
+CASES = {
+    'cold_start': bench_cold_start,
+    'single_request': bench_single_request,
+    'batch_throughput': bench_batch_throughput,
+    'peak_memory': bench_peak_memory,
+    'row_by_row': bench_row_by_row,
+    'compiled': bench_compiled,
+    'feature_vector': bench_feature_vector,
+    'features': bench_features,
+    'dates': bench_dates,
+    'thresholds': bench_thresholds,
+    'tree_arrays': bench_tree_arrays,
+    'batch_formats': bench_batch_formats,
+    'compression': bench_compression,
+    'distillation': bench_distillation,
+    'incremental': bench_incremental,
+    'rebalancing': bench_rebalancing,
+    'workers': bench_workers,
+    'micro_batching': bench_micro_batching,
+}
+DEFAULT_CASES = ['cold_start', 'single_request', 'batch_throughput', 'peak_memory']
+
+def flatten(tree, prefix=''):
+    flat = {}
+    for key, value in tree.items():
+        name = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+def compare(current, baseline, tolerance):
+    """Print per-metric changes; return the metrics that regressed by more than `tolerance`"""
+    now, before = flatten(current['results']), flatten(baseline['results'])
+    regressions = []
+    print(f"\n{'Metric':<70} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    print("-" * 106)
+    for name in sorted(set(now) & set(before)):
+        if name.endswith(NOT_COMPARED) or not before[name]:
+            continue
+        change = (now[name] - before[name]) / before[name]
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        flag = ''
+        if worse > tolerance:
+            regressions.append(name)
+            flag = ' ⚠️'
+        print(f"{name:<70} {before[name]:>12.4g} {now[name]:>12.4g} {change:>+8.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='earlier JSON result to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='relative change counted as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES) + ['all'], default=DEFAULT_CASES)
+    parser.add_argument('--skip-cold-start', action='store_true')
+    parser.add_argument('--train-rows', type=int, default=2000)
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 10000, 100000])
+    parser.add_argument('--max-http-batch', type=int, default=100000,
+                        help='largest batch also sent through /predict-batch')
+    parser.add_argument('--memory-sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--loop-sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--feature-sizes', type=int, nargs='+', default=[1, 1000, 100000])
+    parser.add_argument('--date-sizes', type=int, nargs='+', default=[1, 1000, 100000])
+    parser.add_argument('--date-calls', type=int, default=1000, help='distinct one-row batches timed for size 1')
+    parser.add_argument('--threshold-sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--max-legacy-thresholds', type=int, default=2000,
+                        help='time at most this many thresholds of the legacy F1 search and extrapolate')
+    parser.add_argument('--tree-sizes', type=int, nargs='+', default=[1, 1000, 10000])
+    parser.add_argument('--format-sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--compression-sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--distill-rows', type=int, default=4000)
+    parser.add_argument('--student-estimators', type=int, default=100)
+    parser.add_argument('--incremental-rows', type=int, nargs=2, default=[4000, 800], metavar=('BASE', 'NEW'))
+    parser.add_argument('--incremental-trees', type=int, default=50)
+    parser.add_argument('--rebalance-rows', type=int, default=20000)
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=2, help='request threads per serve.py worker')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent load-test clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per load test')
+    parser.add_argument('--port', type=int, default=5091)
+    parser.add_argument('--micro-batch-settings', type=parse_micro_batch_setting, nargs='+',
+                        default=[(1, 0.0), (8, 1.0), (32, 2.0), (32, 5.0)],
+                        help='MICRO_BATCH_SIZE:MICRO_BATCH_WAIT_MS pairs')
+    args = parser.parse_args()
+
+    cases = [case for case in CASES if case in args.cases or 'all' in args.cases]
+    if args.skip_cold_start and 'cold_start' in cases:
+        cases.remove('cold_start')
+    report = {'environment': environment(),
+              'config': {key: value for key, value in vars(args).items()
+                         if key not in ('output', 'compare', 'fail_on_regression')},
+              'results': {}}
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        print(f"Training synthetic benchmark model ({args.n_estimators} trees per base model)...")
+        assets = fit_model_assets(args.train_rows, args.n_estimators)
+        save_model_assets(assets, model_dir)
+        ctx = SimpleNamespace(model_dir=model_dir, assets=assets, service=None, client=None)
+
+        for case in cases:
+            if case != 'cold_start' and ctx.service is None:
+                # Import the service against the synthetic model; the response
+                # cache would turn repeated payloads into dictionary lookups
+                os.environ['MODEL_DIR'] = model_dir
+                os.environ['PREDICTION_CACHE_SIZE'] = '0'
+                os.environ.pop('LAZY_MODEL_LOAD', None)
+                import app as service
+                service.wait_for_model()
+                if not service.model_available():
+                    raise SystemExit("❌ Synthetic model failed to load")
+                ctx.service, ctx.client = service, service.app.test_client()
+                report['results']['compiled_inference'] = service.current_assets.compiled is not None
+            print(f"Running {case}...")
+            started = time.perf_counter()
+            report['results'][case] = CASES[case](ctx, args)
+            print(f"   ✓ {case} ({time.perf_counter() - started:.1f}s)")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'Metric':<70} {'Value':>12}")
+    print("-" * 83)
+    for name, value in flatten(report['results']).items():
+        print(f"{name:<70} {value:>12.4g}")
+    print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+if __name__ == '__main__':
+    main()
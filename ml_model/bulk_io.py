@@ -0,0 +1,132 @@
+# ml_model/bulk_io.py
+
+"""
+Chunked readers and incremental writers for bulk scoring.
+
+Input (CSV or NDJSON) is read a fixed number of rows at a time, each chunk
+is scored in one vectorized pass and its results are serialized straight
+away, so memory stays flat however large the input is. Used by the
+/predict-stream endpoint and by bulk_score.py.
+"""
+
+import csv
+import io
+import json
+import sys
+import time
+
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 10000
+INPUT_FORMATS = ('csv', 'ndjson')
+OUTPUT_FORMATS = ('ndjson', 'csv')
+CSV_RESULT_COLUMNS = ['index', 'startup_name', 'prediction', 'success_probability', 'error']
+
+class InvalidLine:
+    """Placeholder for an NDJSON line that is not valid JSON"""
+
+    def __init__(self, message):
+        self.message = message
+
+def iter_csv_chunks(handle, chunk_size=DEFAULT_CHUNK_SIZE):
+    """DataFrames of up to chunk_size raw rows from a CSV file object"""
+    try:
+        yield from pd.read_csv(handle, chunksize=chunk_size)
+    except pd.errors.EmptyDataError:
+        return
+
+def iter_ndjson_chunks(handle, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lists of up to chunk_size payload dicts from an NDJSON file object; blank lines are skipped"""
+    chunk = []
+    for line in handle:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            chunk.append(json.loads(line))
+        except ValueError as e:
+            chunk.append(InvalidLine(f'Invalid JSON: {e}'))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def score_chunks(chunks, score_records, score_frame, progress=None):
+    """
+    Score each chunk (a DataFrame from iter_csv_chunks or a list from
+    iter_ndjson_chunks) and yield its list of result dicts; indices run on
+    across chunks
+    """
+    start_index = 0
+    for chunk in chunks:
+        if isinstance(chunk, pd.DataFrame):
+            results = score_frame(chunk, start_index)
+        else:
+            results = score_records(chunk, start_index)
+            for offset, record in enumerate(chunk):
+                if isinstance(record, InvalidLine):
+                    results[offset]['error'] = record.message
+        start_index += len(results)
+        if progress is not None:
+            progress.update(results)
+        yield results
+
+class ResultWriter:
+    """Serializes result chunks as NDJSON lines or CSV rows (with a header before the first chunk)"""
+
+    def __init__(self, output_format='ndjson'):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'Unsupported output format: {output_format!r}')
+        self.output_format = output_format
+        self._header_written = False
+
+    @property
+    def mimetype(self):
+        return 'text/csv' if self.output_format == 'csv' else 'application/x-ndjson'
+
+    def format(self, results):
+        if self.output_format == 'ndjson':
+            return ''.join(json.dumps(result) + '\n' for result in results)
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_RESULT_COLUMNS, extrasaction='ignore', lineterminator='\n')
+        if not self._header_written:
+            writer.writeheader()
+            self._header_written = True
+        writer.writerows(results)
+        return buffer.getvalue()
+
+class ProgressLog:
+    """Running row/error counts and rows/second, logged at most every `interval` seconds"""
+
+    def __init__(self, label='bulk scoring', interval=5.0, stream=None):
+        self.label = label
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.rows = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._last_logged = self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def update(self, results):
+        self.rows += len(results)
+        self.errors += sum(1 for result in results if 'error' in result)
+        now = time.perf_counter()
+        if now - self._last_logged >= self.interval:
+            self._last_logged = now
+            self._log('⏳')
+
+    def finish(self):
+        self._log('✅')
+
+    def _log(self, marker):
+        elapsed = time.perf_counter() - self.started
+        print(f"{marker} {self.label}: {self.rows:,} rows ({self.errors:,} errors) "
+              f"in {elapsed:.1f}s, {self.rows_per_second:,.0f} rows/s", file=self.stream, flush=True)
@@ -0,0 +1,79 @@
+# ml_model/bulk_score.py
+
+"""
+Score a CSV or NDJSON file of startups with the prediction model.
+
+Rows are read, scored and written in chunks, so files larger than memory
+can be processed. Results are NDJSON (default) or CSV, one row per input
+row with the same index; progress and rows/second go to stderr.
+
+    python bulk_score.py startups.csv -o scores.ndjson
+    python bulk_score.py startups.ndjson --format csv --chunk-size 50000 > scores.csv
+    cat startups.csv | python bulk_score.py - --input-format csv
+
+The model is loaded from MODEL_DIR (default: this directory), like app.py.
+"""
+
+import argparse
+import os
+import sys
+
+from bulk_io import (DEFAULT_CHUNK_SIZE, INPUT_FORMATS, OUTPUT_FORMATS, ProgressLog, ResultWriter,
+                     iter_csv_chunks, iter_ndjson_chunks, score_chunks)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="input file, or '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    parser.add_argument('--input-format', choices=INPUT_FORMATS,
+                        help='input format (default: from the file extension, else ndjson)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='ndjson', help='output format')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='rows scored per chunk')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='seconds between progress lines')
+    return parser.parse_args(argv)
+
+def detect_input_format(path):
+    return 'csv' if path.lower().endswith(('.csv', '.csv.gz')) else 'ndjson'
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.chunk_size < 1:
+        raise SystemExit('--chunk-size must be positive')
+    input_format = args.input_format or detect_input_format(args.input)
+
+    # app.py prints its startup banner on import; keep stdout for results
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        import app as service
+        service.wait_for_model()
+    finally:
+        sys.stdout = stdout
+    if not service.model_available():
+        raise SystemExit('❌ Model assets could not be loaded')
+
+    if args.input == '-':
+        source = sys.stdin
+    elif input_format == 'csv':
+        source = args.input  # pandas handles compression and its own buffering
+    else:
+        source = open(args.input, encoding='utf-8')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+
+    chunks = iter_csv_chunks(source, args.chunk_size) if input_format == 'csv' else iter_ndjson_chunks(source, args.chunk_size)
+    writer = ResultWriter(args.format)
+    progress = ProgressLog(label=os.path.basename(args.input) if args.input != '-' else 'stdin',
+                           interval=args.progress_interval)
+    try:
+        for results in score_chunks(chunks, service.score_records, service.score_frame, progress):
+            sink.write(writer.format(results))
+            sink.flush()
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+        if not isinstance(source, str) and source is not sys.stdin:
+            source.close()
+    progress.finish()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# ml_model/compression.py
+
+"""
+HTTP body compression for the Flask app.
+
+Requests: a body sent with Content-Encoding gzip or zstd is decoded before
+the view reads it, capped at max_bytes so a small compressed upload cannot
+expand without limit. Buffered endpoints get the whole decoded body.
+Streamed endpoints (/predict-stream) get a decoding reader, so the upload
+is decompressed chunk by chunk as rows are parsed; it raises BodyTooLarge
+once the decoded bytes pass max_bytes.
+
+Responses: compressed with the best encoding the client's Accept-Encoding
+allows. Buffered bodies smaller than min_bytes are sent as is; a single
+/predict result is a few hundred bytes and would only pay the CPU cost.
+Streamed bodies are compressed chunk by chunk, flushed after each chunk so
+the client still receives results as they are scored.
+
+zstd needs the optional zstandard package; without it only gzip is offered
+and zstd request bodies are answered with 415.
+"""
+
+import gzip
+import io
+import zlib
+
+from werkzeug.wsgi import get_input_stream
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for zstd bodies
+    zstandard = None
+
+# Fast levels: on a 1 MB /predict-batch result, gzip level 1 is within 2%
+# of level 6's size in under half the time
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+READ_SIZE = 64 * 1024
+
+class UnsupportedEncoding(ValueError):
+    """Request Content-Encoding this server cannot decode (answered with 415)"""
+
+class BodyTooLarge(ValueError):
+    """Decoded request body above the configured limit (answered with 413)"""
+
+def available_encodings():
+    """Response encodings this server can produce, in order of preference"""
+    return ('zstd', 'gzip') if zstandard is not None else ('gzip',)
+
+def request_encoding(environ):
+    """Normalized Content-Encoding of a WSGI request, None for an unencoded body"""
+    encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+    if encoding in ('', 'identity'):
+        return None
+    if encoding == 'zstd' and zstandard is None:
+        raise UnsupportedEncoding('zstd request bodies need zstandard installed on the server')
+    if encoding not in ('gzip', 'x-gzip', 'zstd'):
+        raise UnsupportedEncoding(f'Unsupported Content-Encoding: {encoding}')
+    return encoding
+
+def _decoding_reader(raw, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    return gzip.GzipFile(fileobj=raw, mode='rb')
+
+class _CappedReader(io.RawIOBase):
+    """Decoding reader that raises BodyTooLarge once more than max_bytes have been decoded"""
+
+    def __init__(self, reader, max_bytes):
+        self.reader = reader
+        self.max_bytes = max_bytes
+        self.decoded = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.reader.read(len(buffer))
+        self.decoded += len(data)
+        if self.decoded > self.max_bytes:
+            raise BodyTooLarge(f'Decoded request body exceeds {self.max_bytes} bytes')
+        buffer[:len(data)] = data
+        return len(data)
+
+def _decoding_errors():
+    errors = (OSError, EOFError, zlib.error)
+    return errors + (zstandard.ZstdError,) if zstandard is not None else errors
+
+def decode_request(environ, streamed=False, max_bytes=None):
+    """
+    Replace a compressed WSGI request body with its decoded form, before
+    anything reads request.stream. Streamed requests get a decoding reader
+    that raises BodyTooLarge past max_bytes; others are decoded in full,
+    raising ValueError for a corrupt body and BodyTooLarge past max_bytes.
+    Returns the encoding, or None if the body was not encoded.
+    """
+    encoding = request_encoding(environ)
+    if encoding is None:
+        return None
+    reader = _decoding_reader(get_input_stream(environ, max_content_length=None), encoding)
+
+    if streamed:
+        environ['wsgi.input'] = reader if max_bytes is None else _CappedReader(reader, max_bytes)
+        environ.pop('CONTENT_LENGTH', None)
+    else:
+        body = io.BytesIO()
+        try:
+            while chunk := reader.read(READ_SIZE):
+                body.write(chunk)
+                if max_bytes is not None and body.tell() > max_bytes:
+                    raise BodyTooLarge(f'Decoded request body exceeds {max_bytes} bytes')
+        except _decoding_errors() as e:
+            raise ValueError(f'Invalid {encoding} request body: {e}') from None
+        environ['CONTENT_LENGTH'] = str(body.tell())
+        body.seek(0)
+        environ['wsgi.input'] = body
+
+    # The view sees a plain body; terminated tells Werkzeug to read the
+    # stream to its end rather than trust a Content-Length
+    environ['wsgi.input_terminated'] = True
+    environ.pop('HTTP_CONTENT_ENCODING', None)
+    return encoding
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def chunk(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def chunk(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+def compress_bytes(data, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def _compressed_chunks(chunks, stream, charset):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(charset)
+            data = stream.chunk(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def compress_response(response, accept_encodings, min_bytes=1024):
+    """Compress a Flask response in place for the client's Accept-Encoding; returns it"""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        stream = _ZstdStream() if encoding == 'zstd' else _GzipStream()
+        response.response = _compressed_chunks(response.response, stream, 'utf-8')
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        response.set_data(compress_bytes(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
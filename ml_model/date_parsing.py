@@ -0,0 +1,160 @@
+# ml_model/date_parsing.py
+
+"""
+Date parsing for the founded/funding columns.
+
+pd.to_datetime(values, errors='coerce') with no format guesses one from the
+first value and then parses every row. parse_dates() returns the same
+timestamps as int64 nanoseconds, faster:
+
+- The format is detected once per column, from the first non-null value as
+  pandas does.
+- Requests and small batches of 'YYYY-MM-DD' strings are converted
+  straight to day numbers through a per-string LRU cache, skipping
+  pandas' per-call overhead (about 0.6 ms).
+- Larger ISO columns go to pandas with the format given, since its C ISO
+  parser is faster than deduplicating the strings first.
+- Other formats, such as the M/D/YYYY of 'startup data.csv', are parsed
+  once per distinct value (pd.factorize) and mapped back to the rows.
+  pandas would run strptime on every row, because its own cache turns
+  itself off when the first rows are mostly distinct.
+"""
+
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+NS_PER_DAY = 86_400 * 10**9
+NAT = np.iinfo(np.int64).min
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Midnights representable as datetime64[ns]: 1677-09-22 to 2262-04-11
+MIN_DAY, MAX_DAY = -106_751, 106_751
+
+ISO_FORMAT = '%Y-%m-%d'
+
+# Strings pandas reads as missing (and skips when guessing the format)
+NAT_STRINGS = frozenset({'', 'NaT', 'nat', 'NAT', 'nan', 'NaN', 'NAN'})
+
+# ISO batches up to this size go through the per-string cache. Above it
+# pandas' vectorized parser wins on dates not seen before: at 256 rows the
+# cache takes 0.7 ms cold and 0.05 ms warm, pandas 0.3 ms with the format.
+CACHED_BATCH = 256
+DATE_CACHE_SIZE = 65_536
+# A batch with at most this many non-ISO strings ('2010-1-5', junk) parses
+# them one by one through a cache instead of one pandas call for all
+ODD_VALUES_CACHED = 4
+
+def parse_dates(values):
+    """
+    int64 nanoseconds since epoch for a 1-D array-like of dates, NAT for
+    missing or unparseable values; same result as
+    pd.to_datetime(values, errors='coerce')
+    """
+    array = np.asarray(values)
+    if array.dtype.kind == 'M':
+        return array.astype('datetime64[ns]').view(np.int64)
+    if array.dtype.kind != 'O':
+        # Numbers are read as epoch offsets; numpy strings become Python
+        # strings, as they would in a Series
+        if array.dtype.kind != 'U':
+            return _pandas_ns(array, None)
+        array = array.astype(object)
+
+    first = _first_value(array)
+    if first is None:
+        return np.full(len(array), NAT, dtype=np.int64)
+    if type(first) is not str:
+        return _pandas_ns(array, None)
+
+    fmt = detect_format(first)
+    if fmt == ISO_FORMAT:
+        if len(array) <= CACHED_BATCH:
+            parsed = _parse_cached(array)
+            if parsed is not None:
+                return parsed
+        return _pandas_ns(array, fmt)
+
+    codes, uniques = pd.factorize(array)
+    # Missing values have code -1, which picks the NAT appended last
+    return np.append(_pandas_ns(uniques, fmt), NAT).take(codes)
+
+def clear_date_cache():
+    """Forget cached parses (for benchmarks)"""
+    iso_date_ns.cache_clear()
+    _odd_iso_ns.cache_clear()
+    detect_format.cache_clear()
+
+def to_datetime64(values):
+    """parse_dates() as a datetime64[ns] array, for DataFrame columns"""
+    return parse_dates(values).view('datetime64[ns]')
+
+@lru_cache(maxsize=1024)
+def detect_format(value):
+    """strftime format pandas would infer from this first value, or None (element-wise dateutil)"""
+    return guess_datetime_format(value)
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def iso_date_ns(value):
+    """'YYYY-MM-DD' as nanoseconds since epoch, NAT for an impossible date, None for another format"""
+    if len(value) != 10 or value[4] != '-' or value[7] != '-':
+        return None
+    digits = value[:4] + value[5:7] + value[8:]
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    try:
+        days = date.fromisoformat(value).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return NAT
+    return days * NS_PER_DAY if MIN_DAY <= days <= MAX_DAY else NAT
+
+def _is_missing(value):
+    if isinstance(value, str):
+        return value in NAT_STRINGS
+    return value is None or value is pd.NA or value != value  # None, NA, NaN, NaT
+
+def _first_value(array):
+    for value in array:
+        if not _is_missing(value):
+            return value
+    return None
+
+def _parse_cached(array):
+    """
+    Per-string cached parse of a batch whose dates are ISO strings or null;
+    the few values that are not exact 'YYYY-MM-DD' ('2010-1-5', junk) are
+    parsed together by pandas with the ISO format. None if the batch holds
+    anything other than strings and nulls.
+    """
+    parsed = []
+    append = parsed.append
+    odd = []
+    for i, value in enumerate(array):
+        if type(value) is str and value not in NAT_STRINGS:
+            ns = iso_date_ns(value)
+            if ns is None:
+                odd.append(i)
+                ns = NAT
+            append(ns)
+        elif _is_missing(value):
+            append(NAT)
+        else:
+            return None
+    out = np.array(parsed, dtype=np.int64)
+    if len(odd) <= ODD_VALUES_CACHED:
+        for i in odd:
+            out[i] = _odd_iso_ns(array[i])
+    else:
+        out[odd] = _pandas_ns(array[odd], ISO_FORMAT)
+    return out
+
+@lru_cache(maxsize=1024)
+def _odd_iso_ns(value):
+    return int(_pandas_ns(np.array([value], dtype=object), ISO_FORMAT)[0])
+
+def _pandas_ns(values, fmt):
+    parsed = pd.to_datetime(pd.Series(values), format=fmt, errors='coerce')
+    return parsed.to_numpy().astype('datetime64[ns]').view(np.int64)
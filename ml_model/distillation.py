@@ -0,0 +1,66 @@
+# ml_model/distillation.py
+
+"""
+Distilled student model for the low-latency serving mode.
+
+The served ensemble runs three base models (up to 1500 trees) and a
+meta-learner for every prediction. fit_student() trains one XGBoost model
+with a fraction of the trees on the ensemble's probabilities instead of
+the hard labels. Each training row is entered twice, as class 1 weighted p
+and class 0 weighted 1 - p, which makes XGBoost's log-loss the
+cross-entropy against the soft target p. The student is a plain
+XGBClassifier, so app.py loads and compiles it (fast_inference.py) like
+any other model.
+
+fidelity_report() measures what the student gives up against its teacher
+on the held-out test set.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score, roc_auc_score
+from xgboost import XGBClassifier
+
+STUDENT_MODEL_FILE = 'startup_success_model_student.pkl'
+
+STUDENT_PARAMS = {
+    'max_depth': 6,
+    'learning_rate': 0.1,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'eval_metric': 'logloss',
+    'random_state': 42,
+}
+
+def soft_label_rows(X, soft_targets):
+    """(X twice, labels 1 then 0, weights p then 1 - p) for fitting a classifier to probabilities"""
+    p = np.clip(np.asarray(soft_targets, dtype=np.float64), 0.0, 1.0)
+    if isinstance(X, pd.DataFrame):
+        X_twice = pd.concat([X, X], ignore_index=True)
+    else:
+        X_twice = np.vstack([X, X])
+    labels = np.concatenate([np.ones(len(p), dtype=int), np.zeros(len(p), dtype=int)])
+    return X_twice, labels, np.concatenate([p, 1.0 - p])
+
+def fit_student(X, soft_targets, n_estimators=100, **params):
+    """XGBClassifier fitted to the teacher's probabilities for the rows of X"""
+    X_twice, labels, weights = soft_label_rows(X, soft_targets)
+    student = XGBClassifier(n_estimators=n_estimators, **dict(STUDENT_PARAMS, **params))
+    student.fit(X_twice, labels, sample_weight=weights)
+    return student
+
+def fidelity_report(y_true, teacher_proba, student_proba, threshold):
+    """AUC and F1 of teacher and student at the served threshold, plus how often they agree"""
+    teacher_pred = teacher_proba >= threshold
+    student_pred = student_proba >= threshold
+    report = {
+        'teacher_roc_auc': roc_auc_score(y_true, teacher_proba),
+        'student_roc_auc': roc_auc_score(y_true, student_proba),
+        'teacher_f1': f1_score(y_true, teacher_pred),
+        'student_f1': f1_score(y_true, student_pred),
+        'decision_agreement': float(np.mean(teacher_pred == student_pred)),
+        'mean_abs_probability_diff': float(np.mean(np.abs(teacher_proba - student_proba))),
+    }
+    report['roc_auc_gap'] = report['teacher_roc_auc'] - report['student_roc_auc']
+    report['f1_gap'] = report['teacher_f1'] - report['student_f1']
+    return {key: float(value) for key, value in report.items()}
@@ -0,0 +1,200 @@
+# ml_model/feature_schema.py
+
+"""
+Precomputed serving schema for single /predict requests.
+
+FeatureSchema is built once when the model loads. It fixes the model's
+column order, the name → index map, the positions of the engineered
+features, and the category codes with their training frequencies. encode()
+parses a JSON payload straight into a preallocated contiguous row (one per
+thread), with no DataFrame, object-dtype column or per-request
+get_feature_names_out() call. That makes a request a handful of small
+allocations instead of hundreds.
+
+The row is float64, not float32: rounding raw inputs such as funding to
+float32 before imputation and scaling moves them across tree split points
+(about one synthetic request in six scored differently, by up to 0.03).
+The base models still see float32 after scaling, as before.
+
+Only the common payload shape takes this path: numbers, booleans or null
+for numeric fields, 'YYYY-MM-DD' strings or null for dates, and a known
+category. For anything else encode() returns None and the caller uses the
+pandas preprocessing, which keeps its exact coercion rules and error
+messages.
+"""
+
+import threading
+
+import numpy as np
+
+from date_parsing import NAT, iso_date_ns
+from features import (DATE_COLUMNS, EARLY_STAGE_FUNDING, ENGINEERED_FEATURES, ROUND_COLUMNS,
+                      SLOW_MILESTONE_VELOCITY, compute_feature_row)
+
+# Fields compute_feature_row reads besides the dates; the first six are required
+KERNEL_FIELDS = ('funding_total_usd', 'funding_rounds', 'milestones', 'relationships',
+                 'age_first_milestone_year', 'age_last_milestone_year',
+                 'avg_participants', 'is_top500') + tuple(ROUND_COLUMNS)
+REQUIRED_FIELDS = KERNEL_FIELDS[:6] + tuple(DATE_COLUMNS)
+OPTIONAL_DEFAULTS = {'avg_participants': 2.0, 'is_top500': 0.0}
+
+# engineer_features' frequency for a payload that has a category, when the
+# model package carries no training frequencies (see feature_stats.py)
+DEFAULT_CATEGORY_FREQUENCY = 0.05
+
+FEATURE_DTYPE = np.float64
+
+def _number(value):
+    """Payload value as a float, or raise _Unsupported for anything but numbers, booleans and null"""
+    if value is None:
+        return np.nan
+    if type(value) in (int, float, bool):
+        try:
+            value = float(value)
+        except OverflowError:
+            raise _Unsupported from None
+        if value - value == 0 or value != value:
+            return value
+    raise _Unsupported
+
+def _date_ns(value):
+    """'YYYY-MM-DD' as int nanoseconds since epoch (cached, see date_parsing.py), None for null"""
+    if value is None:
+        return None
+    if type(value) is str:
+        ns = iso_date_ns(value)
+        if ns is not None and ns != NAT:
+            return ns
+    raise _Unsupported
+
+class _Unsupported(Exception):
+    pass
+
+class FeatureSchema:
+    """Model column layout plus a per-thread row buffer"""
+
+    def __init__(self, feature_names, category_classes=None,
+                 early_stage_funding=EARLY_STAGE_FUNDING, slow_milestone_velocity=SLOW_MILESTONE_VELOCITY,
+                 category_frequency=None):
+        self.names = tuple(str(name) for name in feature_names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.n_features = len(self.names)
+        self.dtype = FEATURE_DTYPE
+        # label → (code, frequency)
+        classes = [str(label) for label in (category_classes or ())]
+        frequency = ([DEFAULT_CATEGORY_FREQUENCY] * len(classes) if category_frequency is None
+                     else [float(value) for value in category_frequency])
+        self.categories = {label: (float(code), frequency[code]) for code, label in enumerate(classes)}
+        self.early_stage_funding = early_stage_funding
+        self.slow_milestone_velocity = slow_milestone_velocity
+
+        engineered = set(ENGINEERED_FEATURES)
+        # Payload fields copied as is; engineered columns are always recomputed
+        self.raw_fields = tuple((name, i) for name, i in self.index.items()
+                                if name not in engineered and name != 'category_code')
+        self.engineered_positions = tuple(self.index.get(name, -1) for name in ENGINEERED_FEATURES)
+        self.category_position = self.index.get('category_code')
+        self.frequency_position = self.index.get('category_frequency')
+        self._local = threading.local()
+
+    def buffer(self):
+        """This thread's (1, n_features) row, allocated on first use"""
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.zeros((1, self.n_features), dtype=self.dtype)
+        return row
+
+    def encode(self, payload):
+        """
+        Aligned feature row for one payload, written into this thread's
+        buffer (valid until the thread encodes its next payload), or None
+        when the payload needs the general preprocessing path.
+        """
+        if type(payload) is not dict:
+            return None
+        try:
+            return self._encode(payload)
+        except _Unsupported:
+            return None
+
+    def _encode(self, payload):
+        for field in REQUIRED_FIELDS:
+            if field not in payload:
+                raise _Unsupported  # the general path reports the missing field
+
+        row = {field: _number(payload[field]) if field in payload else OPTIONAL_DEFAULTS.get(field)
+               for field in KERNEL_FIELDS}
+        for field in DATE_COLUMNS:
+            row[field] = _date_ns(payload[field])
+
+        category = None
+        if 'category_code' in payload:
+            category = self.categories.get(str(payload['category_code']))
+            if category is None:
+                raise _Unsupported
+
+        out = self.buffer()[0]
+        out.fill(0.0)
+        for name, i in self.raw_fields:
+            if name in payload:
+                out[i] = row[name] if name in row else _number(payload[name])
+            elif name in OPTIONAL_DEFAULTS:
+                out[i] = OPTIONAL_DEFAULTS[name]
+
+        values = compute_feature_row(row, self.early_stage_funding, self.slow_milestone_velocity)
+        for i, value in zip(self.engineered_positions, values):
+            if i >= 0:
+                out[i] = value
+
+        if category is not None:
+            code, frequency = category
+            if self.category_position is not None:
+                out[self.category_position] = code
+            if self.frequency_position is not None:
+                out[self.frequency_position] = frequency
+        return out.reshape(1, -1)
+
+def build_schema(feature_names, category_encoder, probes, reference, tolerance=1e-6, stats=None):
+    """
+    FeatureSchema for the loaded model, checked against `reference(payload)`
+    (the pandas preprocessing, aligned) on each probe payload. `stats`, a
+    feature_stats.FeatureStats, supplies the training category frequencies
+    and risk cut-offs. Returns None if the model has no feature names or
+    any probe disagrees.
+    """
+    if feature_names is None:
+        return None
+    classes = list(category_encoder.classes_) if category_encoder is not None else []
+    if stats is not None:
+        schema = FeatureSchema(feature_names, classes, stats.early_stage_funding, stats.slow_milestone_velocity,
+                               stats.category_frequency)
+    else:
+        schema = FeatureSchema(feature_names, classes)
+    for payload in probes:
+        if classes and 'category_code' in payload:
+            payload = dict(payload, category_code=classes[0])
+        encoded = schema.encode(payload)
+        expected = np.asarray(reference(payload), dtype=np.float64).reshape(1, -1)
+        if encoded is None or not np.allclose(encoded, expected, rtol=tolerance, atol=0, equal_nan=True):
+            return None
+    return schema
+
+# Probe payloads for build_schema: a typical request plus the edge cases the
+# scalar kernel handles differently from NumPy (nulls, zero rounds, same-day
+# funding, absent optional fields and category)
+PROBE_PAYLOADS = [
+    {'funding_total_usd': 4_500_000, 'funding_rounds': 3, 'milestones': 2, 'relationships': 9,
+     'age_first_milestone_year': 1.5, 'age_last_milestone_year': 4.25, 'avg_participants': 2.5,
+     'is_top500': 1, 'founded_at': '2005-03-01', 'first_funding_at': '2006-07-15',
+     'last_funding_at': '2009-11-30', 'category_code': 'software', 'is_CA': 1, 'has_VC': 1,
+     'has_roundA': 1, 'has_roundB': 1, 'has_roundC': 0, 'has_roundD': 0,
+     'age_first_funding_year': 1.37, 'age_last_funding_year': 4.75},
+    {'funding_total_usd': 250_000, 'funding_rounds': 0, 'milestones': 0, 'relationships': 0,
+     'age_first_milestone_year': None, 'age_last_milestone_year': None,
+     'founded_at': '2010-01-01', 'first_funding_at': '2010-01-01', 'last_funding_at': '2010-01-01',
+     'has_roundD': True},
+    {'funding_total_usd': -1, 'funding_rounds': 1, 'milestones': 3, 'relationships': 2,
+     'age_first_milestone_year': 2.0, 'age_last_milestone_year': 2.0, 'avg_participants': None,
+     'founded_at': '2012-05-05', 'first_funding_at': None, 'last_funding_at': '2011-05-05',
+     'category_code': 'software'},
+]
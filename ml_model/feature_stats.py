@@ -0,0 +1,59 @@
+# ml_model/feature_stats.py
+
+"""
+Training statistics that serving-time features depend on.
+
+Three inputs of the model are derived from the training data rather than
+from the request: category_frequency (each category's share of the training
+rows), the early_stage_only and slow_milestone cut-offs (median funding and
+25th percentile of milestone velocity, see features.fit_risk_thresholds),
+and the imputer medians that fill missing values. Serving used to stand in
+a flat 0.05 frequency and fixed cut-offs, so a startup was scored on
+different features than it was trained on.
+
+FeatureStats keeps them as plain arrays. Category frequencies are indexed by
+LabelEncoder code, so a batch of any size is looked up with one take().
+train_model.py builds the index from the feature matrix and stores it in
+the model package under 'feature_stats'; app.py uses it if the medians
+match the imputer it loaded.
+"""
+
+import numpy as np
+
+from features import risk_thresholds
+
+class FeatureStats:
+    """Per-category frequencies, risk-flag cut-offs and imputer medians from one training run"""
+
+    def __init__(self, category_frequency, early_stage_funding, slow_milestone_velocity, feature_names, medians):
+        self.category_frequency = np.asarray(category_frequency, dtype=np.float64)
+        self.early_stage_funding = float(early_stage_funding)
+        self.slow_milestone_velocity = float(slow_milestone_velocity)
+        self.feature_names = tuple(str(name) for name in feature_names)
+        self.medians = np.asarray(medians, dtype=np.float64)
+
+    def frequencies(self, codes):
+        """category_frequency for an array of encoded categories"""
+        return self.category_frequency.take(np.asarray(codes, dtype=np.intp))
+
+    def matches(self, imputer):
+        """True if this index was built with `imputer` (same columns and medians)"""
+        names = getattr(imputer, 'feature_names_in_', None)
+        statistics = getattr(imputer, 'statistics_', None)
+        return (names is not None and statistics is not None
+                and tuple(str(name) for name in names) == self.feature_names
+                and np.array_equal(np.asarray(statistics, dtype=np.float64), self.medians, equal_nan=True))
+
+def fit_feature_stats(X, category_encoder, imputer):
+    """
+    FeatureStats for a training feature matrix (with its encoded
+    category_code and category_frequency columns) and the imputer fitted on
+    it. Categories the encoder knows but X lacks get NaN, which the imputer
+    fills like any missing frequency.
+    """
+    frequency = np.full(len(category_encoder.classes_), np.nan)
+    if 'category_code' in X.columns and 'category_frequency' in X.columns:
+        frequency[X['category_code'].to_numpy().astype(np.intp)] = X['category_frequency'].to_numpy()
+    early_stage_funding, slow_milestone_velocity = risk_thresholds(X['funding_total_usd'], X['milestone_velocity'])
+    return FeatureStats(frequency, early_stage_funding, slow_milestone_velocity, X.columns,
+                        imputer.statistics_)
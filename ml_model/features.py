@@ -0,0 +1,263 @@
+# ml_model/features.py
+
+"""
+NumPy feature engineering shared by train_model.py, optimize_threshold.py
+and app.py.
+
+compute_features() takes a mapping of raw column name → 1-D array (a
+DataFrame works) and returns a float64 matrix whose columns follow
+ENGINEERED_FEATURES. The same code path scores one request or a million
+rows; no intermediate pandas Series are created.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from date_parsing import parse_dates
+
+EPSILON = 0.01
+DAYS_PER_YEAR = 365.25
+NS_PER_DAY = 86_400 * 10**9
+
+DATE_COLUMNS = ['founded_at', 'first_funding_at', 'last_funding_at']
+ROUND_COLUMNS = ['has_roundA', 'has_roundB', 'has_roundC', 'has_roundD']
+
+# Serving defaults for the two data-dependent risk flags; training derives
+# them from the data (see fit_risk_thresholds)
+EARLY_STAGE_FUNDING = 1_000_000
+SLOW_MILESTONE_VELOCITY = 1.0
+
+# Engineered columns in the order training appends them to the raw data. The
+# intermediates years_active, milestone_years and years_since_founding are
+# used internally but never reach the model.
+ENGINEERED_FEATURES = [
+    'days_to_first_funding', 'days_funding_active', 'days_since_founding',
+    'funding_momentum', 'avg_funding_per_round', 'funding_concentration', 'funding_growth_rate',
+    'milestone_velocity', 'milestones_per_year_active', 'milestone_density',
+    'relationships_per_year', 'relationship_efficiency', 'network_strength',
+    'funding_x_relationships', 'rounds_x_participants', 'milestones_x_relationships', 'top500_x_funding',
+    'total_rounds_reached', 'reached_late_stage',
+    'early_stage_only', 'slow_milestone', 'low_participation',
+    'same_day_funding', 'quick_first_funding', 'long_founding_period',
+    'funding_squared', 'relationships_squared',
+]
+FEATURE_INDEX = {name: i for i, name in enumerate(ENGINEERED_FEATURES)}
+
+def as_float(values):
+    """1-D float64 view of a numeric column; anything else is coerced with NaN for bad values"""
+    array = np.asarray(values)
+    if array.dtype.kind in 'fiub':
+        return array.astype(np.float64, copy=False)
+    return pd.to_numeric(pd.Series(array), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+def as_datetime_ns(values):
+    """int64 nanoseconds since epoch with NaT for missing/unparseable dates (see date_parsing.py)"""
+    return parse_dates(values)
+
+def _day_delta(end_ns, start_ns):
+    """Whole days between two timestamps (floor, like Timedelta.days), NaN if either is NaT"""
+    nat = np.iinfo(np.int64).min
+    missing = (end_ns == nat) | (start_ns == nat)
+    days = np.floor_divide(end_ns - start_ns, NS_PER_DAY).astype(np.float64)
+    days[missing] = np.nan
+    return days
+
+def _base_quantities(columns):
+    founded = as_datetime_ns(columns['founded_at'])
+    first_funding = as_datetime_ns(columns['first_funding_at'])
+    last_funding = as_datetime_ns(columns['last_funding_at'])
+
+    days_to_first_funding = _day_delta(first_funding, founded)
+    days_funding_active = _day_delta(last_funding, first_funding)
+    days_since_founding = _day_delta(last_funding, founded)
+
+    milestones = as_float(columns['milestones'])
+    milestone_years = np.maximum(
+        as_float(columns['age_last_milestone_year']) - as_float(columns['age_first_milestone_year']), EPSILON)
+
+    return {
+        'days_to_first_funding': days_to_first_funding,
+        'days_funding_active': days_funding_active,
+        'days_since_founding': days_since_founding,
+        'years_active': np.maximum(days_funding_active / DAYS_PER_YEAR, EPSILON),
+        'years_since_founding': np.maximum(days_since_founding / DAYS_PER_YEAR, EPSILON),
+        'milestones': milestones,
+        'milestone_velocity': milestones / milestone_years,
+    }
+
+def fit_risk_thresholds(columns):
+    """
+    Data-derived cut-offs for early_stage_only and slow_milestone, computed
+    the way training always has: the median funding and the 25th percentile
+    of milestone velocity.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = _base_quantities(columns)['milestone_velocity']
+    return risk_thresholds(columns['funding_total_usd'], velocity)
+
+def risk_thresholds(funding, milestone_velocity):
+    """fit_risk_thresholds from the funding and milestone_velocity columns themselves"""
+    velocity = as_float(milestone_velocity)
+    return (float(np.nanmedian(as_float(funding))),
+            float(np.nanquantile(np.where(np.isinf(velocity), np.nan, velocity), 0.25)))
+
+def compute_features(columns, early_stage_funding=EARLY_STAGE_FUNDING,
+                     slow_milestone_velocity=SLOW_MILESTONE_VELOCITY):
+    """
+    Engineered feature matrix (n_rows × len(ENGINEERED_FEATURES), float64).
+
+    Required columns: the three DATE_COLUMNS, funding_total_usd,
+    funding_rounds, milestones, relationships, age_first_milestone_year,
+    age_last_milestone_year, avg_participants and is_top500. Round flags are
+    optional. Infinite results are returned as NaN.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        base = _base_quantities(columns)
+        n_rows = len(base['milestones'])
+
+        funding = as_float(columns['funding_total_usd'])
+        rounds = as_float(columns['funding_rounds'])
+        relationships = as_float(columns['relationships'])
+        participants = as_float(columns['avg_participants'])
+        top500 = as_float(columns['is_top500'])
+        milestones = base['milestones']
+        years_active = base['years_active']
+        days_to_first_funding = base['days_to_first_funding']
+        days_funding_active = base['days_funding_active']
+        days_since_founding = base['days_since_founding']
+
+        out = np.empty((n_rows, len(ENGINEERED_FEATURES)), dtype=np.float64)
+        out[:, 0] = days_to_first_funding
+        out[:, 1] = days_funding_active
+        out[:, 2] = days_since_founding
+
+        # Funding efficiency
+        out[:, 3] = funding / years_active
+        avg_funding_per_round = funding / np.where(rounds == 0, 1, rounds)
+        out[:, 4] = avg_funding_per_round
+        out[:, 5] = avg_funding_per_round / (funding + 1)
+        out[:, 6] = funding / base['years_since_founding']
+
+        # Milestones
+        out[:, 7] = base['milestone_velocity']
+        out[:, 8] = milestones / years_active
+        out[:, 9] = milestones / (days_since_founding + 1)
+
+        # Relationships & network
+        out[:, 10] = relationships / years_active
+        out[:, 11] = relationships / (rounds + 1)
+        out[:, 12] = relationships * participants
+
+        # Interactions
+        out[:, 13] = funding * relationships
+        out[:, 14] = rounds * participants
+        out[:, 15] = milestones * relationships
+        out[:, 16] = top500 * funding
+
+        # Round progression
+        present = [col for col in ROUND_COLUMNS if col in columns]
+        total_rounds = np.zeros(n_rows)
+        for col in present:
+            total_rounds += np.nan_to_num(as_float(columns[col]), nan=0.0)
+        out[:, 17] = total_rounds
+        late_stage = np.zeros(n_rows, dtype=bool)
+        for col in ('has_roundC', 'has_roundD'):
+            if col in columns:
+                late_stage |= as_float(columns[col]) == 1
+        out[:, 18] = late_stage
+
+        # Risk indicators
+        out[:, 19] = (rounds <= 2) & (funding < early_stage_funding)
+        out[:, 20] = base['milestone_velocity'] < slow_milestone_velocity
+        out[:, 21] = participants < 2
+
+        # Binary flags
+        out[:, 22] = days_funding_active == 0
+        out[:, 23] = days_to_first_funding < 30
+        out[:, 24] = days_to_first_funding > 365
+
+        # Polynomial terms
+        out[:, 25] = np.log1p(funding) ** 2
+        out[:, 26] = relationships ** 2
+
+    out[np.isinf(out)] = np.nan
+    return out
+
+NAN = float('nan')
+
+def _days(end_ns, start_ns):
+    return NAN if end_ns is None or start_ns is None else float((end_ns - start_ns) // NS_PER_DAY)
+
+def _floor(value, minimum):
+    # np.maximum semantics: NaN propagates
+    return value if value != value or value > minimum else minimum
+
+def _div(a, b):
+    # x/0 is ±inf or NaN in NumPy; both become NaN in the output
+    return a / b if b else NAN
+
+def _log1p(value):
+    return math.log1p(value) if value > -1 else (-math.inf if value == -1 else NAN)
+
+def compute_feature_row(row, early_stage_funding=EARLY_STAGE_FUNDING,
+                        slow_milestone_velocity=SLOW_MILESTONE_VELOCITY):
+    """
+    Scalar twin of compute_features for a single row, without NumPy
+    temporaries. `row` maps the same column names to Python floats, with
+    dates as int nanoseconds since epoch (None for NaT). Returns a tuple in
+    ENGINEERED_FEATURES order. app.py checks it against compute_features
+    when the model loads.
+    """
+    days_to_first_funding = _days(row['first_funding_at'], row['founded_at'])
+    days_funding_active = _days(row['last_funding_at'], row['first_funding_at'])
+    days_since_founding = _days(row['last_funding_at'], row['founded_at'])
+    years_active = _floor(days_funding_active / DAYS_PER_YEAR, EPSILON)
+    years_since_founding = _floor(days_since_founding / DAYS_PER_YEAR, EPSILON)
+
+    funding = row['funding_total_usd']
+    rounds = row['funding_rounds']
+    milestones = row['milestones']
+    relationships = row['relationships']
+    participants = row['avg_participants']
+    top500 = row['is_top500']
+    milestone_velocity = milestones / _floor(row['age_last_milestone_year'] - row['age_first_milestone_year'],
+                                             EPSILON)
+    avg_funding_per_round = funding / (1.0 if rounds == 0 else rounds)
+
+    total_rounds = 0.0
+    for col in ROUND_COLUMNS:
+        flag = row.get(col)
+        if flag is not None and flag == flag:
+            total_rounds += flag
+    log_funding = _log1p(funding)
+
+    values = (
+        days_to_first_funding, days_funding_active, days_since_founding,
+        funding / years_active, avg_funding_per_round, _div(avg_funding_per_round, funding + 1),
+        funding / years_since_founding,
+        milestone_velocity, milestones / years_active, _div(milestones, days_since_founding + 1),
+        relationships / years_active, _div(relationships, rounds + 1), relationships * participants,
+        funding * relationships, rounds * participants, milestones * relationships, top500 * funding,
+        total_rounds, float(row.get('has_roundC') == 1 or row.get('has_roundD') == 1),
+        float(rounds <= 2 and funding < early_stage_funding),
+        float(milestone_velocity < slow_milestone_velocity),
+        float(participants < 2),
+        float(days_funding_active == 0), float(days_to_first_funding < 30), float(days_to_first_funding > 365),
+        log_funding * log_funding, relationships * relationships,
+    )
+    return tuple(value if value - value == 0 else NAN for value in values)
+
+def add_engineered_features(df, early_stage_funding=None, slow_milestone_velocity=None):
+    """
+    Training-side helper: append ENGINEERED_FEATURES to a raw startup frame.
+    Thresholds left as None are fitted on `df` (see fit_risk_thresholds).
+    """
+    if early_stage_funding is None or slow_milestone_velocity is None:
+        fitted_funding, fitted_velocity = fit_risk_thresholds(df)
+        early_stage_funding = fitted_funding if early_stage_funding is None else early_stage_funding
+        slow_milestone_velocity = fitted_velocity if slow_milestone_velocity is None else slow_milestone_velocity
+    engineered = pd.DataFrame(compute_features(df, early_stage_funding, slow_milestone_velocity),
+                              columns=ENGINEERED_FEATURES, index=df.index)
+    return pd.concat([df.drop(columns=ENGINEERED_FEATURES, errors='ignore'), engineered], axis=1)
@@ -0,0 +1,226 @@
+# ml_model/hyperparameter_search.py
+
+"""
+Hyperparameter search for the base models (train_model.py --search).
+
+Each base model is tuned on its own with successive halving. n_trials
+configurations are drawn from SEARCH_SPACE, the first always being the
+hand-picked BASE_PARAMS. All of them are fitted with a small tree budget
+and scored by ROC-AUC on a held-out slice of the training split. The best
+1/eta survive to the next rung with eta times the trees, until the last
+rung trains the survivors with the full n_estimators. XGBoost and LightGBM
+stop early on the held-out slice, so a configuration that converges early
+records the tree count it needed.
+
+Every rung's fits for all three models run as independent single-threaded
+tasks in one pool of TRAINING_N_JOBS workers (all cores by default). Each
+finished trial is appended to trials.jsonl in the checkpoint directory,
+keyed by the data, the configuration and its budget. A search that is
+interrupted and started again reuses them and fits only what is missing.
+"""
+
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, cpu_count, delayed
+from lightgbm import LGBMClassifier, early_stopping
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from oof_stacking import data_fingerprint, single_threaded, training_n_jobs
+from rebalancing import class_weight_params, make_resampler
+from training_data import ArtifactCache, resample
+
+MODEL_CLASSES = {'xgb': XGBClassifier, 'lgbm': LGBMClassifier, 'rf': RandomForestClassifier}
+
+# Hand-picked hyperparameters of each base model (without n_estimators)
+BASE_PARAMS = {
+    'xgb': {'max_depth': 8, 'learning_rate': 0.05, 'subsample': 0.8, 'colsample_bytree': 0.8,
+            'min_child_weight': 3, 'gamma': 0.1, 'reg_alpha': 0.1, 'reg_lambda': 1,
+            'eval_metric': 'logloss', 'random_state': 42, 'use_label_encoder': False},
+    'lgbm': {'max_depth': 8, 'learning_rate': 0.05, 'subsample': 0.8, 'colsample_bytree': 0.8,
+             'min_child_weight': 3, 'reg_alpha': 0.1, 'reg_lambda': 1, 'random_state': 42, 'verbose': -1},
+    'rf': {'max_depth': 12, 'min_samples_split': 5, 'min_samples_leaf': 2, 'max_features': 'sqrt',
+           'random_state': 42, 'n_jobs': -1},
+}
+
+# Lists are sampled uniformly, (low, high) pairs uniformly and
+# (low, high, 'log') pairs log-uniformly
+SEARCH_SPACE = {
+    'xgb': {'max_depth': [3, 4, 5, 6, 8, 10], 'learning_rate': (0.01, 0.3, 'log'), 'subsample': (0.6, 1.0),
+            'colsample_bytree': (0.5, 1.0), 'min_child_weight': [1, 2, 3, 5, 8], 'gamma': (0.0, 1.0),
+            'reg_alpha': (0.001, 1.0, 'log'), 'reg_lambda': (0.1, 10.0, 'log')},
+    'lgbm': {'max_depth': [-1, 4, 6, 8, 10], 'num_leaves': [15, 31, 63, 127], 'learning_rate': (0.01, 0.3, 'log'),
+             'colsample_bytree': (0.5, 1.0), 'min_child_samples': [5, 10, 20, 40],
+             'reg_alpha': (0.001, 1.0, 'log'), 'reg_lambda': (0.1, 10.0, 'log')},
+    'rf': {'max_depth': [6, 8, 12, 16, None], 'min_samples_split': [2, 5, 10], 'min_samples_leaf': [1, 2, 4],
+           'max_features': ['sqrt', 'log2', 0.5]},
+}
+
+EARLY_STOPPING_ROUNDS = 50
+MIN_ESTIMATORS = 10
+VALIDATION_FRACTION = 0.2
+CHECKPOINT_FILE = 'trials.jsonl'
+
+def make_base_model(name, n_estimators, params=None, extra=None):
+    """Base model `name` with BASE_PARAMS updated by searched `params` and `extra` (e.g. class weights)"""
+    return MODEL_CLASSES[name](n_estimators=n_estimators, **{**BASE_PARAMS[name], **(params or {}), **(extra or {})})
+
+def sample_configs(name, n_trials, seed=42):
+    """n_trials parameter overrides for a model: {} (the hand-picked defaults) and then random draws"""
+    rng = np.random.default_rng([seed, list(MODEL_CLASSES).index(name)])
+    configs = [{}]
+    while len(configs) < n_trials:
+        config = {}
+        for param, space in SEARCH_SPACE[name].items():
+            if isinstance(space, list):
+                value = space[rng.integers(len(space))]
+                config[param] = value.item() if isinstance(value, np.generic) else value
+            elif len(space) == 3:
+                config[param] = float(f'{math.exp(rng.uniform(math.log(space[0]), math.log(space[1]))):.4g}')
+            else:
+                config[param] = float(f'{rng.uniform(space[0], space[1]):.4g}')
+        configs.append(config)
+    return configs
+
+def rung_budgets(n_estimators, n_trials, eta):
+    """Trees per rung, from about n_estimators / eta**rungs up to n_estimators"""
+    rungs = int(math.log(max(n_trials, 1)) / math.log(eta) + 1e-9)
+    return [max(MIN_ESTIMATORS, min(n_estimators, round(n_estimators / eta ** (rungs - i)))) for i in range(rungs + 1)]
+
+def evaluate_trial(name, params, budget, extra, X_fit, y_fit, X_val, y_val):
+    """Fit one configuration with `budget` trees; its held-out ROC-AUC, trees used and fit time"""
+    model = single_threaded(make_base_model(name, budget, params, extra))
+    start = time.perf_counter()
+    if name == 'xgb':
+        model.set_params(early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        trees = model.best_iteration + 1
+    elif name == 'lgbm':
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)],
+                  callbacks=[early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+        trees = model.best_iteration_ or budget
+    else:
+        model.fit(X_fit, y_fit)
+        trees = budget
+    # Boosters predict with their best iteration after early stopping
+    score = roc_auc_score(y_val, model.predict_proba(X_val)[:, 1])
+    return {'score': float(score), 'trees': int(trees), 'seconds': time.perf_counter() - start}
+
+class TrialCheckpoint:
+    """Finished trials in an append-only JSON-lines file, keyed by data, model, configuration and budget"""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, CHECKPOINT_FILE) if directory else None
+        self.trials = {}
+        if self.path and os.path.exists(self.path):
+            damaged = False
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        trial = json.loads(line)
+                    except ValueError:
+                        damaged = True  # last line cut off by an interrupted write
+                        continue
+                    self.trials[trial['key']] = trial
+            if damaged:
+                # Rewrite without it, so the next append starts on a new line
+                tmp_path = f'{self.path}.tmp'
+                with open(tmp_path, 'w') as f:
+                    f.writelines(json.dumps(trial) + '\n' for trial in self.trials.values())
+                os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def key(data_key, name, params, budget, extra):
+        signature = json.dumps([data_key, name, params, budget, extra, EARLY_STOPPING_ROUNDS], sort_keys=True)
+        return hashlib.sha256(signature.encode()).hexdigest()[:24]
+
+    def get(self, key):
+        return self.trials.get(key)
+
+    def put(self, trial):
+        self.trials[trial['key']] = trial
+        if self.path:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(trial) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+def search_hyperparameters(X_train, y_train, split_key, cache, rebalance, n_estimators=500, n_trials=27, eta=3,
+                           checkpoint_dir='hyperparameter_search', n_jobs=None, seed=42):
+    """
+    Successive-halving search over SEARCH_SPACE for each base model.
+
+    X_train/y_train is the training split before rebalancing: a stratified
+    VALIDATION_FRACTION of it is held out and the rest rebalanced with
+    `rebalance` for fitting. Returns {'xgb': {'params', 'n_estimators',
+    'validation_roc_auc'}, 'lgbm': ..., 'rf': ..., 'search': summary}.
+    """
+    n_jobs = training_n_jobs() if n_jobs is None else n_jobs
+    workers = cpu_count() if n_jobs < 0 else n_jobs
+    start = time.perf_counter()
+
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=VALIDATION_FRACTION,
+                                                  random_state=seed, stratify=y_train)
+    resampler = make_resampler(rebalance)
+    if resampler is not None:
+        X_fit, y_fit = resample(X_fit, y_fit, resampler, ArtifactCache.key(split_key, 'search', seed), cache)
+    extras = class_weight_params(rebalance, y_fit)
+    data_key = data_fingerprint(X_fit, y_fit) + data_fingerprint(X_val, y_val)
+
+    budgets = rung_budgets(n_estimators, n_trials, eta)
+    checkpoint = TrialCheckpoint(checkpoint_dir)
+    candidates = {name: list(enumerate(sample_configs(name, n_trials, seed))) for name in MODEL_CLASSES}
+    results = {name: {} for name in MODEL_CLASSES}
+    fitted = reused = 0
+    print(f"   → Successive halving: {n_trials} configurations per model, rungs of {budgets} trees, "
+          f"{workers} workers")
+
+    for rung, budget in enumerate(budgets):
+        pending = []
+        for name, configs in candidates.items():
+            for index, params in configs:
+                key = TrialCheckpoint.key(data_key, name, params, budget, extras[name])
+                trial = checkpoint.get(key)
+                if trial is None:
+                    pending.append((name, index, params, key))
+                else:
+                    results[name][index] = trial
+                    reused += 1
+
+        tasks = (delayed(evaluate_trial)(name, params, budget, extras[name], X_fit, y_fit, X_val, y_val)
+                 for name, _, params, _ in pending)
+        # Checkpoint each trial as soon as it finishes
+        for (name, index, params, key), outcome in zip(pending, Parallel(n_jobs=n_jobs, return_as='generator')(tasks)):
+            trial = dict(outcome, key=key, model=name, params=params, budget=budget)
+            checkpoint.put(trial)
+            results[name][index] = trial
+            fitted += 1
+
+        for name, configs in candidates.items():
+            ranked = sorted(configs, key=lambda config: -results[name][config[0]]['score'])
+            best = results[name][ranked[0][0]]
+            print(f"   ✓ Rung {rung + 1}/{len(budgets)} ({budget} trees) {name}: best ROC-AUC {best['score']:.4f} "
+                  f"of {len(configs)}")
+            if rung < len(budgets) - 1:
+                candidates[name] = ranked[:max(1, math.ceil(len(configs) / eta))]
+            else:
+                candidates[name] = ranked[:1]
+
+    best_configs = {}
+    for name, [(index, params)] in candidates.items():
+        trial = results[name][index]
+        best_configs[name] = {'params': params, 'n_estimators': trial['trees'],
+                              'validation_roc_auc': trial['score']}
+    best_configs['search'] = {'method': 'successive_halving', 'n_trials': n_trials, 'eta': eta,
+                              'budgets': budgets, 'early_stopping_rounds': EARLY_STOPPING_ROUNDS,
+                              'trials_fitted': fitted, 'trials_reused': reused,
+                              'seconds': time.perf_counter() - start}
+    return best_configs
@@ -0,0 +1,246 @@
+# ml_model/incremental_training.py
+
+"""
+Incremental retraining on rows appended to 'startup data.csv'
+(train_model.py --incremental).
+
+A full build records in the model package which file it was trained on
+(size and sha256), how many labelled rows it had and which of them it held
+out for testing. update_model() checks that the CSV has only grown since,
+encodes every row with the saved encoder, imputer, scaler and feature
+statistics (training_data.transform_dataset), and then:
+
+- splits the appended rows 80/20 like the full build; the test set is the
+  previous test rows plus the new ones,
+- continues each base model on the previous training rows (rebalanced as
+  before) plus the new ones: XGBoost and LightGBM boost extra_trees more
+  rounds from the saved boosters, the random forest grows extra_trees
+  more trees with warm_start,
+- refits the meta-learner on out-of-fold predictions for the appended
+  training rows (each fold's base models are continued without that fold;
+  the saved trees never saw these rows), and keeps the previous one when
+  there are too few appended rows,
+- picks the F1-optimal threshold on the test set, as the full build does.
+
+The preprocessing stays as it was, so a new category gets the imputed
+code and frequency until the next full rebuild. benchmark_suite.py --cases
+incremental compares time and metrics against a full retrain.
+"""
+
+import copy
+import hashlib
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from lightgbm import LGBMClassifier
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score, roc_curve
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.utils import Bunch
+from xgboost import XGBClassifier
+
+from distillation import STUDENT_MODEL_FILE
+from fast_inference import dump_artifact
+from model_manifest import MODEL_FILES, write_manifest
+from oof_stacking import training_n_jobs
+from rebalancing import make_resampler, rebalance_strategy
+from threshold_analysis import best_threshold, package_threshold
+from training_data import ArtifactCache, default_cache, file_digest, resample, transform_dataset
+
+MODEL_FILE = 'startup_success_model_advanced.pkl'
+META_FOLDS = 5
+# Appended training rows needed to refit the meta-learner
+MIN_META_ROWS = 50
+TEST_SIZE = 0.2
+
+def training_data_record(csv_path, rows, test_rows, rebalance):
+    """What update_model() needs to know about the data a model was trained on"""
+    return {'csv_bytes': os.path.getsize(csv_path), 'csv_sha256': file_digest(csv_path), 'rows': int(rows),
+            'test_rows': np.sort(np.asarray(test_rows, dtype=np.int64)), 'rebalance': rebalance}
+
+def only_appended(csv_path, record):
+    """True if csv_path starts with exactly the bytes the model was trained on"""
+    remaining = record['csv_bytes']
+    if os.path.getsize(csv_path) < remaining:
+        return False
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        while remaining:
+            block = f.read(min(remaining, 1 << 20))
+            if not block:
+                return False
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest() == record['csv_sha256']
+
+def add_trees(estimator, extra_trees, X, y):
+    """Copy of a fitted base model with extra_trees more trees (boosting rounds) fitted on (X, y)"""
+    n_jobs = estimator.get_params(deep=False).get('n_jobs')
+    if isinstance(estimator, RandomForestClassifier):
+        model = copy.deepcopy(estimator).set_params(
+            warm_start=True, n_estimators=len(estimator.estimators_) + extra_trees, n_jobs=1)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+    elif isinstance(estimator, XGBClassifier):
+        model = clone(estimator).set_params(n_estimators=extra_trees, n_jobs=1)
+        model.fit(X, y, xgb_model=estimator.get_booster(), verbose=False)
+        model.set_params(n_estimators=model.get_booster().num_boosted_rounds())
+    elif isinstance(estimator, LGBMClassifier):
+        model = clone(estimator).set_params(n_estimators=extra_trees, n_jobs=1)
+        model.fit(X, y, init_model=estimator.booster_)
+        model.set_params(n_estimators=model.booster_.current_iteration())
+    else:
+        raise TypeError(f'Cannot add trees to {type(estimator).__name__}')
+    return model.set_params(n_jobs=n_jobs)
+
+def _fold_predictions(estimator, extra_trees, X, y, train_idx, test_idx):
+    return add_trees(estimator, extra_trees, X.iloc[train_idx], y.iloc[train_idx]).predict_proba(X.iloc[test_idx])[:, 1]
+
+def test_metrics(y_true, proba, threshold):
+    y_pred = (proba >= threshold).astype(int)
+    return {'accuracy': accuracy_score(y_true, y_pred), 'precision': precision_score(y_true, y_pred),
+            'recall': recall_score(y_true, y_pred), 'f1': f1_score(y_true, y_pred),
+            'roc_auc': roc_auc_score(y_true, proba), 'threshold': float(threshold)}
+
+def update_model(data_path='startup data.csv', output_dir='.', extra_trees=50, rebalance=None, cache=None,
+                 n_jobs=None):
+    """
+    Continue the model in output_dir on the rows appended to data_path and
+    save it in place. Returns the test-set metrics, {'appended_rows': 0} if
+    there is nothing new, or None when the model needs a full rebuild.
+    """
+    start = time.perf_counter()
+    output = lambda name: os.path.join(output_dir, name)
+    cache = cache or default_cache()
+    n_jobs = training_n_jobs() if n_jobs is None else n_jobs
+
+    print("\n[1/5] Checking for appended rows...")
+    try:
+        package = joblib.load(output(MODEL_FILE))
+        category_encoder = joblib.load(output('category_encoder.pkl'))
+        imputer = joblib.load(output('imputer.pkl'))
+        scaler = joblib.load(output('scaler.pkl'))
+    except FileNotFoundError as e:
+        print(f"   ✗ No model to update ({e.filename} not found)")
+        return None
+    record = package.get('training_data')
+    feature_stats = package.get('feature_stats')
+    if record is None or feature_stats is None:
+        print("   ✗ The saved model does not record its training data (trained before incremental support)")
+        return None
+    if not only_appended(data_path, record):
+        print(f"   ✗ '{data_path}' was changed, not only appended to, since the model was trained")
+        return None
+    rebalance = rebalance or record.get('rebalance') or rebalance_strategy()
+
+    X, y = transform_dataset(pd.read_csv(data_path), category_encoder, feature_stats)
+    X, y = X.reset_index(drop=True), y.reset_index(drop=True)
+    n_old = record['rows']
+    new_rows = np.arange(n_old, len(y))
+    print(f"   ✓ {n_old} rows in the current model, {len(new_rows)} appended")
+    if not len(new_rows):
+        return {'appended_rows': 0}
+
+    print("\n[2/5] Preprocessing with the saved encoder, imputer and scaler...")
+    columns = X.columns
+    X_scaled = pd.DataFrame(scaler.transform(pd.DataFrame(imputer.transform(X), columns=columns)), columns=columns)
+
+    y_new = y.iloc[new_rows]
+    if len(new_rows) >= 10 and y_new.nunique() == 2 and y_new.value_counts().min() >= 2:
+        new_train, new_test = train_test_split(new_rows, test_size=TEST_SIZE, random_state=42, stratify=y_new)
+    else:
+        new_train, new_test = new_rows, new_rows[:0]
+    old_test = record['test_rows']
+    old_train = np.setdiff1d(np.arange(n_old), old_test)
+    test_rows = np.sort(np.concatenate([old_test, new_test]))
+
+    # Previous training rows rebalanced as in the full build, then the new
+    # training rows as they are
+    resampler = make_resampler(rebalance)
+    X_old, y_old = X_scaled.iloc[old_train], y.iloc[old_train]
+    if resampler is not None:
+        X_old, y_old = resample(X_old, y_old, resampler,
+                                ArtifactCache.key('incremental', record['csv_sha256'], rebalance), cache)
+    X_pool = pd.concat([pd.DataFrame(np.asarray(X_old), columns=columns), X_scaled.iloc[new_train]],
+                       ignore_index=True)
+    y_pool = pd.concat([pd.Series(np.asarray(y_old)), y.iloc[new_train]], ignore_index=True)
+    appended = np.arange(len(y_pool) - len(new_train), len(y_pool))
+    print(f"   ✓ Train: {len(y_pool)} ({len(new_train)} new), Test: {len(test_rows)} ({len(new_test)} new)")
+
+    model = package['model']
+    y_appended = y_pool.iloc[appended]
+    refit_meta = (len(appended) >= MIN_META_ROWS and y_appended.nunique() == 2
+                  and y_appended.value_counts().min() >= META_FOLDS)
+    folds = []
+    if refit_meta:
+        splitter = StratifiedKFold(n_splits=META_FOLDS, shuffle=True, random_state=42)
+        # (pool rows to continue on, held-out positions within the appended rows)
+        folds = [(np.setdiff1d(np.arange(len(y_pool)), appended[held_out]), held_out)
+                 for _, held_out in splitter.split(appended, y_appended)]
+
+    print(f"\n[3/5] Adding {extra_trees} trees to each base model "
+          f"({len(model.estimators_) * (1 + len(folds))} tasks, n_jobs={n_jobs})...")
+    tasks = [delayed(add_trees)(estimator, extra_trees, X_pool, y_pool) for estimator in model.estimators_]
+    for estimator in model.estimators_:
+        tasks.extend(delayed(_fold_predictions)(estimator, extra_trees, X_pool, y_pool, train_idx, appended[held_out])
+                     for train_idx, held_out in folds)
+    outputs = Parallel(n_jobs=n_jobs)(tasks)
+    estimators = outputs[:len(model.estimators_)]
+
+    print("\n[4/5] Refitting the meta-learner and threshold...")
+    updated = copy.deepcopy(model)
+    updated.estimators = [(name, clone(estimator)) for (name, _), estimator in zip(model.estimators, estimators)]
+    updated.estimators_ = estimators
+    updated.named_estimators_ = Bunch(**{name: estimator for (name, _), estimator in zip(model.estimators, estimators)})
+    if refit_meta:
+        oof = np.empty((len(appended), len(estimators)))
+        fold_outputs = iter(outputs[len(estimators):])
+        for j in range(len(estimators)):
+            for _, held_out in folds:
+                oof[held_out, j] = next(fold_outputs)
+        updated.final_estimator_ = clone(model.final_estimator).fit(oof, y_appended.to_numpy())
+        print(f"   ✓ Meta-learner refit on {len(appended)} appended rows (out-of-fold)")
+    else:
+        print(f"   ✓ Kept the previous meta-learner (needs {MIN_META_ROWS} appended training rows, "
+              f"{META_FOLDS} of each class)")
+
+    X_test, y_test = X_scaled.iloc[test_rows], y.iloc[test_rows]
+    previous_proba = model.predict_proba(X_test)[:, 1]
+    y_pred_proba = updated.predict_proba(X_test)[:, 1]
+    _, _, thresholds = roc_curve(y_test, y_pred_proba)
+    optimal_threshold, _ = best_threshold(y_test, y_pred_proba, thresholds, objective='f1')
+    previous = test_metrics(y_test, previous_proba, package_threshold(package))
+    metrics = test_metrics(y_test, y_pred_proba, optimal_threshold)
+
+    print(f"\n{'':<12} {'Previous':>9} {'Updated':>9}")
+    for name in ('accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'threshold'):
+        print(f"{name:<12} {previous[name]:>9.4f} {metrics[name]:>9.4f}")
+
+    print("\n[5/5] Saving...")
+    seconds = time.perf_counter() - start
+    summary = {'appended_rows': int(len(new_rows)), 'extra_trees': extra_trees, 'meta_refit': bool(refit_meta),
+               'seconds': seconds, 'previous': previous}
+    model_package = dict(package, model=updated, optimal_threshold=optimal_threshold,
+                         training_data=training_data_record(data_path, len(y), test_rows, rebalance),
+                         incremental=summary)
+    model_package.pop('threshold', None)  # key of packages written before 'optimal_threshold'
+    if 'hyperparameters' in package:
+        model_package['hyperparameters'] = {
+            name: dict(package['hyperparameters'][name], n_estimators=estimator.get_params()['n_estimators'])
+            for (name, _), estimator in zip(model.estimators, estimators)}
+    dump_artifact(model_package, output(MODEL_FILE))
+    if os.path.exists(output(STUDENT_MODEL_FILE)):
+        # Distilled from the previous ensemble
+        os.remove(output(STUDENT_MODEL_FILE))
+        print(f"✓ Removed stale {STUDENT_MODEL_FILE}")
+    # The encoder, imputer and scaler are unchanged; the new manifest pairs
+    # them with the updated model (see model_manifest.py)
+    write_manifest(output_dir, MODEL_FILES)
+    print(f"✓ Updated model saved: {MODEL_FILE} ({seconds:.1f}s)")
+
+    return dict(metrics, rebalance=rebalance, train_rows=len(y_pool), **summary)
@@ -0,0 +1,126 @@
+# ml_model/metrics.py
+
+"""
+Minimal Prometheus instrumentation (counters and histograms) rendered in
+the text exposition format for the /metrics endpoint.
+
+Only what the prediction service needs, without adding prometheus_client
+as a dependency. Recording is a lock, a bisect and two additions. Metrics
+are per process: with serve.py --workers N each worker reports its own
+series, so scrape the workers individually or aggregate by instance.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, from sub-millisecond array ops up to large batch requests
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536)
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values → [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(series[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,109 @@
+# ml_model/micro_batcher.py
+
+"""
+Micro-batching for single-row predictions.
+
+Request threads hand their aligned feature row to a MicroBatcher and block
+on a Future. One scoring thread takes the first queued row, waits up to
+max_wait_ms for more (or until max_batch_size rows are queued), scores
+them all in one vectorized call and hands each request its own result.
+Each row carries a context (app.py: the model assets its request started
+with); rows with different contexts are never scored in the same call.
+Tree ensembles cost little more for 32 rows than for one, so under
+concurrent load this trades a few milliseconds of queueing for much higher
+throughput.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+class MicroBatcher:
+    """Coalesces concurrent predict() calls into batched calls of predict_fn(matrix, context) → probabilities"""
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.rows = 0
+
+    @property
+    def enabled(self):
+        return self.max_batch_size > 1
+
+    def submit(self, row, context=None):
+        """Queue one aligned feature row; the Future resolves to its probability"""
+        self._ensure_running()
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64).ravel(), context, future))
+        return future
+
+    def predict(self, row, context=None, timeout=None):
+        return self.submit(row, context).result(timeout)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0
+        }
+
+    def _ensure_running(self):
+        # Threads do not survive fork(): serve.py workers start their own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self.batches += 1
+            self.rows += len(batch)
+            groups = {}
+            for row, context, future in batch:
+                groups.setdefault(id(context), (context, []))[1].append((row, future))
+            for context, group in groups.values():
+                self._score(group, context)
+
+    def _score(self, group, context):
+        try:
+            probabilities = self.predict_fn(np.vstack([row for row, _ in group]), context)
+            for (_, future), probability in zip(group, probabilities):
+                future.set_result(float(probability))
+        except Exception:
+            # Score row by row so one bad row only fails its own request
+            for row, future in group:
+                if future.done():
+                    continue
+                try:
+                    future.set_result(float(self.predict_fn(row[None, :], context)[0]))
+                except Exception as e:
+                    future.set_exception(e)
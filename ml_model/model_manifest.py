@@ -0,0 +1,84 @@
+# ml_model/model_manifest.py
+
+"""
+Manifest of one trained model's artifact files.
+
+The model package and the preprocessors it was fitted with are separate
+files, and each is replaced on its own (fast_inference.dump_artifact). A
+server reloading between two of those writes would pair the new model with
+the old encoder, imputer or scaler. So every writer (train_model.py,
+incremental training, optimize_threshold.py, synthetic_data.py) records the
+sha256 of each file of the set in model_manifest.json, written last and
+renamed into place. app.py's watcher polls only the manifest, and a load
+refuses files whose contents do not match it. The manifest also records
+each file's size and mtime: a cold start compares only those (hashing a
+file only when they differ), so it stays as cheap as the stat fingerprint.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from training_data import file_digest
+
+MANIFEST_FILE = 'model_manifest.json'
+
+# The set a full training run writes; the student model is listed as well
+# when one was distilled from this ensemble
+MODEL_FILES = ('startup_success_model_advanced.pkl', 'category_encoder.pkl', 'imputer.pkl', 'scaler.pkl')
+
+class ManifestMismatch(ValueError):
+    """The model files on disk are not the set the manifest describes"""
+
+def read_manifest(directory):
+    """The manifest in directory, or None for model files written without one"""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _file_entry(path):
+    stat = os.stat(path)
+    return {'sha256': file_digest(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def write_manifest(directory, names=None):
+    """
+    Record the digests and stats of `names` in directory; call after the
+    last of them is written. names defaults to the files the current manifest lists (or
+    MODEL_FILES), for writers that replace one file of the set.
+    """
+    if names is None:
+        manifest = read_manifest(directory)
+        names = list(manifest['files']) if manifest else MODEL_FILES
+    manifest = {
+        'files': {name: _file_entry(os.path.join(directory, name)) for name in names},
+        'written_at': datetime.now().isoformat(),
+    }
+    path = os.path.join(directory, MANIFEST_FILE)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return manifest
+
+def verify_manifest(directory, manifest, digests=True):
+    """
+    Raise ManifestMismatch unless every listed file is present with its
+    recorded digest. digests=False accepts a file whose size and mtime are
+    still the recorded ones without reading it.
+    """
+    for name, entry in manifest['files'].items():
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise ManifestMismatch(f'{name} is listed in {MANIFEST_FILE} but missing') from None
+        if not digests and (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            continue
+        if file_digest(path) != entry['sha256']:
+            raise ManifestMismatch(f'{name} does not match {MANIFEST_FILE} (written by another training run?)')
@@ -0,0 +1,183 @@
+# ml_model/oof_stacking.py
+
+"""
+Stacking from cached out-of-fold predictions.
+
+StackingClassifier.fit followed by cross_val_score retrains every base
+model roughly 25 times, with n_jobs=-1 pools nested inside n_jobs=-1
+workers. fit_stacking() instead fits each base model once per fold and once
+on the full data as independent tasks in a single process pool (the models
+themselves run single-threaded), caches each model's out-of-fold
+predictions on disk, and fits the meta-learner on them. The result is a
+regular fitted StackingClassifier, equivalent to StackingClassifier.fit with
+the same cv. cross_validate_stack() reuses the same out-of-fold predictions
+for the CV metrics.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import StackingClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import LabelEncoder
+from sklearn.utils import Bunch
+
+from training_data import training_cache_dir
+
+# Parameters that only control threading/logging and never change predictions
+RUNTIME_PARAMS = ('n_jobs', 'nthread', 'verbose', 'verbosity')
+
+def training_n_jobs():
+    """Worker processes for training tasks (TRAINING_N_JOBS, default all cores)"""
+    return int(os.environ.get('TRAINING_N_JOBS', -1))
+
+def data_fingerprint(X, y):
+    """Hash of a training matrix (values and column names) and its labels"""
+    digest = hashlib.sha256()
+    digest.update(repr(list(getattr(X, 'columns', []))).encode())
+    digest.update(np.ascontiguousarray(np.asarray(X, dtype=np.float64)).tobytes())
+    digest.update(np.ascontiguousarray(np.asarray(y, dtype=np.int64)).tobytes())
+    return digest.hexdigest()[:16]
+
+def estimator_fingerprint(estimator):
+    """Hash of an estimator's class and the hyperparameters that affect its predictions"""
+    params = {key: value for key, value in estimator.get_params(deep=False).items() if key not in RUNTIME_PARAMS}
+    signature = f'{type(estimator).__module__}.{type(estimator).__name__}:{sorted(params.items())!r}'
+    return hashlib.sha256(signature.encode()).hexdigest()[:16]
+
+class OOFCache:
+    """Out-of-fold prediction vectors stored as .npy files, keyed by data, model and CV split"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def key(self, data_key, estimator, cv):
+        digest = hashlib.sha256(f'{data_key}:{estimator_fingerprint(estimator)}:{cv!r}'.encode())
+        return digest.hexdigest()[:24]
+
+    def path(self, key):
+        return os.path.join(self.directory, f'oof_{key}.npy')
+
+    def get(self, key):
+        if not self.directory:
+            return None
+        try:
+            return np.load(self.path(key))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, predictions):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{self.path(key)}.tmp.npy'
+        np.save(tmp_path, predictions)
+        os.replace(tmp_path, self.path(key))
+
+def single_threaded(estimator):
+    """Clone of an estimator that uses one thread, so parallelism stays at the task level"""
+    estimator = clone(estimator)
+    if 'n_jobs' in estimator.get_params(deep=False):
+        estimator.set_params(n_jobs=1)
+    return estimator
+
+def _rows(data, indices):
+    return data.iloc[indices] if hasattr(data, 'iloc') else data[indices]
+
+def _fit_fold(estimator, X, y, train_idx, test_idx):
+    fitted = single_threaded(estimator).fit(_rows(X, train_idx), _rows(y, train_idx))
+    return fitted.predict_proba(_rows(X, test_idx))[:, 1]
+
+def _fit_full(estimator, X, y):
+    fitted = single_threaded(estimator).fit(X, y)
+    # Restore the configured threading for whoever uses the saved model
+    n_jobs = estimator.get_params(deep=False).get('n_jobs')
+    if n_jobs is not None:
+        fitted.set_params(n_jobs=n_jobs)
+    return fitted
+
+def fit_stacking(estimators, final_estimator, X, y, cv=5, n_jobs=None, cache_dir=None, verbose=True):
+    """
+    Fit a binary StackingClassifier from out-of-fold base model predictions.
+
+    Returns (stacking_model, oof_predictions, folds), where oof_predictions
+    is the (n_samples, n_estimators) matrix the meta-learner was trained on
+    and folds the (train, test) index pairs used to build it.
+    """
+    n_jobs = training_n_jobs() if n_jobs is None else n_jobs
+    cache = OOFCache(training_cache_dir() if cache_dir is None else cache_dir)
+    if isinstance(cv, int):
+        cv = StratifiedKFold(n_splits=cv)  # what StackingClassifier uses for an int cv
+
+    label_encoder = LabelEncoder().fit(y)
+    if len(label_encoder.classes_) != 2:
+        raise ValueError('fit_stacking supports binary targets only')
+    y_encoded = label_encoder.transform(y)
+
+    folds = list(cv.split(X, y_encoded))
+    data_key = data_fingerprint(X, y_encoded)
+    keys = [cache.key(data_key, estimator, cv) for _, estimator in estimators]
+    oof = [cache.get(key) for key in keys]
+    missing = [i for i, predictions in enumerate(oof) if predictions is None or len(predictions) != len(y_encoded)]
+
+    if verbose:
+        cached = [name for i, (name, _) in enumerate(estimators) if i not in missing]
+        if cached:
+            print(f"   ✓ Reusing cached out-of-fold predictions: {', '.join(cached)}")
+        print(f"   → Fitting {len(missing) * len(folds) + len(estimators)} base model tasks "
+              f"(n_jobs={n_jobs})...")
+
+    # One flat pool: every (model, fold) fit plus the full-data fits
+    tasks = [delayed(_fit_full)(estimator, X, y_encoded) for _, estimator in estimators]
+    for i in missing:
+        tasks.extend(delayed(_fit_fold)(estimators[i][1], X, y_encoded, train_idx, test_idx)
+                     for train_idx, test_idx in folds)
+    outputs = Parallel(n_jobs=n_jobs)(tasks)
+
+    fitted = outputs[:len(estimators)]
+    fold_outputs = iter(outputs[len(estimators):])
+    for i in missing:
+        predictions = np.empty(len(y_encoded), dtype=np.float64)
+        for _, test_idx in folds:
+            predictions[test_idx] = next(fold_outputs)
+        oof[i] = predictions
+        cache.put(keys[i], predictions)
+
+    oof_predictions = np.column_stack(oof)
+    stacking_model = StackingClassifier(estimators=estimators, final_estimator=final_estimator, cv=cv)
+    _set_fitted_state(stacking_model, fitted, label_encoder, oof_predictions, y_encoded)
+    return stacking_model, oof_predictions, folds
+
+def _set_fitted_state(stacking_model, fitted, label_encoder, oof_predictions, y_encoded):
+    """Populate the attributes StackingClassifier.fit would set"""
+    stacking_model._label_encoder = label_encoder
+    stacking_model.classes_ = label_encoder.classes_
+    stacking_model.estimators_ = fitted
+    stacking_model.named_estimators_ = Bunch(**{name: estimator for (name, _), estimator
+                                                in zip(stacking_model.estimators, fitted)})
+    for estimator in fitted:
+        if hasattr(estimator, 'feature_names_in_'):
+            stacking_model.feature_names_in_ = estimator.feature_names_in_
+    stacking_model.stack_method_ = ['predict_proba'] * len(fitted)
+    stacking_model.final_estimator_ = clone(stacking_model.final_estimator).fit(oof_predictions, y_encoded)
+
+def cross_validate_stack(oof_predictions, y, final_estimator, folds):
+    """
+    Per-fold ROC-AUC of the stacked model, from the cached out-of-fold base
+    predictions: the meta-learner is refit on each training fold and scored
+    on the held-out fold, so no base model is retrained
+    """
+    y = np.asarray(y)
+    scores = []
+    for train_idx, test_idx in folds:
+        meta = clone(final_estimator).fit(oof_predictions[train_idx], y[train_idx])
+        scores.append(roc_auc_score(y[test_idx], meta.predict_proba(oof_predictions[test_idx])[:, 1]))
+    return np.array(scores)
+
+def base_model_scores(oof_predictions, y, names):
+    """Out-of-fold ROC-AUC of each base model"""
+    return {name: roc_auc_score(y, oof_predictions[:, i]) for i, name in enumerate(names)}
@@ -4,93 +4,19 @@ import pandas as pd
 import numpy as np
 import joblib
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.impute import SimpleImputer
-from sklearn.metrics import (precision_score, recall_score, f1_score, 
-                             accuracy_score, confusion_matrix, roc_auc_score)
+from training_data import load_feature_matrix
+from threshold_analysis import threshold_table
+from fast_inference import dump_artifact
+from model_manifest import write_manifest
 
 def load_and_prepare_data():
-    """Load and prepare data the same way as training"""
+    """Load and prepare data the same way as training (feature matrix shared via the training cache)"""
     try:
-        df = pd.read_csv('startup data.csv')
+        X, y, _, _ = load_feature_matrix('startup data.csv')
     except FileNotFoundError:
         print("ERROR: 'startup data.csv' not found.")
         return None, None
     
-    # Same preprocessing as training
-    drop_cols = ['Unnamed: 0', 'state_code', 'latitude', 'longitude', 
-                 'zip_code', 'id', 'city', 'Unnamed: 6', 'name', 
-                 'labels', 'object_id']
-    df.drop(columns=drop_cols, inplace=True, errors='ignore')
-    
-    date_cols = ['founded_at', 'closed_at', 'first_funding_at', 'last_funding_at']
-    for col in date_cols:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
-    
-    df = df[df['status'].isin(['acquired', 'closed'])].copy()
-    df['success'] = (df['status'] == 'acquired').astype(int)
-    
-    # Feature engineering (same as training)
-    epsilon = 0.01
-    df['days_to_first_funding'] = (df['first_funding_at'] - df['founded_at']).dt.days
-    df['days_funding_active'] = (df['last_funding_at'] - df['first_funding_at']).dt.days
-    df['days_since_founding'] = (df['last_funding_at'] - df['founded_at']).dt.days
-    df['years_active'] = (df['days_funding_active'] / 365.25).clip(lower=epsilon)
-    df['years_since_founding'] = (df['days_since_founding'] / 365.25).clip(lower=epsilon)
-    
-    df['funding_momentum'] = df['funding_total_usd'] / df['years_active']
-    df['avg_funding_per_round'] = df['funding_total_usd'] / df['funding_rounds'].replace(0, 1)
-    df['funding_concentration'] = df['avg_funding_per_round'] / (df['funding_total_usd'] + 1)
-    df['funding_growth_rate'] = df['funding_total_usd'] / df['years_since_founding']
-    
-    df['milestone_years'] = (df['age_last_milestone_year'] - df['age_first_milestone_year']).clip(lower=epsilon)
-    df['milestone_velocity'] = df['milestones'] / df['milestone_years']
-    df['milestones_per_year_active'] = df['milestones'] / df['years_active']
-    df['milestone_density'] = df['milestones'] / (df['days_since_founding'] + 1)
-    
-    df['relationships_per_year'] = df['relationships'] / df['years_active']
-    df['relationship_efficiency'] = df['relationships'] / (df['funding_rounds'] + 1)
-    df['network_strength'] = df['relationships'] * df['avg_participants']
-    
-    df['funding_x_relationships'] = df['funding_total_usd'] * df['relationships']
-    df['rounds_x_participants'] = df['funding_rounds'] * df['avg_participants']
-    df['milestones_x_relationships'] = df['milestones'] * df['relationships']
-    df['top500_x_funding'] = df['is_top500'] * df['funding_total_usd']
-    
-    round_cols = [col for col in df.columns if col.startswith('has_round')]
-    if round_cols:
-        df['total_rounds_reached'] = df[round_cols].sum(axis=1)
-        df['reached_late_stage'] = ((df.get('has_roundC', 0) == 1) | 
-                                     (df.get('has_roundD', 0) == 1)).astype(int)
-    
-    df['early_stage_only'] = ((df['funding_rounds'] <= 2) & 
-                               (df['funding_total_usd'] < df['funding_total_usd'].median())).astype(int)
-    df['slow_milestone'] = (df['milestone_velocity'] < df['milestone_velocity'].quantile(0.25)).astype(int)
-    df['low_participation'] = (df['avg_participants'] < 2).astype(int)
-    
-    df['same_day_funding'] = (df['days_funding_active'] == 0).astype(int)
-    df['quick_first_funding'] = (df['days_to_first_funding'] < 30).astype(int)
-    df['long_founding_period'] = (df['days_to_first_funding'] > 365).astype(int)
-    
-    df['funding_squared'] = np.log1p(df['funding_total_usd']) ** 2
-    df['relationships_squared'] = df['relationships'] ** 2
-    
-    category_freq = df['category_code'].value_counts(normalize=True).to_dict()
-    df['category_frequency'] = df['category_code'].map(category_freq)
-    
-    le = LabelEncoder()
-    df['category_code'] = le.fit_transform(df['category_code'].astype(str))
-    
-    df.drop(columns=['status', 'founded_at', 'closed_at', 'first_funding_at', 
-                     'last_funding_at', 'years_active', 'milestone_years', 
-                     'years_since_founding'], inplace=True)
-    
-    df = df.select_dtypes(include=np.number)
-    df.replace([np.inf, -np.inf], np.nan, inplace=True)
-    
-    X = df.drop('success', axis=1)
-    y = df['success']
-    
     # Load saved preprocessing objects
     imputer = joblib.load('imputer.pkl')
     scaler = joblib.load('scaler.pkl')
@@ -137,32 +63,7 @@ def analyze_thresholds():
     y_pred_proba = model.predict_proba(X_test)[:, 1]
     
     thresholds = np.arange(0.10, 0.71, 0.05)
-    results = []
-    
-    for threshold in thresholds:
-        y_pred = (y_pred_proba >= threshold).astype(int)
-        
-        cm = confusion_matrix(y_test, y_pred)
-        tn, fp, fn, tp = cm.ravel()
-        
-        precision = precision_score(y_test, y_pred, zero_division=0)
-        recall = recall_score(y_test, y_pred, zero_division=0)
-        
-        results.append({
-            'threshold': threshold,
-            'accuracy': accuracy_score(y_test, y_pred),
-            'precision': precision,
-            'recall': recall,
-            'f1': f1_score(y_test, y_pred, zero_division=0),
-            'roc_auc': roc_auc_score(y_test, y_pred_proba),
-            'fp': fp,
-            'fn': fn,
-            'tp': tp,
-            'tn': tn,
-            'total_errors': fp + fn
-        })
-    
-    results_df = pd.DataFrame(results)
+    results_df = threshold_table(y_test, y_pred_proba, thresholds)
     
     # Display results
     print("\n[3/3] THRESHOLD ANALYSIS RESULTS")
@@ -266,7 +167,8 @@ def analyze_thresholds():
     model_package['optimal_threshold'] = optimal_threshold
     model_package['threshold_analysis'] = results_df.to_dict('records')
     
-    joblib.dump(model_package, 'startup_success_model_advanced.pkl')
+    dump_artifact(model_package, 'startup_success_model_advanced.pkl')
+    write_manifest('.')
     
     print(f"\n✓ Optimal threshold ({optimal_threshold:.2f}) saved to model package")
     print(f"✓ Full analysis saved for reference")
@@ -0,0 +1,99 @@
+# ml_model/prediction_cache.py
+
+"""
+Bounded LRU + TTL cache for /predict responses.
+
+Entries are keyed on a hash of the aligned model feature vector (after
+preprocess_input and column alignment) together with a fingerprint of the
+loaded model artifacts, so two payloads that differ only in fields the model
+ignores share an entry and a new model never serves stale results.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+def fingerprint_files(paths):
+    """
+    Short hash identifying a set of model artifact files by name, size and
+    modification time (cheap enough to check on every cold start)
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f'{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()[:16]
+
+def feature_key(features, model_fingerprint):
+    """Cache key for one aligned feature row"""
+    row = np.asarray(features, dtype=np.float64).ravel()
+    # Canonicalize NaN payloads and negative zero so equal vectors hash equally
+    row = np.where(np.isnan(row), np.nan, row) + 0.0
+    digest = hashlib.blake2b(row.tobytes(), digest_size=16)
+    digest.update(model_fingerprint.encode())
+    return digest.hexdigest()
+
+class PredictionCache:
+    """Thread-safe LRU cache whose entries also expire after ttl_seconds"""
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,60 @@
+# ml_model/rebalancing.py
+
+"""
+Class rebalancing strategies for training, chosen with TRAINING_REBALANCE
+or train_model.py --rebalance.
+
+  smote_tomek   SMOTE oversampling then Tomek-link cleaning (the original
+                behaviour). The Tomek pass is a nearest-neighbour search over
+                the whole training set, which dominates time and memory on
+                large datasets.
+  smote         SMOTE only: neighbours are searched within the minority
+                class, no full-set pass.
+  undersample   stratified random undersampling of the majority class; linear
+                time and shrinks the set the ensemble is fitted on.
+  class_weight  no resampling; the base models weight classes instead
+                (scale_pos_weight for XGBoost, class_weight for LightGBM and
+                the random forest).
+  none          train on the data as is.
+
+benchmark_suite.py --cases rebalancing reports the time, memory and ROC-AUC of
+each.
+"""
+
+import os
+
+from imblearn.combine import SMOTETomek
+from imblearn.over_sampling import SMOTE
+from imblearn.under_sampling import RandomUnderSampler
+
+STRATEGIES = ('smote_tomek', 'smote', 'undersample', 'class_weight', 'none')
+
+def rebalance_strategy():
+    """Configured strategy (TRAINING_REBALANCE, default smote_tomek)"""
+    strategy = os.environ.get('TRAINING_REBALANCE', 'smote_tomek')
+    if strategy not in STRATEGIES:
+        raise ValueError(f"TRAINING_REBALANCE must be one of {', '.join(STRATEGIES)}, got {strategy!r}")
+    return strategy
+
+def make_resampler(strategy, random_state=42):
+    """imblearn resampler for a strategy, or None when the training set is used as is"""
+    if strategy == 'smote_tomek':
+        return SMOTETomek(random_state=random_state)
+    if strategy == 'smote':
+        return SMOTE(random_state=random_state)
+    if strategy == 'undersample':
+        return RandomUnderSampler(random_state=random_state)
+    if strategy in ('class_weight', 'none'):
+        return None
+    raise ValueError(f"Unknown rebalancing strategy {strategy!r}; expected one of {', '.join(STRATEGIES)}")
+
+def class_weight_params(strategy, y):
+    """Extra constructor parameters per base model name ('xgb', 'lgbm', 'rf') for a strategy"""
+    if strategy != 'class_weight':
+        return {'xgb': {}, 'lgbm': {}, 'rf': {}}
+    positives = int((y == 1).sum())
+    return {
+        'xgb': {'scale_pos_weight': (len(y) - positives) / max(positives, 1)},
+        'lgbm': {'class_weight': 'balanced'},
+        'rf': {'class_weight': 'balanced_subsample'},
+    }
@@ -0,0 +1,101 @@
+# ml_model/reference_impl.py
+
+"""
+The straightforward implementations that faster code replaced: pandas
+feature engineering and date parsing, per-threshold sklearn metrics and
+row-by-row batch scoring. The tests check the fast paths give the same
+results; benchmark_suite.py times the two against each other.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score, roc_auc_score
+
+from features import ENGINEERED_FEATURES
+
+def pandas_features(df, fit_thresholds=True):
+    """
+    The pandas feature engineering features.py replaced. fit_thresholds=True
+    is the training variant (median/quantile risk cut-offs), False the
+    serving variant.
+    """
+    df = df.copy()
+    epsilon = 0.01
+    df['days_to_first_funding'] = (df['first_funding_at'] - df['founded_at']).dt.days
+    df['days_funding_active'] = (df['last_funding_at'] - df['first_funding_at']).dt.days
+    df['days_since_founding'] = (df['last_funding_at'] - df['founded_at']).dt.days
+    df['years_active'] = (df['days_funding_active'] / 365.25).clip(lower=epsilon)
+    df['years_since_founding'] = (df['days_since_founding'] / 365.25).clip(lower=epsilon)
+
+    df['funding_momentum'] = df['funding_total_usd'] / df['years_active']
+    df['avg_funding_per_round'] = df['funding_total_usd'] / df['funding_rounds'].replace(0, 1)
+    df['funding_concentration'] = df['avg_funding_per_round'] / (df['funding_total_usd'] + 1)
+    df['funding_growth_rate'] = df['funding_total_usd'] / df['years_since_founding']
+
+    df['milestone_years'] = (df['age_last_milestone_year'] - df['age_first_milestone_year']).clip(lower=epsilon)
+    df['milestone_velocity'] = df['milestones'] / df['milestone_years']
+    df['milestones_per_year_active'] = df['milestones'] / df['years_active']
+    df['milestone_density'] = df['milestones'] / (df['days_since_founding'] + 1)
+
+    df['relationships_per_year'] = df['relationships'] / df['years_active']
+    df['relationship_efficiency'] = df['relationships'] / (df['funding_rounds'] + 1)
+    df['network_strength'] = df['relationships'] * df['avg_participants']
+
+    df['funding_x_relationships'] = df['funding_total_usd'] * df['relationships']
+    df['rounds_x_participants'] = df['funding_rounds'] * df['avg_participants']
+    df['milestones_x_relationships'] = df['milestones'] * df['relationships']
+    df['top500_x_funding'] = df['is_top500'] * df['funding_total_usd']
+
+    round_cols = [col for col in df.columns if col.startswith('has_round')]
+    df['total_rounds_reached'] = df[round_cols].sum(axis=1)
+    df['reached_late_stage'] = ((df.get('has_roundC', 0) == 1) |
+                                (df.get('has_roundD', 0) == 1)).astype(int)
+
+    if fit_thresholds:
+        funding_cut = df['funding_total_usd'].median()
+        velocity_cut = df['milestone_velocity'].quantile(0.25)
+    else:
+        funding_cut, velocity_cut = 1000000, 1
+    df['early_stage_only'] = ((df['funding_rounds'] <= 2) &
+                              (df['funding_total_usd'] < funding_cut)).astype(int)
+    df['slow_milestone'] = (df['milestone_velocity'] < velocity_cut).astype(int)
+    df['low_participation'] = (df['avg_participants'] < 2).astype(int)
+
+    df['same_day_funding'] = (df['days_funding_active'] == 0).astype(int)
+    df['quick_first_funding'] = (df['days_to_first_funding'] < 30).astype(int)
+    df['long_founding_period'] = (df['days_to_first_funding'] > 365).astype(int)
+
+    df['funding_squared'] = np.log1p(df['funding_total_usd']) ** 2
+    df['relationships_squared'] = df['relationships'] ** 2
+
+    out = df[ENGINEERED_FEATURES].astype(float)
+    return out.replace([np.inf, -np.inf], np.nan)
+
+def pandas_dates(values):
+    """pd.to_datetime without a format, as int64 nanoseconds (NaT as its int64 value)"""
+    parsed = pd.to_datetime(pd.Series(values), errors='coerce')
+    return parsed.to_numpy().astype('datetime64[ns]').view(np.int64)
+
+# optimize_threshold.py's grid
+THRESHOLD_GRID = np.arange(0.10, 0.71, 0.05)
+
+def legacy_threshold_grid(y_true, scores):
+    """The optimize_threshold.py loop: sklearn metrics per threshold of THRESHOLD_GRID"""
+    rows = []
+    for threshold in THRESHOLD_GRID:
+        y_pred = (scores >= threshold).astype(int)
+        tn, fp, fn, tp = confusion_matrix(y_true, y_pred).ravel()
+        rows.append((accuracy_score(y_true, y_pred), precision_score(y_true, y_pred, zero_division=0),
+                     recall_score(y_true, y_pred, zero_division=0), f1_score(y_true, y_pred, zero_division=0),
+                     roc_auc_score(y_true, scores), fp, fn, tp, tn))
+    return np.array(rows, dtype=np.float64)
+
+def legacy_f1_search(y_true, scores, thresholds):
+    """The train_model.py F1 search: one f1_score call per ROC threshold"""
+    f1_scores = [f1_score(y_true, (scores >= threshold).astype(int), zero_division=0) for threshold in thresholds]
+    return thresholds[int(np.argmax(f1_scores))]
+
+def score_row_by_row(app_module, records):
+    """The pre-vectorization /predict-batch loop: one model call per startup"""
+    return np.array([float(app_module.predict_probabilities(app_module.preprocess_input(record))[0])
+                     for record in records])
@@ -0,0 +1,205 @@
+# ml_model/serve.py
+
+"""
+Production server for the prediction API.
+
+The model is loaded once in the parent process, then N worker processes are
+forked from it. The workers share the parent's model memory copy-on-write
+(gc.freeze() keeps the garbage collector from touching those pages) and
+accept connections from one shared listening socket, each handling requests
+on a bounded thread pool.
+
+Hot reloads (MODEL_RELOAD_INTERVAL, POST /admin/reload) happen in the
+parent as well: it loads the new model once, then forks a new set of
+workers and stops the old ones after their requests in flight. Workers that
+reloaded on their own would each hold a private copy of the model, and
+write the compiled artifact at the same time.
+
+    python serve.py --workers 4 --threads 8 --port 5001
+
+Defaults come from SERVE_WORKERS, SERVE_THREADS, HOST and PORT. On platforms
+without fork() a single threaded process is used. `python app.py` is still
+the development server.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SERVE_WORKERS', os.cpu_count() or 1)),
+                        help='worker processes (default: SERVE_WORKERS or the CPU count)')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('SERVE_THREADS', 4)),
+                        help='request threads per worker (default: SERVE_THREADS or 4)')
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5001)))
+    parser.add_argument('--quiet', action='store_true', help='disable per-request access logging')
+    return parser.parse_args(argv)
+
+def make_server(flask_app, host, port, threads, fd, quiet=False):
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """Werkzeug server that handles connections on a fixed-size thread pool"""
+        multithread = True
+
+        def __init__(self):
+            super().__init__(host, port, flask_app, handler=QuietHandler if quiet else None, fd=fd)
+            self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    return PooledWSGIServer()
+
+def run_worker(flask_app, listener, args):
+    server = make_server(flask_app, args.host, args.port, args.threads, listener.fileno(), args.quiet)
+    # SIGTERM stops accepting connections and lets the requests in flight
+    # finish (shutdown() waits for serve_forever, so not from this thread)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    server.serve_forever()
+    server.pool.shutdown(wait=True)
+
+def refreeze():
+    """
+    Move everything loaded so far out of the collector's reach so the
+    workers don't dirty (and privately copy) the shared model pages
+    """
+    gc.unfreeze()  # lets the collector free a replaced model's cycles
+    gc.collect()
+    gc.freeze()
+
+def main(argv=None):
+    args = parse_args(argv)
+    workers = max(1, args.workers)
+    if not hasattr(os, 'fork'):
+        workers = 1
+
+    # Each request scores on one core; letting XGBoost/LightGBM spawn OpenMP
+    # pools in every worker oversubscribes the CPU, and libgomp pools created
+    # before fork() can deadlock in the children
+    if workers > 1:
+        os.environ.setdefault('OMP_NUM_THREADS', '1')
+
+    # Importing the app loads the model assets once, in this process. With
+    # LAZY_MODEL_LOAD the load runs on a thread, which would not survive
+    # fork(), so wait for it before starting workers.
+    import app as service
+    if workers > 1:
+        service.wait_for_model()
+
+    listener = socket.create_server((args.host, args.port), backlog=1024, reuse_port=False)
+    listener.set_inheritable(True)
+    print(f"🚀 Serving on {args.host}:{args.port} with {workers} worker(s) × {args.threads} thread(s)")
+
+    if workers == 1:
+        service.start_model_watcher()
+        run_worker(service.app, listener, args)
+        return
+
+    refreeze()
+
+    children = set()
+    retiring = set()  # workers of the previous model, finishing their requests
+    shutting_down = False
+    reload_requested = False
+    parent = os.getpid()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            service.reload_handler = lambda: os.kill(parent, signal.SIGHUP)
+            try:
+                run_worker(service.app, listener, args)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def terminate(pids):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def stop(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        terminate(children | retiring)
+
+    def request_reload(signum, frame):
+        nonlocal reload_requested
+        reload_requested = True
+
+    def roll_workers():
+        """Load the new model here once, then replace every worker with one forked from it"""
+        if not service.load_model_assets():
+            return
+        refreeze()
+        previous = set(children)
+        children.clear()
+        for _ in range(workers):
+            spawn()
+        retiring.update(previous)
+        terminate(previous)
+        print(f"🔄 Replaced {len(previous)} worker(s) with the reloaded model")
+
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, request_reload)
+
+    interval = service.MODEL_RELOAD_INTERVAL
+    next_check = time.monotonic() + interval
+    while children or retiring:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            if pid in retiring:
+                retiring.discard(pid)
+            elif pid in children:
+                children.discard(pid)
+                if not shutting_down:
+                    print(f"⚠️  Worker {pid} exited with status {status}, restarting", file=sys.stderr)
+                    spawn()
+            continue
+        if shutting_down:
+            time.sleep(0.1)
+            continue
+        if interval > 0 and time.monotonic() >= next_check:
+            next_check = time.monotonic() + interval
+            if service.model_files_changed():
+                print("🔄 Model manifest changed, reloading...")
+                reload_requested = True
+        if reload_requested:
+            reload_requested = False
+            roll_workers()
+        time.sleep(0.1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+# ml_model/synthetic_data.py
+
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from batch_formats import COLUMNS_JSON, JSON, NPZ
+from date_parsing import to_datetime64
+from fast_inference import dump_artifact
+from model_manifest import MODEL_FILES, write_manifest
+from threshold_analysis import package_threshold
+
+CATEGORIES = ['software', 'web', 'mobile', 'enterprise', 'advertising', 'games_video',
+              'ecommerce', 'biotech', 'consulting', 'other', 'network_hosting',
+              'hardware', 'semiconductor', 'cleantech', 'security', 'analytics']
+STATES = ['CA', 'NY', 'MA', 'TX', 'WA', 'CO', 'IL']
+
+def make_startup_frame(n_rows, seed=42):
+    """
+    Synthetic rows with the schema of 'startup data.csv'.
+
+    The label is drawn from a noisy logistic function of funding, network and
+    milestone features so models trained on it have something to learn.
+    """
+    rng = np.random.default_rng(seed)
+
+    founded = pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 365 * 10, n_rows), unit='D')
+    first_gap = rng.integers(0, 365 * 4, n_rows)
+    active_gap = rng.integers(0, 365 * 6, n_rows) * rng.integers(0, 2, n_rows)
+    first_funding = founded + pd.to_timedelta(first_gap, unit='D')
+    last_funding = first_funding + pd.to_timedelta(active_gap, unit='D')
+
+    funding_rounds = rng.integers(1, 9, n_rows)
+    funding_total = np.round(rng.lognormal(15.5, 1.5, n_rows))
+    relationships = rng.poisson(7, n_rows)
+    milestones = rng.poisson(2, n_rows)
+    avg_participants = np.round(rng.gamma(2.0, 1.4, n_rows) + 1, 4)
+    is_top500 = (rng.random(n_rows) < 0.8).astype(int)
+
+    age_first_funding = np.round(first_gap / 365.25, 4)
+    age_last_funding = np.round((first_gap + active_gap) / 365.25, 4)
+    age_first_milestone = np.where(milestones > 0, np.round(rng.uniform(0, 6, n_rows), 4), np.nan)
+    age_last_milestone = age_first_milestone + np.round(rng.uniform(0, 5, n_rows), 4)
+
+    category = rng.choice(CATEGORIES, n_rows, p=_category_weights())
+    state = rng.choice(STATES, n_rows)
+
+    rounds = {
+        'has_VC': rng.random(n_rows) < 0.3,
+        'has_angel': rng.random(n_rows) < 0.25,
+        'has_roundA': rng.random(n_rows) < 0.5,
+        'has_roundB': rng.random(n_rows) < 0.4,
+        'has_roundC': rng.random(n_rows) < 0.25,
+        'has_roundD': rng.random(n_rows) < 0.1,
+    }
+
+    logit = (0.35 * np.log1p(relationships) + 0.25 * (milestones > 1) + 0.15 * np.log1p(funding_rounds)
+             + 0.8 * is_top500 + 0.4 * rounds['has_roundB'] + 0.5 * rounds['has_roundC']
+             - 0.3 * rounds['has_angel'] + rng.normal(0, 0.8, n_rows) - 1.0)
+    acquired = rng.random(n_rows) < 1 / (1 + np.exp(-logit))
+
+    df = pd.DataFrame({
+        'Unnamed: 0': np.arange(n_rows),
+        'state_code': state,
+        'latitude': np.round(rng.uniform(25, 48, n_rows), 6),
+        'longitude': np.round(rng.uniform(-124, -70, n_rows), 6),
+        'zip_code': rng.integers(10000, 99999, n_rows).astype(str),
+        'id': [f'c:{i}' for i in range(n_rows)],
+        'city': rng.choice(['San Francisco', 'New York', 'Boston', 'Austin', 'Seattle'], n_rows),
+        'Unnamed: 6': np.nan,
+        'name': [f'Startup {i}' for i in range(n_rows)],
+        'labels': acquired.astype(int),
+        'founded_at': founded.strftime('%m/%d/%Y'),
+        'closed_at': np.where(acquired, None, last_funding.strftime('%m/%d/%Y')),
+        'first_funding_at': first_funding.strftime('%m/%d/%Y'),
+        'last_funding_at': last_funding.strftime('%m/%d/%Y'),
+        'age_first_funding_year': age_first_funding,
+        'age_last_funding_year': age_last_funding,
+        'age_first_milestone_year': age_first_milestone,
+        'age_last_milestone_year': age_last_milestone,
+        'relationships': relationships,
+        'funding_rounds': funding_rounds,
+        'funding_total_usd': funding_total,
+        'milestones': milestones,
+        'state_code.1': state,
+        'is_CA': (state == 'CA').astype(int),
+        'is_NY': (state == 'NY').astype(int),
+        'is_MA': (state == 'MA').astype(int),
+        'is_TX': (state == 'TX').astype(int),
+        'is_otherstate': (~np.isin(state, ['CA', 'NY', 'MA', 'TX'])).astype(int),
+        'category_code': category,
+    })
+    for flag, name in (('is_software', 'software'), ('is_web', 'web'), ('is_mobile', 'mobile'),
+                       ('is_enterprise', 'enterprise'), ('is_advertising', 'advertising'),
+                       ('is_gamesvideo', 'games_video'), ('is_ecommerce', 'ecommerce'),
+                       ('is_biotech', 'biotech'), ('is_consulting', 'consulting')):
+        df[flag] = (category == name).astype(int)
+    df['is_othercategory'] = (df[[c for c in df.columns if c.startswith('is_') and c not in
+                                  ('is_CA', 'is_NY', 'is_MA', 'is_TX', 'is_otherstate')]].sum(axis=1) == 0).astype(int)
+    df['object_id'] = df['id']
+    for col, values in rounds.items():
+        df[col] = values.astype(int)
+    df['avg_participants'] = avg_participants
+    df['is_top500'] = is_top500
+    df['status'] = np.where(acquired, 'acquired', 'closed')
+    return df
+
+def make_payloads(n_rows, seed=42):
+    """Synthetic /predict request bodies (the dataset columns a client sends)"""
+    df = make_startup_frame(n_rows, seed=seed)
+    df = df.drop(columns=['Unnamed: 0', 'state_code', 'latitude', 'longitude', 'zip_code', 'id',
+                          'city', 'Unnamed: 6', 'labels', 'closed_at', 'state_code.1',
+                          'object_id', 'status'])
+    for col in ('founded_at', 'first_funding_at', 'last_funding_at'):
+        df[col] = pd.to_datetime(df[col], format='%m/%d/%Y').dt.strftime('%Y-%m-%d')
+    records = df.to_dict('records')
+    # JSON bodies carry null rather than NaN for missing milestone ages
+    for record in records:
+        for key, value in record.items():
+            if isinstance(value, float) and np.isnan(value):
+                record[key] = None
+    return records
+
+def make_raw_frame(n_rows, seed=0):
+    """Synthetic raw rows with parsed dates plus edge cases the kernel must match"""
+    df = make_startup_frame(n_rows, seed=seed)
+    for col in ('founded_at', 'first_funding_at', 'last_funding_at'):
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+    if n_rows >= 8:
+        df.loc[0, 'funding_rounds'] = 0
+        df.loc[1, 'founded_at'] = pd.NaT
+        df.loc[2, 'last_funding_at'] = df.loc[2, 'first_funding_at']
+        df.loc[3, 'first_funding_at'] = df.loc[3, 'founded_at'] - pd.Timedelta(days=40)
+        df.loc[4, 'funding_total_usd'] = np.nan
+        df.loc[5, 'age_last_milestone_year'] = df.loc[5, 'age_first_milestone_year']
+        df.loc[6, 'last_funding_at'] = df.loc[6, 'founded_at'] - pd.Timedelta(days=1)
+        df.loc[7, 'avg_participants'] = np.nan
+    return df
+
+# Date layouts: ISO (JSON payloads) and M/D/YYYY ('startup data.csv')
+DATE_FORMATS = {'iso': '%Y-%m-%d', 'mdy': '%-m/%-d/%Y'}
+
+def make_dates(rows, fmt, seed):
+    """Dates in the span of the startup data, 2% missing and 0.1% malformed"""
+    rng = np.random.default_rng(seed)
+    days = rng.integers(np.datetime64('1985-01-01', 'D').astype(int), np.datetime64('2014-01-01', 'D').astype(int),
+                        size=rows)
+    values = pd.to_datetime(days, unit='D').strftime(fmt).to_numpy(dtype=object)
+    values[rng.random(rows) < 0.02] = None
+    values[rng.random(rows) < 0.001] = 'unknown'
+    return values
+
+def date_batches(rows, fmt, calls):
+    """`calls` one-row batches for rows=1 (single requests), else one batch of `rows`"""
+    if rows == 1:
+        return [values[:1] for values in np.array_split(make_dates(calls, fmt, seed=1), calls)]
+    return [make_dates(rows, fmt, seed=rows)]
+
+# /predict-batch (request Content-Type, body layout, Accept) besides a JSON list of records
+BATCH_FORMATS = [
+    (JSON, 'records', COLUMNS_JSON),
+    (JSON, 'columns', JSON),
+    (JSON, 'columns', COLUMNS_JSON),
+    (NPZ, 'npz', NPZ),
+]
+
+def npz_body(frame):
+    buffer = io.BytesIO()
+    np.savez(buffer, **{name: frame[name].to_numpy(dtype=str if frame[name].dtype == object else np.float64)
+                        for name in frame.columns})
+    return buffer.getvalue()
+
+def request_body(records, layout):
+    """/predict-batch body for records in one of the BATCH_FORMATS layouts"""
+    frame = pd.DataFrame(records)
+    if layout == 'columns':
+        return json.dumps({name: frame[name].tolist() for name in frame.columns})
+    if layout == 'npz':
+        return npz_body(frame)
+    return json.dumps(records)
+
+def synthetic_scores(rows, seed):
+    """Labels (65% positive) and rounded scores that separate them imperfectly"""
+    rng = np.random.default_rng(seed)
+    y_true = (rng.random(rows) < 0.65).astype(int)
+    scores = np.clip(rng.normal(0.35 + 0.3 * y_true, 0.2), 0, 1).round(4)
+    return y_true, scores
+
+
+def _category_weights():
+    weights = np.linspace(3, 1, len(CATEGORIES))
+    return weights / weights.sum()
+
+def fit_model_assets(n_rows=2000, n_estimators=50, seed=42):
+    """
+    Small stacking ensemble trained on synthetic data with the same pipeline
+    shape as train_model.py (encoder → median imputer → scaler → stacking),
+    so benchmarks can run offline without 'startup data.csv'.
+    """
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from sklearn.impute import SimpleImputer
+    from sklearn.ensemble import RandomForestClassifier, StackingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from xgboost import XGBClassifier
+    from lightgbm import LGBMClassifier
+    from train_model import advanced_feature_engineering
+    from feature_stats import fit_feature_stats
+
+    df = make_startup_frame(n_rows, seed=seed)
+    df.drop(columns=['Unnamed: 0', 'state_code', 'latitude', 'longitude', 'zip_code', 'id', 'city',
+                     'Unnamed: 6', 'name', 'labels', 'object_id'], inplace=True, errors='ignore')
+    for col in ('founded_at', 'closed_at', 'first_funding_at', 'last_funding_at'):
+        df[col] = to_datetime64(df[col])
+    df['success'] = (df['status'] == 'acquired').astype(int)
+
+    df = advanced_feature_engineering(df)
+    df['category_frequency'] = df['category_code'].map(df['category_code'].value_counts(normalize=True))
+    le = LabelEncoder()
+    df['category_code'] = le.fit_transform(df['category_code'].astype(str))
+    df.drop(columns=['status', 'founded_at', 'closed_at', 'first_funding_at', 'last_funding_at'], inplace=True)
+    df = df.select_dtypes(include=np.number)
+    df.replace([np.inf, -np.inf], np.nan, inplace=True)
+
+    X = df.drop('success', axis=1)
+    y = df['success']
+    imputer = SimpleImputer(strategy='median')
+    X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=X.columns)
+    scaler = StandardScaler()
+    X_scaled = pd.DataFrame(scaler.fit_transform(X_imputed), columns=X.columns)
+
+    model = StackingClassifier(
+        estimators=[
+            ('xgb', XGBClassifier(n_estimators=n_estimators, max_depth=6, learning_rate=0.1,
+                                  eval_metric='logloss', random_state=seed)),
+            ('lgbm', LGBMClassifier(n_estimators=n_estimators, max_depth=6, learning_rate=0.1,
+                                    random_state=seed, verbose=-1)),
+            ('rf', RandomForestClassifier(n_estimators=n_estimators, max_depth=10,
+                                          random_state=seed, n_jobs=-1)),
+        ],
+        final_estimator=LogisticRegression(max_iter=1000, random_state=seed),
+        cv=3,
+    )
+    model.fit(X_scaled, y)
+
+    return {
+        'model_package': {'model': model, 'optimal_threshold': 0.5,
+                          'feature_names': X.columns.tolist(),
+                          'feature_stats': fit_feature_stats(X, le, imputer)},
+        'category_encoder': le,
+        'imputer': imputer,
+        'scaler': scaler,
+    }
+
+def install_model_assets(app_module, assets):
+    """Point a loaded app module at in-memory assets from fit_model_assets()"""
+    package = assets['model_package']
+    app_module.publish_model_assets(app_module.prepare_model_assets(app_module.ModelAssets(
+        model=package['model'], package=package, encoder=assets['category_encoder'],
+        imputer=assets['imputer'], scaler=assets['scaler'],
+        threshold=package_threshold(package), fingerprint=f'synthetic-{id(package):x}'
+    )))
+
+def save_model_assets(assets, directory):
+    """Write assets from fit_model_assets() under the file names app.py loads (see MODEL_DIR)"""
+    dump_artifact(assets['model_package'], os.path.join(directory, 'startup_success_model_advanced.pkl'))
+    dump_artifact(assets['category_encoder'], os.path.join(directory, 'category_encoder.pkl'))
+    dump_artifact(assets['imputer'], os.path.join(directory, 'imputer.pkl'))
+    dump_artifact(assets['scaler'], os.path.join(directory, 'scaler.pkl'))
+    write_manifest(directory, MODEL_FILES)
+
+def sample_rows(imputer, scaler, rows, seed):
+    """(raw, scaled) model inputs drawn around the training distribution, 5% missing"""
+    columns = list(imputer.feature_names_in_)
+    rng = np.random.default_rng(seed)
+    X_raw = rng.normal(size=(rows, len(columns))) * scaler.scale_ + scaler.mean_
+    X_raw[rng.random(X_raw.shape) < 0.05] = np.nan
+    X_scaled = scaler.transform(pd.DataFrame(imputer.transform(pd.DataFrame(X_raw, columns=columns)),
+                                             columns=columns))
+    return X_raw, X_scaled
+
+def scaled_features(app_module, payloads):
+    """Imputed and scaled model inputs for payloads, as the ensemble sees them"""
+    input_df, errors = app_module.preprocess_batch(payloads)
+    if errors:
+        raise RuntimeError(f'{len(errors)} synthetic payloads failed preprocessing')
+    X = app_module.align_features(input_df)
+    imputed = pd.DataFrame(app_module.current_assets.imputer.transform(X), columns=X.columns)
+    return pd.DataFrame(app_module.current_assets.scaler.transform(imputed), columns=X.columns)
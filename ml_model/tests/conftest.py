@@ -0,0 +1,45 @@
+# ml_model/tests/conftest.py
+
+"""
+Shared fixtures. Tests import the ml_model scripts as top-level modules,
+the way the server and the benchmarks do, and serve a small synthetic
+model (synthetic_data.py) so they run without 'startup data.csv' or the
+trained .pkl files.
+
+    cd ml_model && python -m pytest -q tests
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.py loads MODEL_DIR when imported; point it at an empty directory so
+# the tests never pick up (or write next to) real model files
+os.environ['MODEL_DIR'] = tempfile.mkdtemp(prefix='investiq-tests-')
+os.environ.setdefault('MICRO_BATCH_SIZE', '1')
+
+@pytest.fixture(scope='session')
+def synthetic_assets():
+    from synthetic_data import fit_model_assets
+    return fit_model_assets(n_rows=600, n_estimators=10)
+
+@pytest.fixture(scope='session')
+def service(synthetic_assets):
+    """app.py serving the synthetic model"""
+    import app
+    from synthetic_data import install_model_assets
+    install_model_assets(app, synthetic_assets)
+    return app
+
+@pytest.fixture
+def client(service):
+    return service.app.test_client()
+
+@pytest.fixture(scope='session')
+def payloads():
+    from synthetic_data import make_payloads
+    return make_payloads(50, seed=3)
@@ -0,0 +1,91 @@
+# ml_model/tests/test_allocations.py
+
+"""
+Allocations of a single /predict request, counted with tracemalloc
+snapshots: FeatureSchema.encode (feature_schema.py) must stay a handful of
+small allocations and match the pandas preprocessing it replaces, and a
+full /predict call must stay well below the pandas path.
+"""
+
+import gc
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from prediction_cache import PredictionCache
+
+# Upper bounds per call, after a warm-up pass over the same payloads
+ENCODE_MAX_BLOCKS = 12
+ENCODE_MAX_PEAK_BYTES = 4 * 1024
+PREDICT_MAX_BLOCKS = 320
+PREDICT_MAX_PEAK_BYTES = 128 * 1024
+
+# Traces left by the measurement itself
+IGNORED = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+
+def allocations(fn, inputs):
+    """
+    (blocks, peak bytes) per call of fn: memory blocks allocated during the
+    call and still alive after it, and the traced peak above the starting level
+    """
+    for item in inputs:
+        fn(item)
+    gc.collect()
+    blocks, peaks = [], []
+    tracemalloc.start()
+    try:
+        # The first measured call also pays for the snapshot filters' own setup
+        for item in inputs[:1] + inputs:
+            before = tracemalloc.take_snapshot().filter_traces(IGNORED)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            fn(item)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            after = tracemalloc.take_snapshot().filter_traces(IGNORED)
+            blocks.append(sum(stat.count_diff for stat in after.compare_to(before, 'lineno')
+                              if stat.count_diff > 0))
+    finally:
+        tracemalloc.stop()
+    return np.asarray(blocks[1:]), np.asarray(peaks[1:])
+
+def pandas_row(service, payload):
+    return service.align_features(service.preprocess_input(payload)).to_numpy(dtype=np.float64)
+
+@pytest.fixture
+def uncached(service, monkeypatch):
+    """The service with the prediction cache off, so repeated payloads are scored again"""
+    monkeypatch.setattr(service, 'prediction_cache', PredictionCache(max_entries=0))
+    return service
+
+def test_encode_matches_pandas(service, payloads):
+    schema = service.current_assets.schema
+    assert schema is not None
+    for payload in payloads:
+        row = schema.encode(payload)
+        assert row is not None, f'fell back to pandas: {payload}'
+        np.testing.assert_allclose(row, pandas_row(service, payload), rtol=1e-9, atol=0, equal_nan=True)
+
+def test_encode_allocations(service, payloads):
+    blocks, peaks = allocations(service.current_assets.schema.encode, payloads)
+    _, pandas_peaks = allocations(lambda payload: pandas_row(service, payload), payloads)
+    assert blocks.max() <= ENCODE_MAX_BLOCKS
+    assert peaks.max() <= ENCODE_MAX_PEAK_BYTES
+    assert np.median(peaks) * 10 < np.median(pandas_peaks)
+
+def test_predict_matches_pandas_path(uncached, client, payloads, monkeypatch):
+    with_schema = [client.post('/predict', json=payload).get_json() for payload in payloads]
+    monkeypatch.setattr(uncached, 'current_assets', uncached.current_assets._replace(schema=None))
+    with_pandas = [client.post('/predict', json=payload).get_json() for payload in payloads]
+    assert with_schema == with_pandas
+
+def test_predict_allocations(uncached, client, payloads, monkeypatch):
+    def post(payload):
+        response = client.post('/predict', json=payload)
+        assert response.status_code == 200
+    blocks, peaks = allocations(post, payloads)
+    monkeypatch.setattr(uncached, 'current_assets', uncached.current_assets._replace(schema=None))
+    _, pandas_peaks = allocations(post, payloads)
+    assert blocks.max() <= PREDICT_MAX_BLOCKS
+    assert peaks.max() <= PREDICT_MAX_PEAK_BYTES
+    assert np.median(peaks) < np.median(pandas_peaks)
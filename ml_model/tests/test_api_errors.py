@@ -0,0 +1,21 @@
+# ml_model/tests/test_api_errors.py
+
+"""Client errors in request bodies are answered with 4xx, not counted as server errors"""
+
+import pytest
+
+@pytest.mark.parametrize('endpoint', ['/predict', '/predict-batch'])
+def test_malformed_json_is_400(client, endpoint):
+    response = client.post(endpoint, data=b'{', content_type='application/json')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+@pytest.mark.parametrize('endpoint', ['/predict', '/predict-batch'])
+def test_non_json_content_type_is_415(client, endpoint):
+    response = client.post(endpoint, data=b'funding_total_usd=1', content_type='application/x-www-form-urlencoded')
+    assert response.status_code == 415
+
+def test_batch_of_payloads_still_scores(client, payloads):
+    response = client.post('/predict-batch', json=payloads[:5])
+    assert response.status_code == 200
+    assert response.get_json()['successful_predictions'] == 5
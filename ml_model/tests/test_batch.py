@@ -0,0 +1,39 @@
+# ml_model/tests/test_batch.py
+
+"""
+/predict-batch: the vectorized path against one model call per payload,
+and every request and response format (batch_formats.py) against the
+JSON list of payload objects.
+"""
+
+import io
+import json
+
+import numpy as np
+import pytest
+
+from batch_formats import COLUMNS_JSON, JSON
+from reference_impl import score_row_by_row
+from synthetic_data import BATCH_FORMATS, request_body
+
+def probabilities(response, accept):
+    if accept == JSON:
+        return np.array([result['success_probability'] for result in response.get_json()['results']])
+    if accept == COLUMNS_JSON:
+        return np.array(json.loads(response.data)['columns']['success_probability'], dtype=np.float64)
+    return np.load(io.BytesIO(response.data))['success_probability']
+
+def test_vectorized_matches_row_by_row(service, payloads):
+    input_df, errors = service.preprocess_batch(payloads)
+    assert errors == {}
+    np.testing.assert_allclose(service.predict_probabilities(input_df), score_row_by_row(service, payloads),
+                               rtol=0, atol=1e-9)
+
+@pytest.mark.parametrize('content_type, layout, accept', BATCH_FORMATS,
+                         ids=[f'{layout}-{accept}' for _, layout, accept in BATCH_FORMATS])
+def test_formats_match_json_records(client, payloads, content_type, layout, accept):
+    expected = probabilities(client.post('/predict-batch', json=payloads), JSON)
+    response = client.post('/predict-batch', data=request_body(payloads, layout), content_type=content_type,
+                           headers={'Accept': accept})
+    assert response.status_code == 200
+    np.testing.assert_allclose(probabilities(response, accept), expected, equal_nan=True)
@@ -0,0 +1,65 @@
+# ml_model/tests/test_compression.py
+
+"""Compressed request and response bodies (compression.py) give the same result as plain ones"""
+
+import gzip
+import json
+
+import pytest
+
+from werkzeug.test import EnvironBuilder
+
+from compression import BodyTooLarge, available_encodings, compress_bytes, decode_request, zstandard
+
+def decode(data, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+@pytest.mark.parametrize('encoding', available_encodings())
+@pytest.mark.parametrize('endpoint', ['/predict', '/predict-batch'])
+def test_compressed_bodies_match_plain(client, payloads, endpoint, encoding):
+    raw = json.dumps(payloads[0] if endpoint == '/predict' else payloads).encode()
+    plain = client.post(endpoint, data=raw, content_type='application/json')
+    response = client.post(endpoint, data=compress_bytes(raw, encoding), content_type='application/json',
+                           headers={'Content-Encoding': encoding, 'Accept-Encoding': encoding})
+    assert response.status_code == 200
+    assert decode(response.data, response.headers.get('Content-Encoding')) == plain.data
+
+@pytest.fixture
+def body_limit(service, monkeypatch):
+    """A 20 KB request body limit for the test"""
+    monkeypatch.setitem(service.app.config, 'MAX_CONTENT_LENGTH', 20_000)
+    return 20_000
+
+def ndjson(payloads, copies):
+    return ''.join(json.dumps(payload) + '\n' for payload in payloads * copies).encode()
+
+@pytest.mark.parametrize('endpoint', ['/predict-batch', '/predict-stream'])
+def test_decoded_body_over_limit_is_rejected(client, payloads, body_limit, endpoint):
+    raw = json.dumps(payloads[:5] * 200).encode() if endpoint == '/predict-batch' else ndjson(payloads[:5], 200)
+    compressed = gzip.compress(raw)
+    assert len(compressed) < body_limit < len(raw)
+    content_type = 'application/json' if endpoint == '/predict-batch' else 'application/x-ndjson'
+    response = client.post(endpoint, data=compressed, content_type=content_type,
+                           headers={'Content-Encoding': 'gzip'})
+    assert response.status_code == 413
+
+def test_stream_past_limit_ends_with_error(client, payloads, body_limit):
+    raw = ndjson(payloads[:5], 200)
+    response = client.post('/predict-stream?chunk_size=10', data=gzip.compress(raw),
+                           content_type='application/x-ndjson', headers={'Content-Encoding': 'gzip'})
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert 0 < len(results) - 1 < 1000
+    assert 'exceeds' in results[-1]['error'] and all('error' not in result for result in results[:-1])
+
+def test_streamed_reader_stops_at_max_bytes():
+    environ = EnvironBuilder(method='POST', data=gzip.compress(b'0' * 100_000),
+                             headers={'Content-Encoding': 'gzip'}).get_environ()
+    decode_request(environ, streamed=True, max_bytes=50_000)
+    with pytest.raises(BodyTooLarge):
+        while environ['wsgi.input'].read(8192):
+            pass
@@ -0,0 +1,26 @@
+# ml_model/tests/test_date_parsing.py
+
+"""
+date_parsing.parse_dates() against pd.to_datetime(errors='coerce') without
+a format (the previous preprocessing), for ISO dates (JSON payloads) and
+the M/D/YYYY dates of 'startup data.csv', with missing and malformed
+values, from an empty and from a warm cache.
+"""
+
+import numpy as np
+import pytest
+
+from date_parsing import clear_date_cache, parse_dates
+from reference_impl import pandas_dates
+from synthetic_data import DATE_FORMATS, date_batches
+
+# pandas warns when a malformed first value sends it to dateutil
+@pytest.mark.filterwarnings('ignore::UserWarning')
+@pytest.mark.parametrize('rows', [1, 1000, 20000])
+@pytest.mark.parametrize('fmt', list(DATE_FORMATS.values()), ids=list(DATE_FORMATS))
+def test_parse_dates_matches_pandas(fmt, rows):
+    batches = date_batches(rows, fmt, calls=300)
+    clear_date_cache()
+    for cache in ('cold', 'warm'):
+        for batch in batches:
+            assert np.array_equal(pandas_dates(batch), parse_dates(batch)), f'{cache} cache: {batch[:5]}'
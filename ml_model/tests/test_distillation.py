@@ -0,0 +1,28 @@
+# ml_model/tests/test_distillation.py
+
+"""?mode=fast is served by a distilled student (distillation.py), ?mode=full by the ensemble"""
+
+import pytest
+
+from distillation import fit_student
+from synthetic_data import scaled_features
+
+@pytest.fixture
+def student(service, synthetic_assets, payloads):
+    X = scaled_features(service, payloads)
+    teacher = synthetic_assets['model_package']['model']
+    model = fit_student(X, teacher.predict_proba(X)[:, 1], n_estimators=10)
+    service.install_student_model({'model': model, 'threshold': service.current_assets.threshold, 'fidelity': {}})
+    yield service.current_assets.student
+    service.install_student_model(None)
+
+def test_fast_mode_uses_student(student, client, payloads):
+    assert student is not None
+    fast = client.post('/predict?mode=fast', json=payloads[0]).get_json()
+    full = client.post('/predict?mode=full', json=payloads[0]).get_json()
+    assert fast['model_version'] == 'Distilled Student v1.0'
+    assert full['model_version'] == 'Advanced Ensemble v2.0'
+
+def test_fast_mode_without_student_uses_ensemble(client, payloads):
+    response = client.post('/predict?mode=fast', json=payloads[0])
+    assert response.get_json()['model_version'] == 'Advanced Ensemble v2.0'
@@ -0,0 +1,56 @@
+# ml_model/tests/test_fast_inference.py
+
+"""
+Flattened tree arrays (fast_inference.TreeArrays) and the native XGBoost
+and LightGBM predictors against each base model's predict_proba, and the
+compiled pipeline against StackingClassifier.predict_proba, on the
+synthetic model.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fast_inference import NATIVE_MIN_ROWS, _matches_reference, base_model_predictors, compile_predictor
+from synthetic_data import sample_rows
+
+# Engineered features that only take the values 0 and 1
+BINARY_FLAGS = ['reached_late_stage', 'early_stage_only', 'slow_milestone', 'low_participation',
+                'same_day_funding', 'quick_first_funding', 'long_founding_period']
+
+@pytest.fixture(scope='module')
+def ensemble(synthetic_assets):
+    return synthetic_assets['model_package']['model'], synthetic_assets['imputer'], synthetic_assets['scaler']
+
+def test_tree_arrays_match_base_models(ensemble):
+    model, imputer, scaler = ensemble
+    columns = list(imputer.feature_names_in_)
+    _, X = sample_rows(imputer, scaler, 500, seed=11)
+    for (name, _), estimator in zip(model.estimators, model.estimators_):
+        expected = estimator.predict_proba(pd.DataFrame(X, columns=columns))[:, 1]
+        native, arrays = base_model_predictors(name, estimator)
+        np.testing.assert_allclose(arrays(X), expected, rtol=0, atol=1e-6, err_msg=f'{name} tree arrays')
+        if native is not None:
+            np.testing.assert_allclose(native(X), expected, rtol=0, atol=1e-6, err_msg=f'{name} native')
+
+# Below and above the batch size where XGBoost switches to inplace_predict
+@pytest.mark.parametrize('rows', [1, NATIVE_MIN_ROWS + 1])
+def test_compiled_pipeline_matches_stacking(ensemble, rows):
+    model, imputer, scaler = ensemble
+    compiled = compile_predictor(model, imputer, scaler)
+    assert compiled is not None
+    X_raw, X_scaled = sample_rows(imputer, scaler, rows, seed=rows)
+    expected = model.predict_proba(pd.DataFrame(X_scaled, columns=list(imputer.feature_names_in_)))[:, 1]
+    np.testing.assert_allclose(compiled.predict_proba(X_raw.copy()), expected, rtol=0, atol=1e-6)
+
+def test_parity_check_covers_binary_flag_splits(ensemble):
+    model, imputer, scaler = ensemble
+    compiled = compile_predictor(model, imputer, scaler)
+    columns = list(imputer.feature_names_in_)
+    flags = [columns.index(name) for name in BINARY_FLAGS]
+    # Send every forest split on a 0/1 flag left, as a broken flattening would
+    forest = compiled.base_predictors[compiled.base_names.index('rf')]
+    broken = np.isin(forest.feature, flags) & np.isfinite(forest.threshold)
+    assert broken.any()
+    forest.threshold[broken] = np.inf
+    assert not _matches_reference(compiled, model, imputer, scaler)
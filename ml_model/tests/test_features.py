@@ -0,0 +1,27 @@
+# ml_model/tests/test_features.py
+
+"""
+The NumPy feature kernel (features.py) against the pandas feature
+engineering it replaced in train_model.py, optimize_threshold.py and
+app.py, on synthetic rows plus the edge cases the kernel must match.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import ENGINEERED_FEATURES, add_engineered_features, compute_features
+from reference_impl import pandas_features
+from synthetic_data import make_raw_frame
+
+@pytest.mark.parametrize('fit_thresholds', [True, False], ids=['training', 'serving'])
+def test_kernel_matches_pandas_reference(fit_thresholds):
+    df = make_raw_frame(5000)
+    expected = pandas_features(df, fit_thresholds)
+    if fit_thresholds:
+        actual = add_engineered_features(df)[ENGINEERED_FEATURES]
+    else:
+        actual = pd.DataFrame(compute_features(df), columns=ENGINEERED_FEATURES, index=df.index)
+    mismatched = [col for col in ENGINEERED_FEATURES
+                  if not np.allclose(actual[col], expected[col], rtol=1e-12, atol=0, equal_nan=True)]
+    assert mismatched == []
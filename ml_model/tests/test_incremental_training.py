@@ -0,0 +1,68 @@
+# ml_model/tests/test_incremental_training.py
+
+"""
+incremental_training.update_model: rows appended to the training CSV grow
+the saved ensemble in place; any other change to the file asks for a full
+rebuild.
+"""
+
+import contextlib
+import io
+
+import joblib
+import pytest
+
+from incremental_training import MODEL_FILE, update_model
+from synthetic_data import make_startup_frame
+from train_model import build_near_perfect_model
+from training_data import ArtifactCache
+
+BASE_ROWS, NEW_ROWS = 600, 200
+
+def quietly(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+def tree_counts(model_dir):
+    package = joblib.load(model_dir / MODEL_FILE)
+    return {name: config['n_estimators'] for name, config in package['hyperparameters'].items()}
+
+@pytest.fixture
+def trained(tmp_path):
+    """(csv path, model dir, the rows not yet in the CSV) for a model trained on the first BASE_ROWS rows"""
+    frame = make_startup_frame(BASE_ROWS + NEW_ROWS, seed=5)
+    data_path = tmp_path / 'startup data.csv'
+    frame.iloc[:BASE_ROWS].to_csv(data_path, index=False)
+    quietly(build_near_perfect_model, str(data_path), str(tmp_path), cache=ArtifactCache(''), n_estimators=10)
+    return data_path, tmp_path, frame.iloc[BASE_ROWS:]
+
+def test_appended_rows_add_trees(trained):
+    data_path, model_dir, appended = trained
+    before = tree_counts(model_dir)
+    appended.to_csv(data_path, mode='a', header=False, index=False)
+    metrics = quietly(update_model, str(data_path), str(model_dir), extra_trees=5, cache=ArtifactCache(''), n_jobs=1)
+    assert metrics is not None
+    assert metrics['appended_rows'] == NEW_ROWS
+    assert tree_counts(model_dir) == {name: count + 5 for name, count in before.items()}
+
+def test_nothing_appended(trained):
+    data_path, model_dir, _ = trained
+    metrics = quietly(update_model, str(data_path), str(model_dir), cache=ArtifactCache(''), n_jobs=1)
+    assert metrics == {'appended_rows': 0}
+
+def test_rewritten_csv_needs_full_rebuild(trained):
+    data_path, model_dir, appended = trained
+    appended.to_csv(data_path, index=False)
+    assert quietly(update_model, str(data_path), str(model_dir), cache=ArtifactCache(''), n_jobs=1) is None
+
+def test_served_at_the_saved_threshold(trained):
+    import app
+    data_path, model_dir, appended = trained
+    for update in (False, True):
+        if update:
+            appended.to_csv(data_path, mode='a', header=False, index=False)
+            quietly(update_model, str(data_path), str(model_dir), extra_trees=5, cache=ArtifactCache(''), n_jobs=1)
+        package = joblib.load(model_dir / MODEL_FILE)
+        assets, _ = quietly(app.read_model_assets, str(model_dir))
+        assert 'threshold' not in package
+        assert assets.threshold == package['optimal_threshold']
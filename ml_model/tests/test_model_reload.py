@@ -0,0 +1,106 @@
+# ml_model/tests/test_model_reload.py
+
+"""
+Hot reloads only publish a complete set of model files: the one
+model_manifest.json describes, with feature stats fitted on the same
+imputer. Anything else fails the reload and keeps the current model. A
+request that overlaps a reload is served entirely by the assets it
+started with.
+"""
+
+import copy
+import os
+
+import numpy as np
+import pytest
+
+from fast_inference import dump_artifact
+from micro_batcher import MicroBatcher
+import model_manifest
+from model_manifest import MANIFEST_FILE, ManifestMismatch, read_manifest, verify_manifest, write_manifest
+from synthetic_data import install_model_assets, save_model_assets
+
+@pytest.fixture
+def model_dir(service, synthetic_assets, tmp_path, monkeypatch):
+    monkeypatch.setenv('MODEL_DIR', str(tmp_path))
+    yield tmp_path
+    install_model_assets(service, synthetic_assets)
+
+def test_reload_loads_manifest_set(service, synthetic_assets, model_dir):
+    assert service.model_files_fingerprint() is None
+    save_model_assets(synthetic_assets, str(model_dir))
+    assert service.model_files_fingerprint() is not None
+    assert service.load_model_assets()
+    assert service.model_load_error is None
+
+def test_reload_refuses_file_not_in_manifest(service, synthetic_assets, model_dir):
+    save_model_assets(synthetic_assets, str(model_dir))
+    assert service.load_model_assets()
+    version = service.model_version()
+    # Another training run has replaced the imputer but not yet the manifest
+    dump_artifact({'replaced': True}, os.path.join(model_dir, 'imputer.pkl'))
+    assert not service.load_model_assets()
+    assert MANIFEST_FILE in service.model_load_error
+    assert service.model_version() == version
+
+def test_cold_start_checks_stats_not_digests(synthetic_assets, tmp_path, monkeypatch):
+    save_model_assets(synthetic_assets, str(tmp_path))
+    manifest = read_manifest(str(tmp_path))
+    hashed = []
+    monkeypatch.setattr(model_manifest, 'file_digest', lambda path: hashed.append(path) or '')
+    verify_manifest(str(tmp_path), manifest, digests=False)
+    assert hashed == []
+    # A file replaced since the manifest was written is hashed (and refused)
+    dump_artifact({'replaced': True}, os.path.join(tmp_path, 'imputer.pkl'))
+    with pytest.raises(ManifestMismatch):
+        verify_manifest(str(tmp_path), manifest, digests=False)
+    assert hashed == [os.path.join(tmp_path, 'imputer.pkl')]
+
+def test_reload_refuses_mismatched_feature_stats(service, synthetic_assets, model_dir):
+    save_model_assets(synthetic_assets, str(model_dir))
+    assert service.load_model_assets()
+    version = service.model_version()
+    imputer = copy.deepcopy(synthetic_assets['imputer'])
+    imputer.statistics_ = imputer.statistics_ + 1.0
+    save_model_assets(dict(synthetic_assets, imputer=imputer), str(model_dir))
+    assert not service.load_model_assets()
+    assert 'Feature stats' in service.model_load_error
+    assert service.model_version() == version
+
+def test_manifest_change_is_seen_by_watcher(service, synthetic_assets, model_dir):
+    save_model_assets(synthetic_assets, str(model_dir))
+    before = service.model_files_fingerprint()
+    os.utime(os.path.join(model_dir, MANIFEST_FILE), ns=(0, 0))
+    write_manifest(str(model_dir))
+    assert service.model_files_fingerprint() != before
+
+def test_request_keeps_its_assets_across_reload(service, client, payloads, monkeypatch):
+    started = service.current_assets
+    reloaded = started._replace(threshold=1.0, fingerprint='reloaded')
+    predict_matrix = service.predict_matrix
+    
+    def reload_while_scoring(X, assets=None):
+        service.publish_model_assets(reloaded)
+        return predict_matrix(X, assets)
+    monkeypatch.setattr(service, 'predict_matrix', reload_while_scoring)
+    try:
+        result = client.post('/predict', json=payloads[1]).get_json()
+        assert result['threshold_used'] == started.threshold
+        # Cached under the fingerprint it was scored with, not the new one
+        monkeypatch.setattr(service, 'predict_matrix', predict_matrix)
+        assert client.post('/predict', json=payloads[1]).get_json()['threshold_used'] == 1.0
+    finally:
+        service.publish_model_assets(started)
+
+def test_micro_batches_never_mix_assets():
+    calls = []
+    
+    def predict(X, context):
+        calls.append((len(X), context))
+        return np.zeros(len(X))
+    batcher = MicroBatcher(predict, max_batch_size=5, max_wait_ms=1000)
+    futures = [batcher.submit(np.zeros(3), context) for context in ('old', 'old', 'new', 'old', 'new')]
+    for future in futures:
+        future.result(5)
+    assert batcher.stats()['batches'] == 1
+    assert sorted(calls) == [(2, 'new'), (3, 'old')]
@@ -0,0 +1,34 @@
+# ml_model/tests/test_threshold_analysis.py
+
+"""
+ThresholdSweep (threshold_analysis.py) against the per-threshold sklearn
+metric calls it replaced: the training F1 search over every ROC threshold
+and the optimize_threshold.py grid loop.
+"""
+
+import numpy as np
+import pytest
+from sklearn.metrics import roc_curve
+
+from reference_impl import THRESHOLD_GRID, legacy_f1_search, legacy_threshold_grid
+from synthetic_data import synthetic_scores
+from threshold_analysis import DEFAULT_THRESHOLD, best_threshold, package_threshold, threshold_table
+
+@pytest.mark.parametrize('rows', [100, 1000])
+def test_best_threshold_matches_f1_search(rows):
+    y_true, scores = synthetic_scores(rows, seed=rows)
+    _, _, thresholds = roc_curve(y_true, scores)
+    best, _ = best_threshold(y_true, scores, thresholds)
+    assert best == legacy_f1_search(y_true, scores, thresholds)
+
+@pytest.mark.parametrize('rows', [100, 10000])
+def test_threshold_table_matches_sklearn(rows):
+    y_true, scores = synthetic_scores(rows, seed=rows)
+    table = threshold_table(y_true, scores, THRESHOLD_GRID)
+    actual = table[['accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'fp', 'fn', 'tp', 'tn']].to_numpy()
+    np.testing.assert_allclose(actual, legacy_threshold_grid(y_true, scores), rtol=0, atol=1e-12)
+
+def test_package_threshold_reads_older_packages():
+    assert package_threshold({'optimal_threshold': 0.4, 'threshold': 0.3}) == 0.4
+    assert package_threshold({'threshold': 0.3}) == 0.3
+    assert package_threshold({}) == package_threshold(None) == DEFAULT_THRESHOLD
@@ -0,0 +1,25 @@
+# ml_model/tests/test_training_cache.py
+
+"""
+train_model.py keeps every cached stage, the out-of-fold stacking
+predictions included, in the directory of the ArtifactCache it is given.
+"""
+
+import contextlib
+import io
+
+from synthetic_data import make_startup_frame
+from train_model import build_near_perfect_model
+from training_data import ArtifactCache
+
+def test_oof_predictions_use_the_artifact_cache(tmp_path, monkeypatch):
+    default_dir = tmp_path / 'default_cache'
+    monkeypatch.setenv('TRAINING_CACHE_DIR', str(default_dir))
+    data_path = tmp_path / 'startup data.csv'
+    make_startup_frame(400, seed=9).to_csv(data_path, index=False)
+    cache_dir = tmp_path / 'cache'
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_near_perfect_model(str(data_path), str(tmp_path), cache=ArtifactCache(str(cache_dir)), n_estimators=5)
+
+    assert len(list(cache_dir.glob('oof_*.npy'))) == 3
+    assert not default_dir.exists()
@@ -0,0 +1,99 @@
+# ml_model/threshold_analysis.py
+
+"""
+Confusion-matrix metrics for many decision thresholds at once.
+
+The scores are sorted once; with a cumulative count of positives over the
+sorted order, the TP/FP/FN/TN counts for any threshold are a binary search
+away, so a sweep over the whole curve (or any threshold grid) costs
+O(n log n) instead of re-thresholding and re-scoring the vector for every
+candidate. A row is predicted positive when its score >= threshold, as in
+the training and serving code.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+# Served when a model package records no threshold
+DEFAULT_THRESHOLD = 0.20
+
+def package_threshold(package):
+    """
+    The decision threshold saved in a model package: 'optimal_threshold',
+    or 'threshold' in packages train_model.py wrote before the two agreed.
+    """
+    if not package:
+        return DEFAULT_THRESHOLD
+    return package.get('optimal_threshold', package.get('threshold', DEFAULT_THRESHOLD))
+
+class ThresholdSweep:
+    """Sorted scores and cumulative label counts for one (y_true, scores) pair"""
+
+    def __init__(self, y_true, scores):
+        y_true = np.asarray(y_true).astype(bool).ravel()
+        scores = np.asarray(scores, dtype=np.float64).ravel()
+        order = np.argsort(scores, kind='mergesort')
+        self.sorted_scores = scores[order]
+        # positives_below[k]: positives among the k lowest scores
+        self.positives_below = np.concatenate([[0], np.cumsum(y_true[order])])
+        self.n_samples = scores.size
+        self.n_positive = int(self.positives_below[-1])
+
+    def candidate_thresholds(self):
+        """Every distinct score, highest first: the thresholds at which a prediction changes"""
+        return np.unique(self.sorted_scores)[::-1]
+
+    def counts(self, thresholds=None):
+        """(tp, fp, fn, tn) arrays, one entry per threshold"""
+        thresholds = self.candidate_thresholds() if thresholds is None else np.asarray(thresholds, dtype=np.float64)
+        below = np.searchsorted(self.sorted_scores, thresholds, side='left')
+        fn = self.positives_below[below]
+        tn = below - fn
+        tp = self.n_positive - fn
+        fp = (self.n_samples - below) - tp
+        return tp, fp, fn, tn
+
+    def metrics(self, thresholds=None, fp_cost=1.0, fn_cost=1.0):
+        """
+        DataFrame of counts, accuracy, precision, recall, F1 and the weighted
+        error cost (fp_cost * FP + fn_cost * FN) per threshold; ratios with a
+        zero denominator are 0, like sklearn's zero_division=0
+        """
+        thresholds = self.candidate_thresholds() if thresholds is None else np.asarray(thresholds, dtype=np.float64)
+        tp, fp, fn, tn = self.counts(thresholds)
+        return pd.DataFrame({
+            'threshold': thresholds,
+            'accuracy': _ratio(tp + tn, self.n_samples),
+            'precision': _ratio(tp, tp + fp),
+            'recall': _ratio(tp, tp + fn),
+            'f1': _ratio(2 * tp, 2 * tp + fp + fn),
+            'fp': fp,
+            'fn': fn,
+            'tp': tp,
+            'tn': tn,
+            'total_errors': fp + fn,
+            'cost': fp_cost * fp + fn_cost * fn,
+        })
+
+def _ratio(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.broadcast_to(np.asarray(denominator, dtype=np.float64), numerator.shape)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+def threshold_table(y_true, scores, thresholds=None, fp_cost=1.0, fn_cost=1.0):
+    """Per-threshold metrics (see ThresholdSweep.metrics) plus the threshold-free ROC-AUC"""
+    table = ThresholdSweep(y_true, scores).metrics(thresholds, fp_cost, fn_cost)
+    table.insert(5, 'roc_auc', roc_auc_score(y_true, scores))
+    return table
+
+def best_threshold(y_true, scores, thresholds=None, objective='f1', fp_cost=1.0, fn_cost=1.0):
+    """
+    (threshold, metrics row) maximizing `objective` ('f1', 'accuracy',
+    'precision', 'recall') or, for objective='cost', minimizing the weighted
+    error cost; ties go to the first threshold in the grid
+    """
+    table = ThresholdSweep(y_true, scores).metrics(thresholds, fp_cost, fn_cost)
+    best = table['cost'].idxmin() if objective == 'cost' else table[objective].idxmax()
+    row = table.loc[best]
+    return row['threshold'], row
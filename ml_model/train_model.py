@@ -1,170 +1,115 @@
 # ml_model/train_model_advanced.py
 
 import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split, StratifiedKFold, cross_val_score
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
 from sklearn.impute import SimpleImputer
-from xgboost import XGBClassifier
-from lightgbm import LGBMClassifier
-from sklearn.ensemble import RandomForestClassifier, VotingClassifier, StackingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import (accuracy_score, precision_score, recall_score, 
                              f1_score, roc_auc_score, classification_report, 
                              confusion_matrix, roc_curve)
-from imblearn.over_sampling import SMOTE
-from imblearn.combine import SMOTETomek
-import joblib
+import argparse
+import os
 import warnings
+from contextlib import nullcontext
+from features import add_engineered_features
+from training_data import ArtifactCache, default_cache, fit_preprocessing, load_feature_matrix, resample
+from oof_stacking import fit_stacking, cross_validate_stack, base_model_scores
+from threshold_analysis import best_threshold
+from training_profile import run_profile, run_scaling
+from rebalancing import STRATEGIES, class_weight_params, make_resampler, rebalance_strategy
+from distillation import STUDENT_MODEL_FILE, fidelity_report, fit_student
+from fast_inference import dump_artifact
+from feature_stats import fit_feature_stats
+from hyperparameter_search import make_base_model, search_hyperparameters
+from incremental_training import training_data_record, update_model
+from model_manifest import MANIFEST_FILE, MODEL_FILES, write_manifest
 warnings.filterwarnings('ignore')
 
 def advanced_feature_engineering(df):
     """
     Advanced feature engineering with interaction terms and domain knowledge
+    (see features.py for the feature definitions)
     """
     print("   → Creating advanced features...")
     
-    # === Time-based features ===
-    df['days_to_first_funding'] = (df['first_funding_at'] - df['founded_at']).dt.days
-    df['days_funding_active'] = (df['last_funding_at'] - df['first_funding_at']).dt.days
-    df['days_since_founding'] = (df['last_funding_at'] - df['founded_at']).dt.days
-    
-    epsilon = 0.01
-    df['years_active'] = (df['days_funding_active'] / 365.25).clip(lower=epsilon)
-    df['years_since_founding'] = (df['days_since_founding'] / 365.25).clip(lower=epsilon)
-    
-    # === Funding efficiency metrics ===
-    df['funding_momentum'] = df['funding_total_usd'] / df['years_active']
-    df['avg_funding_per_round'] = df['funding_total_usd'] / df['funding_rounds'].replace(0, 1)
-    df['funding_concentration'] = df['avg_funding_per_round'] / (df['funding_total_usd'] + 1)
-    df['funding_growth_rate'] = df['funding_total_usd'] / df['years_since_founding']
-    
-    # === Milestone metrics ===
-    df['milestone_years'] = (df['age_last_milestone_year'] - df['age_first_milestone_year']).clip(lower=epsilon)
-    df['milestone_velocity'] = df['milestones'] / df['milestone_years']
-    df['milestones_per_year_active'] = df['milestones'] / df['years_active']
-    df['milestone_density'] = df['milestones'] / (df['days_since_founding'] + 1)
-    
-    # === Relationship & network metrics ===
-    df['relationships_per_year'] = df['relationships'] / df['years_active']
-    df['relationship_efficiency'] = df['relationships'] / (df['funding_rounds'] + 1)
-    df['network_strength'] = df['relationships'] * df['avg_participants']
-    
-    # === Interaction features (critical for non-linear patterns) ===
-    df['funding_x_relationships'] = df['funding_total_usd'] * df['relationships']
-    df['rounds_x_participants'] = df['funding_rounds'] * df['avg_participants']
-    df['milestones_x_relationships'] = df['milestones'] * df['relationships']
-    df['top500_x_funding'] = df['is_top500'] * df['funding_total_usd']
-    
-    # === Round progression features ===
-    round_cols = [col for col in df.columns if col.startswith('has_round')]
-    if round_cols:
-        df['total_rounds_reached'] = df[round_cols].sum(axis=1)
-        df['reached_late_stage'] = ((df.get('has_roundC', 0) == 1) | 
-                                     (df.get('has_roundD', 0) == 1)).astype(int)
-    
-    # === Risk indicators ===
-    df['early_stage_only'] = ((df['funding_rounds'] <= 2) & 
-                               (df['funding_total_usd'] < df['funding_total_usd'].median())).astype(int)
-    df['slow_milestone'] = (df['milestone_velocity'] < df['milestone_velocity'].quantile(0.25)).astype(int)
-    df['low_participation'] = (df['avg_participants'] < 2).astype(int)
-    
-    # === Binary flags ===
-    df['same_day_funding'] = (df['days_funding_active'] == 0).astype(int)
-    df['quick_first_funding'] = (df['days_to_first_funding'] < 30).astype(int)
-    df['long_founding_period'] = (df['days_to_first_funding'] > 365).astype(int)
-    
-    # === Polynomial features for key metrics ===
-    df['funding_squared'] = np.log1p(df['funding_total_usd']) ** 2
-    df['relationships_squared'] = df['relationships'] ** 2
-    
-    return df
+    return add_engineered_features(df)
 
-def build_near_perfect_model():
+def build_near_perfect_model(data_path='startup data.csv', output_dir='.', profiler=None, cache=None,
+                             n_estimators=500, rebalance=None, distill=False, student_estimators=100,
+                             search_trials=0, search_eta=3, search_dir='hyperparameter_search'):
     """
-    Advanced ensemble model with SMOTE, stacking, and optimized thresholds
+    Advanced ensemble model with SMOTE, stacking, and optimized thresholds.
+    
+    Artifacts are written to output_dir. A training_profile.StageProfiler
+    passed as profiler times each stage; rebalance picks a strategy from
+    rebalancing.py (default TRAINING_REBALANCE). distill also trains the
+    low-latency student model (see distillation.py). search_trials > 0
+    first tunes the base models with successive halving, checkpointed in
+    search_dir (see hyperparameter_search.py). Returns the test-set metrics.
     """
+    rebalance = rebalance or rebalance_strategy()
+    stage = profiler.stage if profiler else (lambda name: nullcontext())
+    output = lambda name: os.path.join(output_dir, name)
     
     # ==================== DATA LOADING ====================
-    try:
-        df = pd.read_csv('startup data.csv')
-        print(f"Dataset loaded successfully. Shape: {df.shape}")
-    except FileNotFoundError:
-        print("\nERROR: 'startup data.csv' not found.")
-        return
+    # Stage outputs are cached in TRAINING_CACHE_DIR, keyed by the CSV
+    # contents, the feature code and each stage's parameters
+    cache = cache or default_cache()
     
     # ==================== DATA CLEANING ====================
-    print("\n[1/8] Cleaning data...")
-    
-    drop_cols = ['Unnamed: 0', 'state_code', 'latitude', 'longitude', 
-                 'zip_code', 'id', 'city', 'Unnamed: 6', 'name', 
-                 'labels', 'object_id']
-    df.drop(columns=drop_cols, inplace=True, errors='ignore')
-    
-    date_cols = ['founded_at', 'closed_at', 'first_funding_at', 'last_funding_at']
-    for col in date_cols:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
+    print("\n[1/8] Loading and cleaning data...")
     
-    df = df[df['status'].isin(['acquired', 'closed'])].copy()
-    df['success'] = (df['status'] == 'acquired').astype(int)
+    try:
+        X, y, le, features_key = load_feature_matrix(data_path, cache, timer=stage)
+        print(f"Dataset loaded successfully. Shape: {X.shape}")
+    except FileNotFoundError:
+        print(f"\nERROR: '{data_path}' not found.")
+        return
     
-    print(f"   ✓ Success rate: {df['success'].mean():.2%}")
-    print(f"   ✓ Acquired: {(df['success']==1).sum()}, Closed: {(df['success']==0).sum()}")
+    print(f"   ✓ Success rate: {y.mean():.2%}")
+    print(f"   ✓ Acquired: {(y==1).sum()}, Closed: {(y==0).sum()}")
     
     # ==================== ADVANCED FEATURE ENGINEERING ====================
     print("\n[2/8] Advanced feature engineering...")
     
-    df = advanced_feature_engineering(df)
-    
-    # Encode category with frequency encoding (better than label encoding)
-    category_freq = df['category_code'].value_counts(normalize=True).to_dict()
-    df['category_frequency'] = df['category_code'].map(category_freq)
-    
-    le = LabelEncoder()
-    df['category_code'] = le.fit_transform(df['category_code'].astype(str))
-    joblib.dump(le, 'category_encoder.pkl')
-    
-    # Drop temporal columns
-    df.drop(columns=['status', 'founded_at', 'closed_at', 'first_funding_at', 
-                     'last_funding_at', 'years_active', 'milestone_years', 
-                     'years_since_founding'], inplace=True)
-    
-    # Keep only numeric features
-    df = df.select_dtypes(include=np.number)
-    df.replace([np.inf, -np.inf], np.nan, inplace=True)
-    
-    print(f"   ✓ Total features created: {df.shape[1] - 1}")
+    print(f"   ✓ Total features created: {X.shape[1]}")
     
     # ==================== PREPROCESSING ====================
     print("\n[3/8] Preprocessing...")
     
-    X = df.drop('success', axis=1)
-    y = df['success']
+    # Impute missing values, then scale features (important for stacking)
+    with stage('preprocessing'):
+        X_scaled, imputer, scaler, preprocessing_key = fit_preprocessing(
+            X, SimpleImputer(strategy='median'), StandardScaler(), features_key, cache
+        )
     
-    # Impute missing values
-    imputer = SimpleImputer(strategy='median')
-    X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=X.columns)
-    joblib.dump(imputer, 'imputer.pkl')
-    
-    # Scale features (important for stacking)
-    scaler = StandardScaler()
-    X_scaled = pd.DataFrame(scaler.fit_transform(X_imputed), columns=X.columns)
-    joblib.dump(scaler, 'scaler.pkl')
+    # Category frequencies, risk-flag cut-offs and medians for serving
+    feature_stats = fit_feature_stats(X, le, imputer)
+    print(f"   ✓ Feature stats: {len(le.classes_)} categories, "
+          f"early-stage funding < {feature_stats.early_stage_funding:,.0f}, "
+          f"slow milestones < {feature_stats.slow_milestone_velocity:.3f}/year")
     
     # ==================== TRAIN/TEST SPLIT ====================
     print("\n[4/8] Splitting data...")
     
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y, test_size=0.2, random_state=42, stratify=y
-    )
+    with stage('split'):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_scaled, y, test_size=0.2, random_state=42, stratify=y
+        )
+    split_key = ArtifactCache.key(preprocessing_key, 'split', 0.2, 42)
     
     print(f"   ✓ Train: {X_train.shape[0]}, Test: {X_test.shape[0]}, Features: {X_train.shape[1]}")
     
     # ==================== HANDLE CLASS IMBALANCE ====================
-    print("\n[5/8] Balancing classes with SMOTE + Tomek Links...")
+    print(f"\n[5/8] Balancing classes ({rebalance})...")
     
-    smote_tomek = SMOTETomek(random_state=42)
-    X_train_balanced, y_train_balanced = smote_tomek.fit_resample(X_train, y_train)
+    resampler = make_resampler(rebalance)
+    with stage('resample'):
+        if resampler is None:
+            X_train_balanced, y_train_balanced = X_train, y_train
+        else:
+            X_train_balanced, y_train_balanced = resample(X_train, y_train, resampler, split_key, cache)
     
     print(f"   ✓ Before: {y_train.value_counts().to_dict()}")
     print(f"   ✓ After: {pd.Series(y_train_balanced).value_counts().to_dict()}")
@@ -172,86 +117,70 @@ def build_near_perfect_model():
     # ==================== BUILD ENSEMBLE MODEL ====================
     print("\n[6/8] Building advanced ensemble model...")
     
-    # Base models with optimized hyperparameters
-    xgb = XGBClassifier(
-        n_estimators=500,
-        max_depth=8,
-        learning_rate=0.05,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        min_child_weight=3,
-        gamma=0.1,
-        reg_alpha=0.1,
-        reg_lambda=1,
-        eval_metric='logloss',
-        random_state=42,
-        use_label_encoder=False
-    )
-    
-    lgbm = LGBMClassifier(
-        n_estimators=500,
-        max_depth=8,
-        learning_rate=0.05,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        min_child_weight=3,
-        reg_alpha=0.1,
-        reg_lambda=1,
-        random_state=42,
-        verbose=-1
-    )
-    
-    rf = RandomForestClassifier(
-        n_estimators=500,
-        max_depth=12,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        max_features='sqrt',
-        random_state=42,
-        n_jobs=-1
-    )
-    
-    # Stacking ensemble with logistic regression meta-learner
+    # Base models with the hand-picked hyperparameters, or the best found by
+    # the search (plus class weights when rebalancing by weighting instead
+    # of resampling)
+    hyperparameters = {name: {'n_estimators': n_estimators, 'params': {}} for name in ('xgb', 'lgbm', 'rf')}
+    search_summary = None
+    if search_trials:
+        with stage('hyperparameter_search'):
+            hyperparameters = search_hyperparameters(
+                X_train, y_train, split_key, cache, rebalance, n_estimators=n_estimators,
+                n_trials=search_trials, eta=search_eta, checkpoint_dir=search_dir
+            )
+        search_summary = hyperparameters.pop('search')
+        for name, best in hyperparameters.items():
+            print(f"   ✓ {name}: {best['n_estimators']} trees, {best['params'] or 'hand-picked defaults'} "
+                  f"(held-out ROC-AUC {best['validation_roc_auc']:.4f})")
+        print(f"   ✓ Search: {search_summary['trials_fitted']} trials fitted, "
+              f"{search_summary['trials_reused']} reused from {search_dir}, {search_summary['seconds']:.1f}s")
+    
+    class_weights = class_weight_params(rebalance, y_train_balanced)
+    xgb, lgbm, rf = (make_base_model(name, hyperparameters[name]['n_estimators'], hyperparameters[name]['params'],
+                                     class_weights[name]) for name in ('xgb', 'lgbm', 'rf'))
+    
+    # Stacking ensemble with logistic regression meta-learner. Out-of-fold
+    # base model predictions are computed once (cached in the same directory
+    # as the other stages) and shared by the meta-learner and the CV metrics below
     print("   → Training stacked ensemble...")
     
-    stacking_model = StackingClassifier(
-        estimators=[
-            ('xgb', xgb),
-            ('lgbm', lgbm),
-            ('rf', rf)
-        ],
-        final_estimator=LogisticRegression(max_iter=1000, random_state=42),
-        cv=5,
-        n_jobs=-1
-    )
+    base_models = [
+        ('xgb', xgb),
+        ('lgbm', lgbm),
+        ('rf', rf)
+    ]
+    meta_learner = LogisticRegression(max_iter=1000, random_state=42)
     
-    stacking_model.fit(X_train_balanced, y_train_balanced)
+    with stage('stacking_fit'):
+        stacking_model, oof_predictions, folds = fit_stacking(
+            base_models, meta_learner, X_train_balanced, y_train_balanced, cv=5,
+            cache_dir=cache.directory
+        )
     
     # ==================== CROSS-VALIDATION ====================
     print("\n[7/8] Cross-validating model...")
     
-    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-    cv_scores = cross_val_score(stacking_model, X_train_balanced, y_train_balanced, 
-                                 cv=cv, scoring='roc_auc', n_jobs=-1)
+    with stage('cross_validation'):
+        oof_scores = base_model_scores(oof_predictions, y_train_balanced, [name for name, _ in base_models])
+        cv_scores = cross_validate_stack(oof_predictions, y_train_balanced, meta_learner, folds)
+    
+    for name, score in oof_scores.items():
+        print(f"   ✓ {name} out-of-fold ROC-AUC: {score:.4f}")
     
     print(f"   ✓ CV ROC-AUC: {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
     
     # ==================== OPTIMIZE DECISION THRESHOLD ====================
     print("\n[8/8] Optimizing decision threshold...")
     
-    y_pred_proba = stacking_model.predict_proba(X_test)[:, 1]
+    with stage('predict_test'):
+        y_pred_proba = stacking_model.predict_proba(X_test)[:, 1]
     
-    # Find optimal threshold using ROC curve
-    fpr, tpr, thresholds = roc_curve(y_test, y_pred_proba)
-    
-    # Maximize F1-score
-    f1_scores = []
-    for threshold in thresholds:
-        y_pred_thresh = (y_pred_proba >= threshold).astype(int)
-        f1_scores.append(f1_score(y_test, y_pred_thresh))
-    
-    optimal_idx = np.argmax(f1_scores)
-    optimal_threshold = thresholds[optimal_idx]
+    with stage('threshold'):
+        # Find optimal threshold using ROC curve
+        fpr, tpr, thresholds = roc_curve(y_test, y_pred_proba)
+        
+        # Maximize F1-score (one sorted pass over all ROC thresholds)
+        optimal_threshold, _ = best_threshold(y_test, y_pred_proba, thresholds, objective='f1')
     
     print(f"   ✓ Optimal threshold: {optimal_threshold:.4f}")
     
@@ -297,7 +226,28 @@ def build_near_perfect_model():
     for idx, row in feature_importance.head(15).iterrows():
         print(f"   {row['feature']:35s}: {row['importance']:.4f}")
     
-    feature_importance.to_csv('feature_importance.csv', index=False)
+    feature_importance.to_csv(output('feature_importance.csv'), index=False)
+    
+    # ==================== DISTILLATION ====================
+    student = None
+    if distill:
+        print(f"\nDistilling low-latency student model ({student_estimators} trees)...")
+        
+        # Soft targets are the served ensemble's own probabilities on the
+        # training rows (closer on the test set than its out-of-fold ones)
+        with stage('distill'):
+            teacher_train_proba = stacking_model.predict_proba(X_train_balanced)[:, 1]
+            student = fit_student(X_train_balanced, teacher_train_proba, n_estimators=student_estimators)
+            student_proba = student.predict_proba(X_test)[:, 1]
+        fidelity = fidelity_report(y_test, y_pred_proba, student_proba, optimal_threshold)
+        
+        print(f"                 Teacher   Student   Gap")
+        print(f"ROC-AUC:         {fidelity['teacher_roc_auc']:.4f}    {fidelity['student_roc_auc']:.4f}    "
+              f"{fidelity['roc_auc_gap']:+.4f}")
+        print(f"F1-Score:        {fidelity['teacher_f1']:.4f}    {fidelity['student_f1']:.4f}    "
+              f"{fidelity['f1_gap']:+.4f}")
+        print(f"   ✓ Same decision on {fidelity['decision_agreement']:.2%} of test rows, "
+              f"mean probability difference {fidelity['mean_abs_probability_diff']:.4f}")
     
     # ==================== SAVE MODEL ====================
     print("\n" + "="*70)
@@ -305,16 +255,44 @@ def build_near_perfect_model():
     
     model_package = {
         'model': stacking_model,
-        'threshold': optimal_threshold,
-        'feature_names': X.columns.tolist()
+        'optimal_threshold': optimal_threshold,
+        'feature_names': X.columns.tolist(),
+        'feature_stats': feature_stats,
+        'hyperparameters': hyperparameters,
+        # Lets train_model.py --incremental continue this model on appended rows
+        'training_data': training_data_record(data_path, len(y), X_test.index, rebalance)
     }
-    
-    joblib.dump(model_package, 'startup_success_model_advanced.pkl')
+    if search_summary is not None:
+        model_package['hyperparameter_search'] = search_summary
+    
+    # Everything is written together at the end, then the manifest that a
+    # serving app.py reloads on (see model_manifest.py)
+    with stage('save'):
+        dump_artifact(le, output('category_encoder.pkl'))
+        dump_artifact(imputer, output('imputer.pkl'))
+        dump_artifact(scaler, output('scaler.pkl'))
+        dump_artifact(model_package, output('startup_success_model_advanced.pkl'))
+        if student is not None:
+            dump_artifact({
+                'model': student,
+                'threshold': optimal_threshold,
+                'feature_names': X.columns.tolist(),
+                'fidelity': fidelity
+            }, output(STUDENT_MODEL_FILE))
+        elif os.path.exists(output(STUDENT_MODEL_FILE)):
+            # A student distilled from the previous ensemble no longer matches
+            # the new preprocessing
+            os.remove(output(STUDENT_MODEL_FILE))
+            print(f"✓ Removed stale {STUDENT_MODEL_FILE}")
+        write_manifest(output_dir, MODEL_FILES + ((STUDENT_MODEL_FILE,) if student is not None else ()))
     
     print("✓ Advanced model saved: startup_success_model_advanced.pkl")
+    if student is not None:
+        print(f"✓ Student model saved: {STUDENT_MODEL_FILE}")
     print("✓ Scaler saved: scaler.pkl")
     print("✓ Imputer saved: imputer.pkl")
     print("✓ Encoder saved: category_encoder.pkl")
+    print(f"✓ Manifest saved: {MANIFEST_FILE}")
     print("✓ Feature importance saved: feature_importance.csv")
     print("="*70)
     
@@ -331,6 +309,70 @@ def build_near_perfect_model():
     print(f"False Pos:  25 → {cm[0,1]}  ({cm[0,1]-25:+d})")
     print(f"False Neg:  17 → {cm[1,0]}  ({cm[1,0]-17:+d})")
     print("="*70)
+    
+    metrics = {'rebalance': rebalance, 'train_rows': len(y_train_balanced), 'accuracy': accuracy,
+               'precision': precision, 'recall': recall, 'f1': f1, 'roc_auc': roc_auc,
+               'threshold': float(optimal_threshold)}
+    if student is not None:
+        metrics['student'] = fidelity
+    if search_summary is not None:
+        metrics['hyperparameters'] = hyperparameters
+    return metrics
 
 if __name__ == '__main__':
-    build_near_perfect_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the startup success ensemble')
+    parser.add_argument('--profile', action='store_true',
+                        help='record per-stage wall/CPU time and peak memory plus a cProfile dump')
+    parser.add_argument('--sample-frac', type=float, help='profile on this fraction of the dataset rows')
+    parser.add_argument('--synthetic-rows', type=int, help='profile on a synthetic dataset of this size')
+    parser.add_argument('--scaling', type=int, nargs='+', metavar='ROWS',
+                        help='profile each synthetic dataset size and print a scaling table')
+    parser.add_argument('--profile-dir', default='training_profile',
+                        help='where profiling runs write their artifacts and reports')
+    parser.add_argument('--n-estimators', type=int, default=500)
+    parser.add_argument('--rebalance', choices=STRATEGIES,
+                        help='class rebalancing strategy (default TRAINING_REBALANCE or smote_tomek)')
+    parser.add_argument('--distill', action='store_true',
+                        help=f'also train the low-latency student model ({STUDENT_MODEL_FILE})')
+    parser.add_argument('--student-estimators', type=int, default=100,
+                        help='trees in the distilled student model')
+    parser.add_argument('--search', type=int, nargs='?', const=27, default=0, metavar='TRIALS',
+                        help='tune the base models first with successive halving over TRIALS configurations each '
+                             '(default 27)')
+    parser.add_argument('--search-eta', type=int, default=3,
+                        help='successive halving keeps 1/ETA of the configurations per rung')
+    parser.add_argument('--search-dir', default='hyperparameter_search',
+                        help='trial checkpoint directory; a rerun resumes from it (delete it to start over)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='continue the saved model on rows appended to the CSV since it was trained '
+                             '(falls back to a full rebuild when it cannot)')
+    parser.add_argument('--incremental-trees', type=int, default=50,
+                        help='trees (boosting rounds) added to each base model by --incremental')
+    parser.add_argument('--use-cache', action='store_true',
+                        help='let profiling runs read TRAINING_CACHE_DIR (off so stages are measured cold)')
+    args = parser.parse_args()
+    search = dict(search_trials=args.search, search_eta=args.search_eta, search_dir=args.search_dir)
+    
+    # Profiling runs never overwrite the production artifacts and, unless
+    # asked, bypass the training cache so every stage does its full work
+    profile_cache = default_cache() if args.use_cache else ArtifactCache('')
+    if args.scaling:
+        run_scaling(build_near_perfect_model, args.profile_dir, args.scaling,
+                    cache=profile_cache, n_estimators=args.n_estimators,
+                    rebalance=args.rebalance, distill=args.distill, student_estimators=args.student_estimators,
+                    **search)
+    elif args.profile or args.sample_frac or args.synthetic_rows:
+        run_profile(build_near_perfect_model, args.profile_dir, sample_frac=args.sample_frac,
+                    synthetic_rows=args.synthetic_rows, cache=profile_cache, n_estimators=args.n_estimators,
+                    rebalance=args.rebalance, distill=args.distill, student_estimators=args.student_estimators,
+                    **search)
+    else:
+        rebuild = True
+        if args.incremental:
+            # update_model returns None when the saved model cannot be continued
+            rebuild = update_model(extra_trees=args.incremental_trees, rebalance=args.rebalance) is None
+            if rebuild:
+                print("\n→ Running a full rebuild instead")
+        if rebuild:
+            build_near_perfect_model(n_estimators=args.n_estimators, rebalance=args.rebalance,
+                                     distill=args.distill, student_estimators=args.student_estimators, **search)
\ No newline at end of file
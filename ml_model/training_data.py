@@ -0,0 +1,223 @@
+# ml_model/training_data.py
+
+"""
+Training data preparation with a content-addressed artifact cache.
+
+train_model.py and optimize_threshold.py both parse 'startup data.csv',
+engineer features, impute/scale and (for training) resample. Each stage's
+output is stored under TRAINING_CACHE_DIR as .npy arrays plus the fitted
+objects, keyed by a hash of its inputs: the CSV contents and the feature
+code for the feature matrix, that key plus the preprocessing parameters for
+the scaled matrix, and so on. Repeat runs load the arrays memory-mapped
+instead of recomputing them; editing the CSV, features.py or this file
+invalidates the affected entries.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import nullcontext
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from date_parsing import to_datetime64
+from features import add_engineered_features
+
+DROP_COLUMNS = ['Unnamed: 0', 'state_code', 'latitude', 'longitude',
+                'zip_code', 'id', 'city', 'Unnamed: 6', 'name',
+                'labels', 'object_id']
+DATE_COLUMNS = ['founded_at', 'closed_at', 'first_funding_at', 'last_funding_at']
+
+# Source files whose contents define how the feature matrix is computed
+CODE_FILES = ('features.py', 'date_parsing.py', 'training_data.py')
+
+def training_cache_dir():
+    """Directory for cached training artifacts (TRAINING_CACHE_DIR, default ./training_cache; empty disables)"""
+    return os.environ.get('TRAINING_CACHE_DIR', 'training_cache')
+
+def file_digest(path):
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def code_version():
+    """Hash of the feature engineering code, so cached features follow code changes"""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return hashlib.sha256(''.join(file_digest(os.path.join(base_dir, name)) for name in CODE_FILES)
+                          .encode()).hexdigest()[:16]
+
+def params_signature(estimator):
+    """Stable description of an estimator's class and parameters for cache keys"""
+    return f'{type(estimator).__name__}:{sorted(estimator.get_params(deep=False).items())!r}'
+
+class ArtifactCache:
+    """
+    Directory of cache entries, one subdirectory per key holding .npy arrays,
+    a joblib file of fitted objects and a JSON metadata file
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(':'.join(str(part) for part in parts).encode()).hexdigest()[:24]
+
+    def load(self, key):
+        """(arrays, objects, metadata) for a key, arrays memory-mapped read-only, or None"""
+        if not self.directory:
+            return None
+        entry = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(entry, 'metadata.json')) as f:
+                metadata = json.load(f)
+            arrays = {name: np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='r')
+                      for name in metadata['arrays']}
+            objects = joblib.load(os.path.join(entry, 'objects.joblib'))
+        except (OSError, ValueError, KeyError, EOFError):
+            return None
+        return arrays, objects, metadata
+
+    def save(self, key, arrays, objects=None, metadata=None):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Write into a scratch directory and rename it into place, so readers
+        # never see a half-written entry
+        tmp_entry = tempfile.mkdtemp(prefix=f'.{key}.', dir=self.directory)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_entry, f'{name}.npy'), np.ascontiguousarray(array))
+            joblib.dump(objects or {}, os.path.join(tmp_entry, 'objects.joblib'))
+            with open(os.path.join(tmp_entry, 'metadata.json'), 'w') as f:
+                json.dump(dict(metadata or {}, arrays=list(arrays)), f)
+            entry = os.path.join(self.directory, key)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp_entry, entry)
+        finally:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+def default_cache():
+    return ArtifactCache(training_cache_dir())
+
+def _no_timer(stage):
+    return nullcontext()
+
+def _clean(df):
+    df = df.drop(columns=DROP_COLUMNS, errors='ignore')
+    for col in DATE_COLUMNS:
+        df[col] = to_datetime64(df[col])
+
+    df = df[df['status'].isin(['acquired', 'closed'])].copy()
+    df['success'] = (df['status'] == 'acquired').astype(int)
+    return df
+
+def _numeric_features(df):
+    """(X, y) once the categories are encoded: drop temporal columns and keep only numeric features"""
+    df.drop(columns=['status'] + DATE_COLUMNS, inplace=True)
+    df = df.select_dtypes(include=np.number)
+    df.replace([np.inf, -np.inf], np.nan, inplace=True)
+    return df.drop('success', axis=1), df['success']
+
+def engineer_dataset(df, timer=_no_timer):
+    """
+    Raw 'startup data.csv' frame → (X, y, category_encoder): cleaning, date
+    parsing, feature engineering and category encoding as used for training.
+    timer(stage) wraps the cleaning and feature engineering stages.
+    """
+    with timer('clean'):
+        df = _clean(df)
+
+    with timer('feature_engineering'):
+        df = add_engineered_features(df)
+
+        # Encode category with frequency encoding (better than label encoding)
+        category_freq = df['category_code'].value_counts(normalize=True).to_dict()
+        df['category_frequency'] = df['category_code'].map(category_freq)
+
+        le = LabelEncoder()
+        df['category_code'] = le.fit_transform(df['category_code'].astype(str))
+
+        X, y = _numeric_features(df)
+
+    return X, y, le
+
+def transform_dataset(df, category_encoder, feature_stats):
+    """
+    Raw frame → (X, y) with the category codes, frequencies and risk
+    cut-offs of an earlier training run (feature_stats.FeatureStats), so the
+    rows line up with the model trained then. Categories the encoder has
+    not seen get NaN code and frequency, which the imputer fills.
+    """
+    df = add_engineered_features(_clean(df), feature_stats.early_stage_funding,
+                                 feature_stats.slow_milestone_velocity)
+    codes = df['category_code'].astype(str).map({label: code for code, label
+                                                in enumerate(category_encoder.classes_)})
+    known = codes.notna().to_numpy()
+    frequency = np.full(len(df), np.nan)
+    frequency[known] = feature_stats.frequencies(codes[known])
+    df['category_frequency'] = frequency
+    df['category_code'] = codes.astype(np.float64)
+
+    X, y = _numeric_features(df)
+    return X[list(feature_stats.feature_names)].astype(np.float64), y
+
+def load_feature_matrix(csv_path='startup data.csv', cache=None, timer=_no_timer):
+    """
+    (X, y, category_encoder, key) for a dataset CSV, from the cache when the
+    file contents and feature code are unchanged. Raises FileNotFoundError.
+    """
+    cache = cache or default_cache()
+    key = ArtifactCache.key('features', file_digest(csv_path), code_version())
+    cached = cache.load(key)
+    if cached is not None:
+        arrays, objects, metadata = cached
+        print(f"   ✓ Feature matrix loaded from cache ({key[:8]})")
+        X = pd.DataFrame(arrays['X'], columns=metadata['columns'])
+        return X, pd.Series(arrays['y'], name='success'), objects['category_encoder'], key
+
+    with timer('read_csv'):
+        df = pd.read_csv(csv_path)
+    X, y, le = engineer_dataset(df, timer)
+    X = X.astype(np.float64)
+    cache.save(key, {'X': X.to_numpy(), 'y': y.to_numpy()}, {'category_encoder': le},
+               {'columns': X.columns.tolist()})
+    return X.reset_index(drop=True), y.reset_index(drop=True), le, key
+
+def fit_preprocessing(X, imputer, scaler, features_key, cache=None):
+    """(X_scaled, fitted imputer, fitted scaler, key): fit_transform of both, cached"""
+    cache = cache or default_cache()
+    key = ArtifactCache.key('preprocessing', features_key, params_signature(imputer), params_signature(scaler))
+    cached = cache.load(key)
+    if cached is not None:
+        arrays, objects, _ = cached
+        print(f"   ✓ Imputed/scaled matrix loaded from cache ({key[:8]})")
+        return pd.DataFrame(arrays['X_scaled'], columns=X.columns), objects['imputer'], objects['scaler'], key
+
+    X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=X.columns)
+    X_scaled = pd.DataFrame(scaler.fit_transform(X_imputed), columns=X.columns)
+    cache.save(key, {'X_scaled': X_scaled.to_numpy()}, {'imputer': imputer, 'scaler': scaler})
+    return X_scaled, imputer, scaler, key
+
+def resample(X_train, y_train, resampler, split_key, cache=None):
+    """(X_resampled, y_resampled) from resampler.fit_resample, cached per split and resampler settings"""
+    cache = cache or default_cache()
+    key = ArtifactCache.key('resampled', split_key, params_signature(resampler))
+    cached = cache.load(key)
+    if cached is not None:
+        arrays, _, _ = cached
+        print(f"   ✓ Resampled training set loaded from cache ({key[:8]})")
+        return (pd.DataFrame(arrays['X'], columns=X_train.columns),
+                pd.Series(arrays['y'], name=y_train.name))
+
+    X_resampled, y_resampled = resampler.fit_resample(X_train, y_train)
+    cache.save(key, {'X': np.asarray(X_resampled), 'y': np.asarray(y_resampled)})
+    return X_resampled, y_resampled
@@ -0,0 +1,170 @@
+# ml_model/training_profile.py
+
+"""
+Profiling mode for train_model.py.
+
+StageProfiler records wall time, CPU time and peak resident memory for each
+training stage. run_profile() trains on a row sample of the real dataset or
+on a synthetic dataset of a given size, writes artifacts to a separate
+directory (never over the production .pkl files) together with a cProfile
+dump (pstats format: open it with snakeviz, or turn it into a flame graph
+with flameprof / gprof2dot) and a JSON summary. run_scaling() repeats that
+over several dataset sizes and prints how each stage grows.
+
+CPU time covers the training process itself; work done in joblib worker
+processes (the stacking fits, see TRAINING_N_JOBS) only shows up in wall
+time, so profile with TRAINING_N_JOBS=1 to attribute all CPU to stages.
+"""
+
+import cProfile
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import make_startup_frame
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _reset_peak_rss():
+    """Reset the kernel's RSS high-water mark (Linux); returns False where unsupported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+class StageProfiler:
+    """Per-stage wall time, CPU time and peak RSS, in the order stages ran"""
+
+    def __init__(self):
+        self.stages = []
+        self.per_stage_memory = _reset_peak_rss()
+
+    @contextmanager
+    def stage(self, name):
+        self.per_stage_memory = _reset_peak_rss() and self.per_stage_memory
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.stages.append({
+                'stage': name,
+                'wall_s': time.perf_counter() - wall,
+                'cpu_s': time.process_time() - cpu,
+                'peak_rss_mb': _peak_rss_mb(),
+            })
+
+    def totals(self):
+        """Stage records with repeated stage names merged (times summed, peak memory maxed)"""
+        merged = {}
+        for record in self.stages:
+            entry = merged.setdefault(record['stage'], {'stage': record['stage'], 'wall_s': 0.0,
+                                                        'cpu_s': 0.0, 'peak_rss_mb': 0.0})
+            entry['wall_s'] += record['wall_s']
+            entry['cpu_s'] += record['cpu_s']
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'], record['peak_rss_mb'])
+        return list(merged.values())
+
+    def report(self):
+        stages = self.totals()
+        total_wall = sum(stage['wall_s'] for stage in stages) or 1.0
+        memory_label = 'Peak RSS (MB)' if self.per_stage_memory else 'Max RSS so far (MB)'
+        print(f"\n{'Stage':<22} {'Wall (s)':>9} {'CPU (s)':>9} {'% wall':>7} {memory_label:>20}")
+        print("-" * 71)
+        for stage in stages:
+            print(f"{stage['stage']:<22} {stage['wall_s']:>9.2f} {stage['cpu_s']:>9.2f} "
+                  f"{stage['wall_s'] / total_wall:>6.1%} {stage['peak_rss_mb']:>20.0f}")
+        print(f"{'total':<22} {total_wall:>9.2f}")
+
+def prepare_dataset(run_dir, data_path='startup data.csv', sample_frac=None, synthetic_rows=None, seed=42):
+    """Write the dataset for a profiling run into run_dir and return its path"""
+    os.makedirs(run_dir, exist_ok=True)
+    target = os.path.join(run_dir, 'startup data.csv')
+    if synthetic_rows:
+        make_startup_frame(synthetic_rows, seed=seed).to_csv(target, index=False)
+    elif sample_frac and sample_frac < 1:
+        pd.read_csv(data_path).sample(frac=sample_frac, random_state=seed).to_csv(target, index=False)
+    else:
+        return data_path
+    return target
+
+def run_profile(train_fn, run_dir, data_path='startup data.csv', sample_frac=None, synthetic_rows=None,
+                **train_kwargs):
+    """
+    Train once under the stage profiler and cProfile. Writes the model
+    artifacts, training.prof and profile.json into run_dir and returns the
+    profile summary, including the metrics train_fn returned.
+    """
+    dataset = prepare_dataset(run_dir, data_path, sample_frac, synthetic_rows)
+    profiler = StageProfiler()
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        metrics = train_fn(data_path=dataset, output_dir=run_dir, profiler=profiler, **train_kwargs)
+    finally:
+        profile.disable()
+
+    profile_path = os.path.join(run_dir, 'training.prof')
+    profile.dump_stats(profile_path)
+    with open(dataset, 'rb') as f:
+        rows = sum(1 for _ in f) - 1
+    summary = {
+        'dataset': dataset,
+        'rows': rows,
+        'sample_frac': sample_frac,
+        'synthetic_rows': synthetic_rows,
+        'per_stage_memory': profiler.per_stage_memory,
+        'stages': profiler.totals(),
+        'metrics': metrics,
+        'cprofile': profile_path,
+    }
+    with open(os.path.join(run_dir, 'profile.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    profiler.report()
+    print(f"\n📊 cProfile dump: {profile_path} (e.g. `snakeviz {profile_path}`)")
+    return summary
+
+def run_scaling(train_fn, profile_dir, sizes, **train_kwargs):
+    """Profile synthetic datasets of each size and print wall time per stage with its growth exponent"""
+    summaries = []
+    for size in sizes:
+        print(f"\n{'#' * 70}\n# Profiling on {size:,} synthetic rows\n{'#' * 70}")
+        summaries.append(run_profile(train_fn, os.path.join(profile_dir, f'rows_{size}'),
+                                     synthetic_rows=size, **train_kwargs))
+
+    stages = list(dict.fromkeys(stage['stage'] for summary in summaries for stage in summary['stages']))
+    table = {stage: [next((s['wall_s'] for s in summary['stages'] if s['stage'] == stage), np.nan)
+                     for summary in summaries] for stage in stages}
+
+    # Slope of log(time) against log(rows): ~1 is linear, ~2 quadratic
+    print(f"\n{'Stage':<22}" + ''.join(f"{f'{size:,} rows':>14}" for size in sizes) + f"{'Growth':>9}")
+    print("-" * (31 + 14 * len(sizes)))
+    scaling = []
+    for stage, times in table.items():
+        times = np.asarray(times, dtype=np.float64)
+        valid = np.isfinite(times) & (times > 1e-4)
+        exponent = (np.polyfit(np.log(np.asarray(sizes)[valid]), np.log(times[valid]), 1)[0]
+                    if valid.sum() >= 2 else np.nan)
+        print(f"{stage:<22}" + ''.join(f"{t:>13.2f}s" for t in times) + f"{exponent:>8.2f}x")
+        scaling.append({'stage': stage, 'wall_s': dict(zip(map(str, sizes), times.tolist())),
+                        'growth_exponent': None if np.isnan(exponent) else float(exponent)})
+
+    with open(os.path.join(profile_dir, 'scaling.json'), 'w') as f:
+        json.dump({'sizes': list(sizes), 'stages': scaling}, f, indent=2)
+    print(f"\n✅ Scaling table written to {os.path.join(profile_dir, 'scaling.json')}")
+    return scaling